@@ -0,0 +1,182 @@
+"""Initial schema
+
+Tables already created by create_tables() at startup are kept; those from
+before the first migration gain the columns and constraints added since.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def _upgrade_existing_tables(existing):
+    """Bring tables created by an older create_tables() up to the current schema"""
+    
+    inspector = sa.inspect(op.get_bind())
+    
+    if "genomics_jobs" in existing:
+        columns = {column["name"] for column in inspector.get_columns("genomics_jobs")}
+        if "cost_finalized_at" not in columns:
+            op.add_column("genomics_jobs", sa.Column("cost_finalized_at", sa.DateTime))
+    
+    if "cost_data" in existing:
+        constraints = {constraint["name"] for constraint in inspector.get_unique_constraints("cost_data")}
+        if "uq_cost_data_natural_key" not in constraints:
+            # Reconciliation used to append rows on every run; keep the newest per key
+            op.execute(
+                "DELETE FROM cost_data WHERE id NOT IN ("
+                "SELECT max(id) FROM cost_data GROUP BY resource_id, usage_date, sample_id, service_name)"
+            )
+            with op.batch_alter_table("cost_data") as batch_op:
+                batch_op.create_unique_constraint(
+                    "uq_cost_data_natural_key", ["resource_id", "usage_date", "sample_id", "service_name"]
+                )
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    _upgrade_existing_tables(existing)
+    
+    if "organizations" not in existing:
+        op.create_table(
+            "organizations",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("name", sa.String, nullable=False),
+            sa.Column("subscription_tier", sa.String),
+            sa.Column("azure_spend_limit", sa.Float),
+            sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+        )
+    
+    if "azure_connections" not in existing:
+        op.create_table(
+            "azure_connections",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("organization_id", sa.Integer, sa.ForeignKey("organizations.id")),
+            sa.Column("name", sa.String, nullable=False),
+            sa.Column("tenant_id", sa.String, nullable=False),
+            sa.Column("client_id", sa.String, nullable=False),
+            sa.Column("client_secret", sa.String, nullable=False),
+            sa.Column("subscription_id", sa.String, nullable=False),
+            sa.Column("is_active", sa.Boolean),
+            sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+        )
+    
+    if "genomics_jobs" not in existing:
+        op.create_table(
+            "genomics_jobs",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("organization_id", sa.Integer, sa.ForeignKey("organizations.id")),
+            sa.Column("job_id", sa.String, nullable=False, unique=True),
+            sa.Column("workflow_name", sa.String, nullable=False),
+            sa.Column("sample_id", sa.String, nullable=False),
+            sa.Column("project_name", sa.String, nullable=False),
+            sa.Column("user_email", sa.String, nullable=False),
+            sa.Column("pipeline_type", sa.String, nullable=False),
+            sa.Column("status", sa.String),
+            sa.Column("started_at", sa.DateTime, server_default=sa.func.now()),
+            sa.Column("completed_at", sa.DateTime),
+            sa.Column("azure_resource_group", sa.String, nullable=False),
+            sa.Column("azure_batch_pool_id", sa.String),
+            sa.Column("estimated_runtime_hours", sa.Float),
+            sa.Column("actual_runtime_hours", sa.Float),
+            sa.Column("estimated_cost", sa.Float),
+            sa.Column("actual_cost", sa.Float),
+            sa.Column("cost_last_updated", sa.DateTime),
+            sa.Column("cost_finalized_at", sa.DateTime),
+            sa.Column("nextflow_config", sa.JSON),
+            sa.Column("resource_tags", sa.JSON),
+        )
+    
+    if "cost_data" not in existing:
+        op.create_table(
+            "cost_data",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("genomics_job_id", sa.Integer, sa.ForeignKey("genomics_jobs.id")),
+            sa.Column("resource_id", sa.String, nullable=False),
+            sa.Column("resource_type", sa.String, nullable=False),
+            sa.Column("service_name", sa.String, nullable=False),
+            sa.Column("cost_amount", sa.Float, nullable=False),
+            sa.Column("currency", sa.String),
+            sa.Column("billing_period", sa.String, nullable=False),
+            sa.Column("usage_date", sa.DateTime, nullable=False),
+            sa.Column("sample_id", sa.String, nullable=False),
+            sa.Column("project_name", sa.String, nullable=False),
+            sa.Column("user_email", sa.String, nullable=False),
+            sa.Column("azure_tags", sa.JSON),
+            sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+            sa.UniqueConstraint("resource_id", "usage_date", "sample_id", "service_name",
+                                name="uq_cost_data_natural_key"),
+        )
+    
+    if "cost_sync_watermarks" not in existing:
+        op.create_table(
+            "cost_sync_watermarks",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("azure_connection_id", sa.Integer, sa.ForeignKey("azure_connections.id"), nullable=False),
+            sa.Column("scope", sa.String, nullable=False),
+            sa.Column("finalized_through", sa.Date),
+            sa.Column("last_synced_at", sa.DateTime),
+            sa.UniqueConstraint("azure_connection_id", "scope", name="uq_cost_sync_watermark_scope"),
+        )
+    
+    if "daily_cost_rollups" not in existing:
+        op.create_table(
+            "daily_cost_rollups",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("usage_date", sa.Date, nullable=False),
+            sa.Column("project_name", sa.String, nullable=False),
+            sa.Column("user_email", sa.String, nullable=False),
+            sa.Column("pipeline_type", sa.String, nullable=False),
+            sa.Column("resource_type", sa.String, nullable=False),
+            sa.Column("cost_amount", sa.Float, nullable=False),
+            sa.Column("record_count", sa.Integer, nullable=False),
+            sa.Column("refreshed_at", sa.DateTime, server_default=sa.func.now()),
+            sa.UniqueConstraint("usage_date", "project_name", "user_email", "pipeline_type", "resource_type",
+                                name="uq_daily_cost_rollup_grain"),
+        )
+    
+    if "budget_alerts" not in existing:
+        op.create_table(
+            "budget_alerts",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("organization_id", sa.Integer, sa.ForeignKey("organizations.id")),
+            sa.Column("name", sa.String, nullable=False),
+            sa.Column("alert_type", sa.String, nullable=False),
+            sa.Column("threshold_amount", sa.Float, nullable=False),
+            sa.Column("threshold_percentage", sa.Float),
+            sa.Column("time_period", sa.String),
+            sa.Column("project_name", sa.String),
+            sa.Column("user_email", sa.String),
+            sa.Column("is_active", sa.Boolean),
+            sa.Column("last_triggered", sa.DateTime),
+            sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+        )
+    
+    if "optimization_recommendations" not in existing:
+        op.create_table(
+            "optimization_recommendations",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("organization_id", sa.Integer, sa.ForeignKey("organizations.id")),
+            sa.Column("title", sa.String, nullable=False),
+            sa.Column("description", sa.Text, nullable=False),
+            sa.Column("recommendation_type", sa.String, nullable=False),
+            sa.Column("potential_savings", sa.Float, nullable=False),
+            sa.Column("confidence_score", sa.Float, nullable=False),
+            sa.Column("resource_type", sa.String),
+            sa.Column("project_name", sa.String),
+            sa.Column("status", sa.String),
+            sa.Column("created_at", sa.DateTime, server_default=sa.func.now()),
+            sa.Column("implemented_at", sa.DateTime),
+        )
+
+def downgrade():
+    for table in (
+        "optimization_recommendations", "budget_alerts", "daily_cost_rollups",
+        "cost_sync_watermarks", "cost_data", "genomics_jobs", "azure_connections", "organizations"
+    ):
+        op.drop_table(table)
@@ -0,0 +1,27 @@
+"""Composite indexes on cost_data
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+COST_DATA_INDEXES = {
+    "ix_cost_data_project_usage_date": ["project_name", "usage_date"],
+    "ix_cost_data_job_usage_date": ["genomics_job_id", "usage_date"],
+    "ix_cost_data_sample_usage_date": ["sample_id", "usage_date"],
+    "ix_cost_data_usage_date_billing_period": ["usage_date", "billing_period"],
+}
+
+def upgrade():
+    for name, columns in COST_DATA_INDEXES.items():
+        op.create_index(name, "cost_data", columns, if_not_exists=True)
+
+def downgrade():
+    for name in COST_DATA_INDEXES:
+        op.drop_index(name, table_name="cost_data", if_exists=True)
@@ -0,0 +1,110 @@
+"""Monthly range partitioning of cost_data by usage_date (PostgreSQL only)
+
+The table is rebuilt as a partitioned table. Existing rows are copied into
+monthly partitions, and the indexes are recreated on the parent so every
+partition inherits them. Upcoming months are created at startup by
+ensure_cost_data_partitions().
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime, timedelta
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+COST_DATA_COLUMNS = (
+    "id, genomics_job_id, resource_id, resource_type, service_name, cost_amount, currency, "
+    "billing_period, usage_date, sample_id, project_name, user_email, azure_tags, created_at"
+)
+
+COST_DATA_INDEXES = {
+    "ix_cost_data_project_usage_date": "project_name, usage_date",
+    "ix_cost_data_job_usage_date": "genomics_job_id, usage_date",
+    "ix_cost_data_sample_usage_date": "sample_id, usage_date",
+    "ix_cost_data_usage_date_billing_period": "usage_date, billing_period",
+}
+
+def _next_month(month_start):
+    return (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def _create_cost_data_table(partitioned: bool):
+    primary_key = "PRIMARY KEY (id, usage_date)" if partitioned else "PRIMARY KEY (id)"
+    partition_clause = " PARTITION BY RANGE (usage_date)" if partitioned else ""
+    op.execute(f"""
+        CREATE TABLE cost_data (
+            id INTEGER NOT NULL DEFAULT nextval('cost_data_id_seq'),
+            genomics_job_id INTEGER REFERENCES genomics_jobs (id),
+            resource_id VARCHAR NOT NULL,
+            resource_type VARCHAR NOT NULL,
+            service_name VARCHAR NOT NULL,
+            cost_amount DOUBLE PRECISION NOT NULL,
+            currency VARCHAR,
+            billing_period VARCHAR NOT NULL,
+            usage_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            sample_id VARCHAR NOT NULL,
+            project_name VARCHAR NOT NULL,
+            user_email VARCHAR NOT NULL,
+            azure_tags JSON,
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+            {primary_key},
+            CONSTRAINT uq_cost_data_natural_key UNIQUE (resource_id, usage_date, sample_id, service_name)
+        ){partition_clause}
+    """)
+
+def _detach_current_table(new_name: str):
+    """Rename cost_data out of the way and free its constraint and index names"""
+    op.execute(f"ALTER TABLE cost_data RENAME TO {new_name}")
+    op.execute("ALTER SEQUENCE cost_data_id_seq OWNED BY NONE")
+    op.execute(f"ALTER TABLE {new_name} RENAME CONSTRAINT cost_data_pkey TO {new_name}_pkey")
+    op.execute(f"ALTER TABLE {new_name} DROP CONSTRAINT IF EXISTS uq_cost_data_natural_key")
+    for name in list(COST_DATA_INDEXES) + ["ix_cost_data_id"]:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+def _finish_table(old_name: str):
+    op.execute(f"INSERT INTO cost_data ({COST_DATA_COLUMNS}) SELECT {COST_DATA_COLUMNS} FROM {old_name}")
+    op.execute(f"DROP TABLE {old_name}")
+    op.execute("ALTER SEQUENCE cost_data_id_seq OWNED BY cost_data.id")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_cost_data_id ON cost_data (id)")
+    for name, columns in COST_DATA_INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON cost_data ({columns})")
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    
+    _detach_current_table("cost_data_unpartitioned")
+    _create_cost_data_table(partitioned=True)
+    
+    # One partition per month from the oldest stored row to three months ahead
+    oldest = bind.execute(sa.text("SELECT min(usage_date) FROM cost_data_unpartitioned")).scalar()
+    month_start = (oldest or datetime.utcnow()).date().replace(day=1)
+    last_month = datetime.utcnow().date().replace(day=1)
+    for _ in range(3):
+        last_month = _next_month(last_month)
+    
+    while month_start <= last_month:
+        next_month = _next_month(month_start)
+        op.execute(
+            f"CREATE TABLE cost_data_{month_start:%Y_%m} PARTITION OF cost_data "
+            f"FOR VALUES FROM ('{month_start:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}')"
+        )
+        month_start = next_month
+    op.execute("CREATE TABLE cost_data_default PARTITION OF cost_data DEFAULT")
+    
+    _finish_table("cost_data_unpartitioned")
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    
+    _detach_current_table("cost_data_partitioned")
+    _create_cost_data_table(partitioned=False)
+    _finish_table("cost_data_partitioned")
@@ -0,0 +1,33 @@
+"""Daily cost trend series
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("daily_cost_series"):
+        return
+    
+    op.create_table(
+        "daily_cost_series",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("usage_date", sa.Date, nullable=False, unique=True),
+        sa.Column("total_cost", sa.Float, nullable=False),
+        sa.Column("compute_cost", sa.Float, nullable=False),
+        sa.Column("storage_cost", sa.Float, nullable=False),
+        sa.Column("network_cost", sa.Float, nullable=False),
+        sa.Column("other_cost", sa.Float, nullable=False),
+        sa.Column("job_count", sa.Integer, nullable=False),
+        sa.Column("refreshed_at", sa.DateTime, server_default=sa.func.now()),
+    )
+
+def downgrade():
+    op.drop_table("daily_cost_series")
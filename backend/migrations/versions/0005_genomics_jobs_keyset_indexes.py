@@ -0,0 +1,28 @@
+"""Keyset pagination indexes on genomics_jobs
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+GENOMICS_JOBS_INDEXES = {
+    "ix_genomics_jobs_started_at_id": ["started_at", "id"],
+    "ix_genomics_jobs_status_started_at_id": ["status", "started_at", "id"],
+    "ix_genomics_jobs_project_started_at_id": ["project_name", "started_at", "id"],
+    "ix_genomics_jobs_user_started_at_id": ["user_email", "started_at", "id"],
+    "ix_genomics_jobs_pipeline_started_at_id": ["pipeline_type", "started_at", "id"],
+}
+
+def upgrade():
+    for name, columns in GENOMICS_JOBS_INDEXES.items():
+        op.create_index(name, "genomics_jobs", columns, if_not_exists=True)
+
+def downgrade():
+    for name in GENOMICS_JOBS_INDEXES:
+        op.drop_index(name, table_name="genomics_jobs", if_exists=True)
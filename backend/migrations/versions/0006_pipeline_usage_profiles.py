@@ -0,0 +1,36 @@
+"""Pipeline storage and network usage profiles
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("pipeline_usage_profiles"):
+        return
+    
+    op.create_table(
+        "pipeline_usage_profiles",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("pipeline_type", sa.String, nullable=False),
+        sa.Column("workflow_name", sa.String, nullable=False),
+        sa.Column("job_count", sa.Integer, nullable=False),
+        sa.Column("stored_gb_samples", sa.JSON),
+        sa.Column("transferred_gb_samples", sa.JSON),
+        sa.Column("stored_gb_p50", sa.Float),
+        sa.Column("stored_gb_p90", sa.Float),
+        sa.Column("transferred_gb_p50", sa.Float),
+        sa.Column("transferred_gb_p90", sa.Float),
+        sa.Column("updated_at", sa.DateTime, server_default=sa.func.now()),
+        sa.UniqueConstraint("pipeline_type", "workflow_name", name="uq_pipeline_usage_profile"),
+    )
+
+def downgrade():
+    op.drop_table("pipeline_usage_profiles")
@@ -0,0 +1,49 @@
+"""Per-task Nextflow trace usage and cost
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("process_traces"):
+        return
+    
+    op.create_table(
+        "process_traces",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("genomics_job_id", sa.Integer, sa.ForeignKey("genomics_jobs.id"), nullable=False),
+        sa.Column("task_id", sa.Integer, nullable=False),
+        sa.Column("process", sa.String, nullable=False),
+        sa.Column("name", sa.String),
+        sa.Column("status", sa.String),
+        sa.Column("exit_code", sa.Integer),
+        sa.Column("attempt", sa.Integer),
+        sa.Column("cpus", sa.Integer),
+        sa.Column("memory_bytes", sa.Float),
+        sa.Column("submitted_at", sa.DateTime),
+        sa.Column("started_at", sa.DateTime),
+        sa.Column("completed_at", sa.DateTime),
+        sa.Column("duration_seconds", sa.Float),
+        sa.Column("realtime_seconds", sa.Float),
+        sa.Column("cpu_percent", sa.Float),
+        sa.Column("peak_rss_bytes", sa.Float),
+        sa.Column("peak_vmem_bytes", sa.Float),
+        sa.Column("read_bytes", sa.Float),
+        sa.Column("write_bytes", sa.Float),
+        sa.Column("vm_size", sa.String),
+        sa.Column("cost_amount", sa.Float, nullable=False, server_default="0"),
+        sa.UniqueConstraint("genomics_job_id", "task_id", name="uq_process_trace_task"),
+    )
+    op.create_index("ix_process_traces_job_process", "process_traces", ["genomics_job_id", "process"])
+
+def downgrade():
+    op.drop_index("ix_process_traces_job_process", table_name="process_traces")
+    op.drop_table("process_traces")
@@ -0,0 +1,30 @@
+"""Live task progress on genomics_jobs
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+PROGRESS_COLUMNS = {
+    "tasks_submitted": (sa.Integer, "0"),
+    "tasks_completed": (sa.Integer, "0"),
+    "tasks_failed": (sa.Integer, "0"),
+    "running_cost": (sa.Float, "0"),
+}
+
+def upgrade():
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("genomics_jobs")}
+    for name, (column_type, default) in PROGRESS_COLUMNS.items():
+        if name not in existing:
+            op.add_column("genomics_jobs", sa.Column(name, column_type, nullable=False, server_default=default))
+
+def downgrade():
+    for name in PROGRESS_COLUMNS:
+        op.drop_column("genomics_jobs", name)
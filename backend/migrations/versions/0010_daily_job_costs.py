@@ -0,0 +1,36 @@
+"""Per-day job costs for distinct job counts over trend buckets
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("daily_job_costs"):
+        return
+    
+    op.create_table(
+        "daily_job_costs",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("usage_date", sa.Date, nullable=False),
+        sa.Column("genomics_job_id", sa.Integer, sa.ForeignKey("genomics_jobs.id"), nullable=False),
+        sa.Column("cost_amount", sa.Float, nullable=False),
+        sa.UniqueConstraint("usage_date", "genomics_job_id", name="uq_daily_job_cost"),
+    )
+    
+    # Backfill from the stored cost rows; later syncs keep it current through refresh_daily_rollups
+    op.execute(
+        "INSERT INTO daily_job_costs (usage_date, genomics_job_id, cost_amount) "
+        "SELECT date(usage_date), genomics_job_id, sum(cost_amount) FROM cost_data "
+        "WHERE genomics_job_id IS NOT NULL GROUP BY date(usage_date), genomics_job_id"
+    )
+
+def downgrade():
+    op.drop_table("daily_job_costs")
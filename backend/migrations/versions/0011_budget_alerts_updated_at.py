@@ -0,0 +1,25 @@
+"""Change watermark on budget_alerts
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("budget_alerts")}
+    if "updated_at" in existing:
+        return
+    
+    op.add_column("budget_alerts", sa.Column("updated_at", sa.DateTime, server_default=sa.func.now()))
+    op.create_index("ix_budget_alerts_updated_at", "budget_alerts", ["updated_at"])
+
+def downgrade():
+    op.drop_index("ix_budget_alerts_updated_at", table_name="budget_alerts")
+    op.drop_column("budget_alerts", "updated_at")
@@ -0,0 +1,23 @@
+"""Batch account endpoint per Azure connection
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("azure_connections")}
+    if "batch_account_url" in existing:
+        return
+    
+    op.add_column("azure_connections", sa.Column("batch_account_url", sa.String, nullable=True))
+
+def downgrade():
+    op.drop_column("azure_connections", "batch_account_url")
@@ -0,0 +1,50 @@
+"""Project and user in the cost_data natural key
+
+Cost Management groups rows by project and user tags as well, so rows that
+differ only in those tags are distinct costs rather than duplicates.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+NATURAL_KEY = ["resource_id", "usage_date", "sample_id", "service_name", "project_name", "user_email"]
+PREVIOUS_NATURAL_KEY = ["resource_id", "usage_date", "sample_id", "service_name"]
+
+def _natural_key_columns():
+    for constraint in sa.inspect(op.get_bind()).get_unique_constraints("cost_data"):
+        if constraint["name"] == "uq_cost_data_natural_key":
+            return constraint["column_names"]
+    return None
+
+def _replace_natural_key(columns):
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_constraint("uq_cost_data_natural_key", "cost_data", type_="unique")
+        op.create_unique_constraint("uq_cost_data_natural_key", "cost_data", columns)
+        return
+    
+    # SQLite cannot alter constraints in place; the batch rebuilds the table
+    with op.batch_alter_table("cost_data") as batch_op:
+        batch_op.drop_constraint("uq_cost_data_natural_key", type_="unique")
+        batch_op.create_unique_constraint("uq_cost_data_natural_key", columns)
+
+def upgrade():
+    if _natural_key_columns() == NATURAL_KEY:
+        return
+    
+    _replace_natural_key(NATURAL_KEY)
+
+def downgrade():
+    # The narrower key cannot hold rows that differ only by project or user; keep the newest per key
+    op.execute(
+        "DELETE FROM cost_data WHERE id NOT IN ("
+        "SELECT max(id) FROM cost_data GROUP BY resource_id, usage_date, sample_id, service_name)"
+    )
+    _replace_natural_key(PREVIOUS_NATURAL_KEY)
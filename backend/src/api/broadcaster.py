@@ -0,0 +1,202 @@
+from fastapi import WebSocket
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Set
+import asyncio
+import itertools
+import json
+
+from .message_bus import MessageBus
+
+# Topic every client starts on; dropped once the client subscribes explicitly
+ALL_TOPICS = "*"
+
+# Topic prefix of worker-to-worker signals; these go to signal handlers, never to clients
+SIGNAL_PREFIX = "signal:"
+
+class ClientConnection:
+    """One WebSocket client with a bounded, coalescing send queue"""
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue_size = queue_size
+        self.topics: Set[str] = set()
+        self.dropped_messages = 0
+        self.closed = False
+        self._pending: "OrderedDict[object, str]" = OrderedDict()
+        self._ready = asyncio.Event()
+        self._sequence = itertools.count()
+        self._sender: Optional[asyncio.Task] = None
+
+    def enqueue(self, message: str, coalesce_key: Optional[str] = None):
+        """Queue a message without waiting; never blocks the publisher"""
+        
+        if self.closed:
+            return
+        
+        # A newer message with the same key replaces the queued one in place
+        if coalesce_key is not None and coalesce_key in self._pending:
+            self._pending[coalesce_key] = message
+            return
+        
+        # Slow consumer: drop the oldest queued message to make room
+        if len(self._pending) >= self.queue_size:
+            self._pending.popitem(last=False)
+            self.dropped_messages += 1
+        
+        key = coalesce_key if coalesce_key is not None else next(self._sequence)
+        self._pending[key] = message
+        self._ready.set()
+
+    async def next_message(self) -> str:
+        """Wait for and remove the oldest queued message"""
+        
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._pending.popitem(last=False)[1]
+
+class Broadcaster:
+    """Topic-based fan-out to WebSocket clients with per-client send queues"""
+
+    def __init__(self, queue_size: int = 100, send_timeout: float = 5.0, bus: Optional[MessageBus] = None):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.bus = bus
+        self.clients: Set[ClientConnection] = set()
+        self._subscribers: Dict[str, Set[ClientConnection]] = {}
+        self._signal_handlers: Dict[str, Callable[[str], None]] = {}
+
+    async def start(self):
+        """Start relaying events published by other workers"""
+        if self.bus is not None:
+            await self.bus.start(self._relay)
+
+    async def stop(self):
+        if self.bus is not None:
+            await self.bus.close()
+
+    async def connect(self, websocket: WebSocket, topics: Optional[Iterable[str]] = None) -> ClientConnection:
+        """Accept a socket, subscribe it and start its sender"""
+        
+        await websocket.accept()
+        client = ClientConnection(websocket, self.queue_size)
+        self.clients.add(client)
+        self.subscribe(client, topics or [ALL_TOPICS])
+        client._sender = asyncio.create_task(self._send_loop(client))
+        return client
+
+    async def disconnect(self, client: ClientConnection):
+        """Unsubscribe a client and stop its sender; safe to call more than once"""
+        
+        if client.closed:
+            return
+        
+        client.closed = True
+        self.clients.discard(client)
+        self.unsubscribe(client, list(client.topics))
+        if client._sender and client._sender is not asyncio.current_task():
+            client._sender.cancel()
+
+    def subscribe(self, client: ClientConnection, topics: Iterable[str]):
+        """Add topics to a client's subscriptions"""
+        
+        topics = set(topics)
+        if client.topics == {ALL_TOPICS} and ALL_TOPICS not in topics:
+            self.unsubscribe(client, [ALL_TOPICS])
+        
+        for topic in topics:
+            client.topics.add(topic)
+            self._subscribers.setdefault(topic, set()).add(client)
+
+    def unsubscribe(self, client: ClientConnection, topics: Iterable[str]):
+        """Remove topics from a client's subscriptions"""
+        
+        for topic in topics:
+            client.topics.discard(topic)
+            subscribers = self._subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    def handle_client_message(self, client: ClientConnection, raw_message: str):
+        """Apply a {"action": "subscribe"|"unsubscribe", "topics": [...]} request"""
+        
+        try:
+            request = json.loads(raw_message)
+            action = request.get("action")
+            topics = [str(topic) for topic in request.get("topics", [])]
+        except (ValueError, AttributeError, TypeError):
+            return
+        
+        if action == "subscribe":
+            self.subscribe(client, topics)
+        elif action == "unsubscribe":
+            self.unsubscribe(client, topics)
+
+    def publish(self, message: str, topics: Iterable[str] = (), coalesce_key: Optional[str] = None,
+                relay: bool = True) -> int:
+        """Queue a message for local clients on any of the topics and relay it to the other workers;
+        returns the local recipient count"""
+        
+        topics = list(topics)
+        if relay and self.bus is not None:
+            self.bus.publish(message, topics, coalesce_key)
+        return self.publish_local(message, topics, coalesce_key)
+
+    def publish_local(self, message: str, topics: Iterable[str] = (), coalesce_key: Optional[str] = None) -> int:
+        """Queue a message for this worker's clients only; the "*" topic reaches every client"""
+        
+        topics = list(topics)
+        if ALL_TOPICS in topics:
+            recipients = set(self.clients)
+        else:
+            recipients = set(self._subscribers.get(ALL_TOPICS, ()))
+            for topic in topics:
+                recipients.update(self._subscribers.get(topic, ()))
+        
+        for client in recipients:
+            client.enqueue(message, coalesce_key)
+        
+        return len(recipients)
+
+    async def broadcast(self, message: str):
+        """Send a message to every connected client on every worker"""
+        
+        self.publish(message, [ALL_TOPICS])
+
+    def on_signal(self, name: str, handler: Callable[[str], None]):
+        """Call handler with the payload whenever another worker raises the named signal"""
+        self._signal_handlers[name] = handler
+
+    def signal(self, name: str, payload: str = ""):
+        """Raise a named signal on the other workers; this worker's handler is not called"""
+        if self.bus is not None:
+            self.bus.publish(payload, [SIGNAL_PREFIX + name])
+
+    def _relay(self, envelope: Dict):
+        topics = envelope.get("topics", ())
+        if len(topics) == 1 and topics[0].startswith(SIGNAL_PREFIX):
+            handler = self._signal_handlers.get(topics[0][len(SIGNAL_PREFIX):])
+            if handler is not None:
+                handler(envelope["message"])
+            return
+        self.publish_local(envelope["message"], envelope.get("topics", ()), envelope.get("coalesce_key"))
+
+    async def _send_loop(self, client: ClientConnection):
+        """Drain one client's queue; a failed or stalled send drops the client"""
+        
+        try:
+            while True:
+                message = await client.next_message()
+                await asyncio.wait_for(client.websocket.send_text(message), timeout=self.send_timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Dropping WebSocket client: {e!r}")
+            await self.disconnect(client)
+            # Close our side too, or a stalled client keeps the socket and its ASGI task alive
+            try:
+                await asyncio.wait_for(client.websocket.close(), timeout=self.send_timeout)
+            except Exception:
+                pass
@@ -0,0 +1,102 @@
+from datetime import datetime
+from typing import Dict, Optional
+import asyncio
+
+from ..config.settings import settings
+from ..models.database import SessionLocal
+from ..services.dashboard_service import DashboardService
+from .broadcaster import Broadcaster, ClientConnection
+from .schemas import CostUpdateMessage
+
+# Topic cost snapshots are published on (clients on "*" receive them too)
+COST_UPDATES_TOPIC = "costs"
+
+# Signal that tells the other workers' producers to recompute now rather than on their next poll
+COST_CHANGED_SIGNAL = "cost_changed"
+
+class CostUpdateProducer:
+    """Single producer that pushes cost deltas to WebSocket clients when totals change"""
+
+    def __init__(self, broadcaster: Broadcaster, debounce_seconds: float, max_interval_seconds: float):
+        self.broadcaster = broadcaster
+        self.debounce_seconds = debounce_seconds
+        self.max_interval_seconds = max_interval_seconds
+        self.snapshot: Optional[Dict] = None
+        self.last_message: Optional[str] = None
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        broadcaster.on_signal(COST_CHANGED_SIGNAL, lambda _: self.notify_changed(relay=False))
+
+    def notify_changed(self, relay: bool = True):
+        """Signal that ingestion or a job event may have changed the totals, here and on the other workers"""
+        
+        self._changed.set()
+        if relay:
+            self.broadcaster.signal(COST_CHANGED_SIGNAL)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def send_current(self, client: ClientConnection):
+        """Give a newly connected client the latest snapshot"""
+        if self.last_message is not None:
+            client.enqueue(self.last_message, coalesce_key="cost_update")
+
+    def compute_snapshot(self) -> Dict:
+        """Current totals, read from the daily rollups"""
+        
+        db = SessionLocal()
+        try:
+            return DashboardService(db).get_cost_snapshot()
+        finally:
+            db.close()
+
+    def publish_if_changed(self) -> bool:
+        """Recompute the snapshot and publish a delta only if it differs"""
+        
+        snapshot = self.compute_snapshot()
+        if snapshot == self.snapshot:
+            return False
+        
+        previous_total = self.snapshot["total_cost"] if self.snapshot else snapshot["total_cost"]
+        self.snapshot = snapshot
+        
+        # Encoded once and shared by every recipient
+        self.last_message = CostUpdateMessage(
+            type="cost_update",
+            cost_change=round(snapshot["total_cost"] - previous_total, 2),
+            timestamp=datetime.utcnow().isoformat() + "Z",
+            data=snapshot
+        ).model_dump_json()
+        # Every worker runs its own producer against the shared database and is told of changes
+        # by COST_CHANGED_SIGNAL, so the snapshot itself is not relayed
+        self.broadcaster.publish(self.last_message, topics=[COST_UPDATES_TOPIC], coalesce_key="cost_update", relay=False)
+        return True
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=self.max_interval_seconds)
+                # Let a burst of events settle into one snapshot
+                await asyncio.sleep(self.debounce_seconds)
+            except asyncio.TimeoutError:
+                pass
+            
+            self._changed.clear()
+            try:
+                self.publish_if_changed()
+            except Exception as e:
+                print(f"Error publishing cost update: {e}")
+
+def create_cost_update_producer(broadcaster: Broadcaster) -> CostUpdateProducer:
+    return CostUpdateProducer(
+        broadcaster,
+        debounce_seconds=settings.COST_UPDATE_DEBOUNCE_SECONDS,
+        max_interval_seconds=settings.COST_UPDATE_MAX_INTERVAL_SECONDS
+    )
@@ -1,17 +1,31 @@
-from fastapi import FastAPI, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import List, Dict, Optional
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 import asyncio
 
 from ..config.settings import settings
 from ..models.database import get_db, create_tables, GenomicsJob, CostData, BudgetAlert, OptimizationRecommendation
 from ..services.azure_cost_service import AzureCostService, CostReconciliationService
+from ..services.azure_executor import azure_executor
+from ..services.azure_client_pool import azure_services
+from ..services.batch_metrics import batch_metrics
+from ..services.budget_alerts import AlertRule, budget_alerts
+from ..services.dashboard_service import DashboardService
+from ..services.job_service import JobService
+from ..services.reconciliation_scheduler import reconciliation_scheduler
+from ..services.runtime_predictor import runtime_models
+from ..services.trace_ingestion import TraceIngestor, process_costs
+from ..services.weblog_writer import job_progress
 from .schemas import *
 from .auth import get_current_user, create_access_token
+from .broadcaster import Broadcaster
+from .cost_updates import create_cost_update_producer
+from .message_bus import create_message_bus
+from .weblog import create_weblog_receiver
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -27,39 +41,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Security
 security = HTTPBearer()
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
-
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
-
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                pass
+# WebSocket fan-out
+manager = Broadcaster(
+    queue_size=settings.WS_CLIENT_QUEUE_SIZE,
+    send_timeout=settings.WS_SEND_TIMEOUT_SECONDS,
+    bus=create_message_bus(settings.WS_MESSAGE_BUS, settings.REDIS_URL, settings.WS_MESSAGE_BUS_CHANNEL)
+)
+cost_updates = create_cost_update_producer(manager)
+weblog = create_weblog_receiver(manager, cost_updates)
 
-manager = ConnectionManager()
+# Signal carrying the leader's Batch metrics snapshots to the other workers
+JOB_METRICS_SIGNAL = "job_metrics"
 
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     create_tables()
+    runtime_models.load()
+    
+    # Alerts are evaluated by the reconciliation leader, seeded from the rollups on its first batch
+    # after taking the lease; they fire on its worker threads, and clients are only touched from the event loop
+    loop = asyncio.get_running_loop()
+    budget_alerts.on_trigger = lambda rule, amount: loop.call_soon_threadsafe(publish_budget_alert, rule, amount)
+    reconciliation_scheduler.on_leader_elected = budget_alerts.invalidate
+    # Only the reconciliation leader polls Batch; the other workers keep the snapshots it shares
+    batch_metrics.on_snapshot = publish_job_metrics
+    batch_metrics.is_leader = lambda: reconciliation_scheduler.is_leader
+    manager.on_signal(JOB_METRICS_SIGNAL, lambda payload: batch_metrics.record(json.loads(payload)))
+    reconciliation_scheduler.on_reconciled = cost_updates.notify_changed
+    await manager.start()
+    cost_updates.start()
+    weblog.start()
+    batch_metrics.start()
+    reconciliation_scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await reconciliation_scheduler.stop()
+    await batch_metrics.stop()
+    await weblog.stop()
+    await cost_updates.stop()
+    await manager.stop()
+    azure_services.close_all()
+    azure_executor.shutdown()
 
 # Health check
 @app.get("/health")
@@ -89,106 +119,73 @@ async def get_dashboard_overview(
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Mock data for demo - replace with real queries
-    return {
-        "total_cost_this_month": 2847.32,
-        "total_jobs_running": 12,
-        "total_jobs_completed": 156,
-        "average_cost_per_sample": 18.25,
-        "cost_trend_percentage": 8.5,
-        "top_projects": [
-            {"name": "Cancer Genomics", "cost": 1245.67, "samples": 68},
-            {"name": "Rare Disease Study", "cost": 892.45, "samples": 49},
-            {"name": "Population Genetics", "cost": 709.20, "samples": 39}
-        ],
-        "recent_alerts": [
-            {
-                "id": 1,
-                "type": "budget_exceeded",
-                "message": "Project 'Cancer Genomics' exceeded 80% of monthly budget",
-                "timestamp": "2024-01-15T10:30:00Z",
-                "severity": "warning"
-            }
-        ]
-    }
+    return DashboardService(db).get_overview()
 
 @app.get("/api/v1/dashboard/cost-trends", response_model=List[CostTrendData])
 async def get_cost_trends(
-    days: int = 30,
+    days: int = Query(30, ge=1, le=365),
+    granularity: Optional[str] = None,  # daily, weekly, monthly; chosen from days if omitted
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Mock data for demo
-    base_date = datetime.now() - timedelta(days=days)
-    trends = []
-    
-    for i in range(days):
-        date = base_date + timedelta(days=i)
-        trends.append({
-            "date": date.strftime("%Y-%m-%d"),
-            "total_cost": 45.67 + (i * 2.3) + (i % 7 * 15.2),
-            "compute_cost": 32.45 + (i * 1.8),
-            "storage_cost": 8.92 + (i * 0.3),
-            "network_cost": 4.30 + (i * 0.2),
-            "job_count": 3 + (i % 5)
-        })
-    
-    return trends
+    try:
+        return DashboardService(db).get_cost_trends(days=days, granularity=granularity)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # Jobs endpoints
+def serialize_job(job: GenomicsJob) -> dict:
+    return {
+        "id": job.id,
+        "job_id": job.job_id,
+        "workflow_name": job.workflow_name,
+        "sample_id": job.sample_id,
+        "project_name": job.project_name,
+        "user_email": job.user_email,
+        "pipeline_type": job.pipeline_type,
+        "status": job.status,
+        "started_at": job.started_at.isoformat() + "Z",
+        "completed_at": job.completed_at.isoformat() + "Z" if job.completed_at else None,
+        "estimated_cost": job.estimated_cost,
+        "actual_cost": job.actual_cost,
+        "estimated_runtime_hours": job.estimated_runtime_hours,
+        "actual_runtime_hours": job.actual_runtime_hours,
+        "progress_percentage": job_progress(job)
+    }
+
 @app.get("/api/v1/jobs", response_model=List[GenomicsJobResponse])
 async def get_jobs(
+    response: Response,
     status: Optional[str] = None,
     project: Optional[str] = None,
+    user: Optional[str] = None,
+    pipeline_type: Optional[str] = None,
+    started_after: Optional[datetime] = None,
+    started_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
     limit: int = 50,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Mock data for demo
-    jobs = [
-        {
-            "id": 1,
-            "job_id": "nf-core-rnaseq-001",
-            "workflow_name": "nf-core/rnaseq",
-            "sample_id": "SAMPLE_001",
-            "project_name": "Cancer Genomics",
-            "user_email": "researcher@lab.com",
-            "pipeline_type": "RNA-seq",
-            "status": "running",
-            "started_at": "2024-01-15T08:30:00Z",
-            "estimated_cost": 23.45,
-            "actual_cost": 0.0,
-            "estimated_runtime_hours": 4.5,
-            "progress_percentage": 65
-        },
-        {
-            "id": 2,
-            "job_id": "nf-core-wgs-002",
-            "workflow_name": "nf-core/sarek",
-            "sample_id": "SAMPLE_002",
-            "project_name": "Rare Disease Study",
-            "user_email": "analyst@lab.com",
-            "pipeline_type": "WGS",
-            "status": "completed",
-            "started_at": "2024-01-14T14:20:00Z",
-            "completed_at": "2024-01-15T02:15:00Z",
-            "estimated_cost": 89.32,
-            "actual_cost": 92.18,
-            "estimated_runtime_hours": 12.0,
-            "actual_runtime_hours": 11.9,
-            "progress_percentage": 100
-        }
-    ]
-    
-    # Filter by status if provided
-    if status:
-        jobs = [job for job in jobs if job["status"] == status]
+    try:
+        jobs, next_cursor = JobService(db).list_jobs(
+            status=status,
+            project=project,
+            user=user,
+            pipeline_type=pipeline_type,
+            started_after=started_after,
+            started_before=started_before,
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Filter by project if provided
-    if project:
-        jobs = [job for job in jobs if job["project_name"] == project]
+    # The body stays a plain list; the next page is addressed through a header
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    return jobs[:limit]
+    return [serialize_job(job) for job in jobs]
 
 @app.post("/api/v1/jobs", response_model=GenomicsJobResponse)
 async def create_job(
@@ -211,40 +208,34 @@ async def create_job(
         nextflow_config=job_request.nextflow_config
     )
     
+    # Fill in a runtime when the pipeline did not send one
+    if job.estimated_runtime_hours is None:
+        prediction = runtime_models.predict_job(job)
+        if prediction:
+            job.estimated_runtime_hours = round(prediction.hours, 2)
+    
     db.add(job)
     db.commit()
     db.refresh(job)
     
     # Estimate cost
-    # azure_service = AzureCostService(azure_connection)  # Would get from DB
+    # azure_service = get_azure_service(azure_connection)  # Would get from DB
     # estimated_cost = await azure_service.estimate_job_cost(job)
     # job.estimated_cost = estimated_cost
     job.estimated_cost = 45.67  # Mock for demo
     
     db.commit()
     
-    # Broadcast job creation to WebSocket clients
-    await manager.broadcast(json.dumps({
+    # Notify dashboards following this project or job
+    manager.publish(json.dumps({
         "type": "job_created",
         "job_id": job.job_id,
+        "project_name": job.project_name,
         "estimated_cost": job.estimated_cost
-    }))
+    }), topics=[f"project:{job.project_name}", f"job:{job.job_id}"])
+    cost_updates.notify_changed()
     
-    return {
-        "id": job.id,
-        "job_id": job.job_id,
-        "workflow_name": job.workflow_name,
-        "sample_id": job.sample_id,
-        "project_name": job.project_name,
-        "user_email": job.user_email,
-        "pipeline_type": job.pipeline_type,
-        "status": job.status,
-        "started_at": job.started_at.isoformat() + "Z",
-        "estimated_cost": job.estimated_cost,
-        "actual_cost": job.actual_cost,
-        "estimated_runtime_hours": job.estimated_runtime_hours,
-        "progress_percentage": 0
-    }
+    return serialize_job(job)
 
 @app.get("/api/v1/jobs/{job_id}/cost-breakdown", response_model=JobCostBreakdown)
 async def get_job_cost_breakdown(
@@ -267,26 +258,102 @@ async def get_job_cost_breakdown(
         ]
     }
 
+# Live metrics are served from the collector's cache; requests never reach Azure
+@app.get("/api/v1/jobs/{job_id}/metrics", response_model=BatchJobMetrics)
+async def get_job_metrics(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    snapshot = batch_metrics.get(job_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No live metrics for this job")
+    return snapshot
+
+def publish_job_metrics(snapshot: dict):
+    """Push a fresh metrics snapshot to dashboards following the job or its project, and to the other workers"""
+    
+    manager.publish(
+        json.dumps({"type": "job_metrics", **snapshot}),
+        topics=[f"project:{snapshot['project_name']}", f"job:{snapshot['job_id']}"],
+        coalesce_key=f"job_metrics:{snapshot['job_id']}"
+    )
+    manager.signal(JOB_METRICS_SIGNAL, json.dumps(snapshot))
+
+# Reconciliation endpoints
+@app.get("/api/v1/reconciliation/status", response_model=ReconciliationStatus)
+async def get_reconciliation_status(
+    current_user: dict = Depends(get_current_user)
+):
+    return await asyncio.get_running_loop().run_in_executor(None, reconciliation_scheduler.status)
+
+# Nextflow trace endpoints
+# The body is the raw trace.txt, read as it arrives so multi-GB traces never sit in memory
+@app.post("/api/v1/jobs/{job_id}/trace", response_model=TraceIngestResponse)
+async def ingest_job_trace(
+    job_id: str,
+    request: Request,
+    vm_size: Optional[str] = None,  # Defaults to vm_size/vmType in the job's Nextflow config
+    low_priority: bool = False,
+    region: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    loop = asyncio.get_running_loop()
+    job = await loop.run_in_executor(
+        None, lambda: db.query(GenomicsJob).filter(GenomicsJob.job_id == job_id).first()
+    )
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    # Parsing and batch commits are blocking, so they run on the thread pool while the body streams in
+    ingestor = await loop.run_in_executor(
+        None, lambda: TraceIngestor(db, job, vm_size=vm_size, low_priority=low_priority, region=region)
+    )
+    try:
+        async for chunk in request.stream():
+            await loop.run_in_executor(None, ingestor.feed, chunk)
+        return await loop.run_in_executor(None, ingestor.finish)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/v1/jobs/{job_id}/process-costs", response_model=List[ProcessCost])
+async def get_job_process_costs(
+    job_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    job = db.query(GenomicsJob).filter(GenomicsJob.job_id == job_id).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return process_costs(db, job)
+
+# Nextflow -with-weblog receiver: nextflow run ... -with-weblog <api>/api/v1/weblog?token=...
+# Nextflow cannot send a bearer token, so WEBLOG_TOKEN guards this endpoint instead
+@app.post("/api/v1/weblog", status_code=202)
+async def receive_weblog_event(request: Request, token: Optional[str] = None):
+    if settings.WEBLOG_TOKEN and token != settings.WEBLOG_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid weblog token")
+    
+    try:
+        event = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Weblog event must be JSON")
+    
+    if not isinstance(event, dict):
+        raise HTTPException(status_code=400, detail="Weblog event must be a JSON object")
+    
+    if not weblog.receive(event):
+        raise HTTPException(status_code=503, detail="Weblog buffer is full")
+    return Response(status_code=202)
+
 # Budget alerts endpoints
 @app.get("/api/v1/alerts", response_model=List[BudgetAlertResponse])
 async def get_alerts(
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Mock alerts data
-    return [
-        {
-            "id": 1,
-            "name": "Monthly Project Budget",
-            "alert_type": "project",
-            "threshold_amount": 1000.0,
-            "current_amount": 847.32,
-            "threshold_percentage": 80.0,
-            "project_name": "Cancer Genomics",
-            "is_active": True,
-            "last_triggered": "2024-01-15T10:30:00Z"
-        }
-    ]
+    alerts = db.query(BudgetAlert).filter(BudgetAlert.organization_id == 1).all()  # Mock organization
+    return [serialize_alert(alert, db) for alert in alerts]
 
 @app.post("/api/v1/alerts", response_model=BudgetAlertResponse)
 async def create_alert(
@@ -308,13 +375,17 @@ async def create_alert(
     db.add(alert)
     db.commit()
     db.refresh(alert)
+    budget_alerts.add_rule(alert)
     
+    return serialize_alert(alert, db)
+
+def serialize_alert(alert: BudgetAlert, db: Session) -> dict:
     return {
         "id": alert.id,
         "name": alert.name,
         "alert_type": alert.alert_type,
         "threshold_amount": alert.threshold_amount,
-        "current_amount": 0.0,
+        "current_amount": budget_alerts.current_amount(db, alert),
         "threshold_percentage": alert.threshold_percentage,
         "project_name": alert.project_name,
         "user_email": alert.user_email,
@@ -322,6 +393,23 @@ async def create_alert(
         "last_triggered": alert.last_triggered.isoformat() + "Z" if alert.last_triggered else None
     }
 
+def publish_budget_alert(rule: AlertRule, amount: float):
+    """Tell dashboards that a budget alert just fired"""
+    
+    topics = ["alerts"]
+    if rule.scope[0] == "project":
+        topics.append(f"project:{rule.scope[1]}")
+    
+    manager.publish(json.dumps({
+        "type": "budget_alert",
+        "alert_id": rule.alert_id,
+        "name": rule.name,
+        "time_period": rule.time_period,
+        "current_amount": round(amount, 2),
+        "limit": round(rule.limit, 2),
+        "timestamp": rule.last_triggered.isoformat() + "Z"
+    }), topics=topics)
+
 # Optimization recommendations
 @app.get("/api/v1/recommendations", response_model=List[OptimizationRecommendationResponse])
 async def get_recommendations(
@@ -353,37 +441,22 @@ async def get_recommendations(
     ]
 
 # WebSocket endpoint for real-time updates
+# Clients may pass ?topics=project:<name>,job:<job_id>,alerts or send
+# {"action": "subscribe", "topics": [...]} messages after connecting
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+    topics = [topic for topic in websocket.query_params.get("topics", "").split(",") if topic]
+    client = await manager.connect(websocket, topics)
+    
+    # Cost updates are pushed by the shared producer; start from the latest snapshot
+    cost_updates.send_current(client)
     try:
         while True:
-            # Send periodic updates
-            await asyncio.sleep(30)
-            await websocket.send_text(json.dumps({
-                "type": "cost_update",
-                "timestamp": datetime.utcnow().isoformat(),
-                "total_cost": 2847.32,
-                "active_jobs": 12
-            }))
+            manager.handle_client_message(client, await websocket.receive_text())
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
-
-# Background task for cost reconciliation
-@app.on_event("startup")
-async def start_background_tasks():
-    asyncio.create_task(cost_reconciliation_task())
-
-async def cost_reconciliation_task():
-    """Background task to reconcile estimated costs with actual Azure costs"""
-    while True:
-        try:
-            # This would run every 4 hours to check for new cost data
-            print("Running cost reconciliation...")
-            await asyncio.sleep(14400)  # 4 hours
-        except Exception as e:
-            print(f"Error in cost reconciliation: {e}")
-            await asyncio.sleep(3600)  # Retry in 1 hour
+        pass
+    finally:
+        await manager.disconnect(client)
 
 if __name__ == "__main__":
     import uvicorn
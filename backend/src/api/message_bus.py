@@ -0,0 +1,134 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+import asyncio
+import json
+import uuid
+
+# Envelope handed between workers: {"origin", "message", "topics", "coalesce_key"}
+BusHandler = Callable[[Dict], None]
+
+class MessageBus(ABC):
+    """Backplane that relays published WebSocket events to every worker"""
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._handler: Optional[BusHandler] = None
+
+    @abstractmethod
+    async def start(self, handler: BusHandler):
+        """Begin delivering envelopes from other workers to handler"""
+        self._handler = handler
+
+    @abstractmethod
+    def publish(self, message: str, topics: List[str], coalesce_key: Optional[str] = None):
+        """Hand an event to the other workers without blocking the caller"""
+
+    @abstractmethod
+    async def close(self):
+        self._handler = None
+
+    def _deliver(self, envelope: Dict):
+        # Our own events were already delivered locally by the publisher
+        if self._handler is not None and envelope.get("origin") != self.origin:
+            self._handler(envelope)
+
+    def _envelope(self, message: str, topics: List[str], coalesce_key: Optional[str]) -> Dict:
+        return {"origin": self.origin, "message": message, "topics": list(topics), "coalesce_key": coalesce_key}
+
+class InProcessMessageBus(MessageBus):
+    """Stand-in backplane for tests and single-process runs; buses sharing a hub act as workers"""
+
+    def __init__(self, hub: Optional[List["InProcessMessageBus"]] = None):
+        super().__init__()
+        self.hub = hub if hub is not None else []
+
+    async def start(self, handler: BusHandler):
+        await super().start(handler)
+        if self not in self.hub:
+            self.hub.append(self)
+
+    def publish(self, message: str, topics: List[str], coalesce_key: Optional[str] = None):
+        envelope = self._envelope(message, topics, coalesce_key)
+        for bus in list(self.hub):
+            bus._deliver(envelope)
+
+    async def close(self):
+        if self in self.hub:
+            self.hub.remove(self)
+        await super().close()
+
+class RedisMessageBus(MessageBus):
+    """Redis pub/sub backplane shared by all uvicorn workers and replicas"""
+
+    def __init__(self, redis_url: str, channel: str, max_pending: int = 10000):
+        super().__init__()
+        self.redis_url = redis_url
+        self.channel = channel
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._redis = None
+        self._tasks: List[asyncio.Task] = []
+        self.dropped_messages = 0
+
+    async def start(self, handler: BusHandler):
+        import redis.asyncio as redis
+        
+        await super().start(handler)
+        self._redis = redis.from_url(self.redis_url)
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self.channel)
+        self._tasks = [
+            asyncio.create_task(self._listen(pubsub)),
+            asyncio.create_task(self._drain_outbox())
+        ]
+
+    def publish(self, message: str, topics: List[str], coalesce_key: Optional[str] = None):
+        try:
+            self._outbox.put_nowait(json.dumps(self._envelope(message, topics, coalesce_key)))
+        except asyncio.QueueFull:
+            self.dropped_messages += 1
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+        await super().close()
+
+    async def _listen(self, pubsub):
+        """Relay events published by other workers to local clients"""
+        
+        while True:
+            try:
+                async for item in pubsub.listen():
+                    if item.get("type") == "message":
+                        self._deliver(json.loads(item["data"]))
+            except asyncio.CancelledError:
+                await pubsub.close()
+                raise
+            except Exception as e:
+                print(f"Error reading WebSocket bus: {e}")
+                await asyncio.sleep(1)
+                await pubsub.subscribe(self.channel)
+
+    async def _drain_outbox(self):
+        """Forward queued events to Redis in order"""
+        
+        while True:
+            payload = await self._outbox.get()
+            try:
+                await self._redis.publish(self.channel, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error publishing to WebSocket bus: {e}")
+
+def create_message_bus(backend: str, redis_url: str, channel: str) -> MessageBus:
+    """Build the configured backplane ("memory" or "redis")"""
+    
+    if backend == "redis":
+        return RedisMessageBus(redis_url, channel)
+    if backend == "memory":
+        return InProcessMessageBus()
+    raise ValueError(f"Unknown WebSocket message bus: {backend}")
@@ -92,6 +92,54 @@ class JobCostBreakdown(BaseModel):
     breakdown: List[CostBreakdownItem]
     daily_costs: List[DailyCost]
 
+class BatchJobMetrics(BaseModel):
+    job_id: str
+    project_name: str
+    status: str
+    progress_percentage: int
+    pool_id: Optional[str] = None
+    allocation_state: Optional[str] = None
+    active_nodes: Optional[int] = None
+    running_tasks: Optional[int] = None
+    completed_tasks: Optional[int] = None
+    failed_tasks: Optional[int] = None
+    running_cost: float
+    estimated_completion: Optional[str] = None
+    updated_at: str
+
+class ReconciliationStatus(BaseModel):
+    leader: Optional[str] = None
+    is_leader: bool
+    lease_expires_at: Optional[str] = None
+    queue_depth: int
+    never_reconciled: int
+    lag_seconds: float
+    last_run_at: Optional[str] = None
+    last_run_jobs: int
+    last_run_failed: int
+    last_error: Optional[str] = None
+
+# Nextflow trace schemas
+class TraceIngestResponse(BaseModel):
+    job_id: str
+    tasks: int
+    skipped_lines: int
+    vm_size: Optional[str] = None
+    node_cost_per_hour: float
+    total_cost: float
+
+class ProcessCost(BaseModel):
+    process: str
+    tasks: int
+    realtime_hours: float
+    cpu_hours: float
+    avg_cpu_percent: Optional[float] = None
+    peak_rss_gb: Optional[float] = None
+    read_gb: float
+    write_gb: float
+    cost: float
+    percentage: float
+
 # Budget alert schemas
 class CreateAlertRequest(BaseModel):
     name: str
@@ -132,6 +180,7 @@ class CreateAzureConnectionRequest(BaseModel):
     client_id: str
     client_secret: str
     subscription_id: str
+    batch_account_url: Optional[str] = None
 
 class AzureConnectionResponse(BaseModel):
     id: int
@@ -139,6 +188,7 @@ class AzureConnectionResponse(BaseModel):
     tenant_id: str
     client_id: str
     subscription_id: str
+    batch_account_url: Optional[str] = None
     is_active: bool
     created_at: str
 
@@ -0,0 +1,167 @@
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+import asyncio
+import json
+
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from ..config.settings import settings
+from ..models.database import SessionLocal
+from ..services.weblog_writer import apply_weblog_events
+from .broadcaster import Broadcaster
+from .cost_updates import CostUpdateProducer
+
+# Failures that say nothing about the events themselves; the whole batch waits for the next flush
+TRANSIENT_WRITE_ERRORS = (OperationalError, InterfaceError)
+
+# Events that failed on their own are kept this long for inspection, newest last
+DEAD_LETTER_LIMIT = 1000
+
+class WeblogReceiver:
+    """Buffers Nextflow -with-weblog events in memory and writes them in batches on a time or size trigger"""
+
+    def __init__(self, broadcaster: Broadcaster, cost_updates: CostUpdateProducer,
+                 flush_interval_seconds: float, batch_size: int, max_pending: int, unknown_run_retries: int):
+        self.broadcaster = broadcaster
+        self.cost_updates = cost_updates
+        self.flush_interval_seconds = flush_interval_seconds
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.unknown_run_retries = unknown_run_retries
+        self.received = 0
+        self.rejected = 0
+        self.written = 0
+        self.dropped = 0
+        self.dead_letters: Deque[Dict[str, Any]] = deque(maxlen=DEAD_LETTER_LIMIT)
+        self.dead_lettered = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._deferred: List[Tuple[int, Dict[str, Any]]] = []  # (flushes waited, event) of unregistered runs
+        self._batch_ready = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def receive(self, event: Dict[str, Any]) -> bool:
+        """Queue one event; False when the buffer is full and the event was not accepted"""
+        
+        if len(self._pending) + len(self._deferred) >= self.max_pending:
+            self.rejected += 1
+            return False
+        
+        self._pending.append(event)
+        self.received += 1
+        if len(self._pending) >= self.batch_size:
+            self._batch_ready.set()
+        return True
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Let an in-flight flush finish: cancelling it would not stop a commit already running
+            # in its thread, and the final flush below would then write the same batch again
+            async with self._flush_lock:
+                self._task.cancel()
+            self._task = None
+        # Do not lose what was accepted before shutdown
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns events written"""
+        
+        async with self._flush_lock:
+            count = len(self._pending)
+            self._batch_ready.clear()
+            if not count and not self._deferred:
+                return 0
+            
+            # Events that arrive while this batch is written form the next one; the batch itself
+            # leaves the buffer only once it is written, so a database outage is retried while a
+            # bad event is split off and dead-lettered by _write
+            waited = {id(event): flushes for flushes, event in self._deferred}
+            events = [event for _, event in self._deferred] + self._pending[:count]
+            dead_lettered = self.dead_lettered
+            summaries, unknown = await asyncio.get_running_loop().run_in_executor(None, self._write, events)
+            del self._pending[:count]
+            
+            self._deferred = []
+            for event in unknown:
+                flushes = waited.get(id(event), 0) + 1
+                if flushes <= self.unknown_run_retries:
+                    self._deferred.append((flushes, event))
+                else:
+                    self.dropped += 1
+                    print(f"Dropping weblog event for unknown run {event.get('runName')}: no started event arrived")
+            
+            written = len(events) - len(unknown) - (self.dead_lettered - dead_lettered)
+            self.written += written
+            self._publish(summaries)
+            return written
+
+    def _write(self, events: List[Dict[str, Any]]) -> Tuple[List[Dict], List[Dict]]:
+        """Write a batch, bisecting it on failure until the events that cannot be written stand alone"""
+        
+        try:
+            return self._write_once(events)
+        except TRANSIENT_WRITE_ERRORS:
+            raise
+        except Exception as e:
+            if len(events) == 1:
+                self._dead_letter(events[0], e)
+                return [], []
+        
+        # Halves written before a failure stay written; replaying their events adds nothing
+        middle = len(events) // 2
+        first_summaries, first_unknown = self._write(events[:middle])
+        second_summaries, second_unknown = self._write(events[middle:])
+        return first_summaries + second_summaries, first_unknown + second_unknown
+
+    def _write_once(self, events: List[Dict[str, Any]]) -> Tuple[List[Dict], List[Dict]]:
+        db = SessionLocal()
+        try:
+            return apply_weblog_events(db, events)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _dead_letter(self, event: Dict[str, Any], error: Exception):
+        self.dead_letters.append(event)
+        self.dead_lettered += 1
+        print(f"Dead-lettering weblog event for {event.get('runName') if isinstance(event, dict) else None}: {error}")
+
+    def _publish(self, summaries: List[Dict]):
+        cost_changed = False
+        for summary in summaries:
+            cost_changed = cost_changed or summary.pop("cost_changed")
+            self.broadcaster.publish(
+                json.dumps({"type": "job_progress", **summary}),
+                topics=[f"project:{summary['project_name']}", f"job:{summary['job_id']}"],
+                coalesce_key=f"job_progress:{summary['job_id']}"
+            )
+        if cost_changed:
+            self.cost_updates.notify_changed()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error writing weblog events: {e}")
+
+def create_weblog_receiver(broadcaster: Broadcaster, cost_updates: CostUpdateProducer) -> WeblogReceiver:
+    return WeblogReceiver(
+        broadcaster,
+        cost_updates,
+        flush_interval_seconds=settings.WEBLOG_FLUSH_INTERVAL_SECONDS,
+        batch_size=settings.WEBLOG_BATCH_SIZE,
+        max_pending=settings.WEBLOG_MAX_PENDING,
+        unknown_run_retries=settings.WEBLOG_UNKNOWN_RUN_RETRIES
+    )
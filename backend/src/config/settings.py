@@ -17,10 +17,24 @@ class Settings(BaseSettings):
     AZURE_CLIENT_ID: Optional[str] = None
     AZURE_CLIENT_SECRET: Optional[str] = None
     AZURE_SUBSCRIPTION_ID: Optional[str] = None
+    AZURE_DEFAULT_REGION: str = "eastus"  # Region used to price pools and VM sizes
+    AZURE_SDK_MAX_WORKERS: int = 16  # Threads shared by all blocking Azure SDK calls
+    AZURE_SDK_MAX_CONCURRENCY_PER_CONNECTION: int = 4
+    TAGGING_WRITES_PER_SECOND: float = 10.0  # Sustained tag writes per subscription
+    TAGGING_WRITE_BURST: int = 20
+    TAGGING_MAX_RETRIES: int = 3  # Retries of a throttled (429) tag write
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     
+    # WebSocket
+    WS_CLIENT_QUEUE_SIZE: int = 100  # Messages buffered per client before the oldest is dropped
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0
+    WS_MESSAGE_BUS: str = "memory"  # "redis" relays events across workers and replicas via REDIS_URL
+    WS_MESSAGE_BUS_CHANNEL: str = "genomecost:ws"
+    COST_UPDATE_DEBOUNCE_SECONDS: float = 1.0  # Coalesce bursts of cost events into one push
+    COST_UPDATE_MAX_INTERVAL_SECONDS: float = 300.0  # Re-check totals even without events
+    
     # API
     API_V1_STR: str = "/api/v1"
     PROJECT_NAME: str = "GenomeCostTracker"
@@ -30,9 +44,47 @@ class Settings(BaseSettings):
     
     # Cost estimation
     AZURE_BATCH_COST_PER_HOUR: float = 0.096  # Standard_D2s_v3
+    BATCH_POOL_CACHE_TTL_SECONDS: int = 300  # How long listed Batch pool configurations are trusted
+    PRICE_CATALOG_DIR: str = "data/price_catalog"  # One subdirectory of Retail Prices exports per version
+    PRICE_CATALOG_VERSION: Optional[str] = None  # Pin a snapshot; defaults to the latest
     AZURE_STORAGE_HOT_COST_PER_GB: float = 0.0184
     AZURE_STORAGE_COOL_COST_PER_GB: float = 0.01
     AZURE_NETWORK_COST_PER_GB: float = 0.087
+    USAGE_PROFILE_MIN_JOBS: int = 5  # Finalized jobs needed before a learned profile replaces the defaults
+    USAGE_PROFILE_MAX_SAMPLES: int = 500  # Recent jobs kept per profile
+    USAGE_PROFILE_REFRESH_SECONDS: int = 300
+    RUNTIME_MODEL_PATH: str = "data/runtime_model.npz"
+    RUNTIME_MODEL_MIN_SAMPLES: int = 20  # Finished runs needed before runtimes are predicted
+    
+    # Cost sync
+    COST_FINALIZATION_DAYS: int = 3  # Azure may still revise usage newer than this
+    COST_UPSERT_CHUNK_SIZE: int = 2000  # Rows per INSERT ... ON CONFLICT statement
+    
+    # Nextflow traces
+    TRACE_INGEST_BATCH_SIZE: int = 5000  # Parsed tasks written and committed together
+    TRACE_MAX_LINE_BYTES: int = 1048576  # Longer lines mean the upload is not a trace file
+    WEBLOG_TOKEN: Optional[str] = None  # When set, -with-weblog URLs must carry ?token=
+    WEBLOG_FLUSH_INTERVAL_SECONDS: float = 1.0  # Buffered task events are written at least this often
+    WEBLOG_BATCH_SIZE: int = 2000  # ...or as soon as this many are waiting
+    WEBLOG_MAX_PENDING: int = 100000  # Events beyond this are rejected until the buffer drains
+    WEBLOG_UNKNOWN_RUN_RETRIES: int = 30  # Flushes an unregistered run's events wait for its "started" event
+    
+    # Batch metrics
+    BATCH_METRICS_TICK_SECONDS: float = 5.0  # How often the collector looks for jobs due a poll
+    BATCH_METRICS_MIN_INTERVAL_SECONDS: float = 30.0  # Poll interval of a job that just started
+    BATCH_METRICS_MAX_INTERVAL_SECONDS: float = 600.0
+    BATCH_METRICS_INTERVAL_AGE_FRACTION: float = 0.05  # Interval grows with job age: 1 hour old -> 3 minutes
+    BATCH_METRICS_JITTER: float = 0.2  # +/- share of the interval, so polls do not line up
+    BATCH_METRICS_CACHE_TTL_SECONDS: float = 1800.0  # Snapshots older than this are not served
+    
+    # Reconciliation
+    RECONCILIATION_INTERVAL_SECONDS: float = 300.0  # How often the leader looks for due jobs
+    RECONCILIATION_BILLING_DELAY_HOURS: float = 24.0  # Azure usage for a job is rarely visible sooner
+    RECONCILIATION_RETRY_HOURS: float = 6.0  # A job reconciled but not finalized waits this long for another pass
+    RECONCILIATION_BATCH_SIZE: int = 50  # Jobs reconciled together, sharing one cost pull per resource group
+    RECONCILIATION_MAX_CONCURRENCY: int = 2  # Batches in flight at once
+    RECONCILIATION_MAX_JOBS_PER_RUN: int = 1000  # The rest wait for the next pass, oldest first
+    RECONCILIATION_LEASE_SECONDS: float = 900.0  # A leader that stops renewing is replaced after this
     
     class Config:
         env_file = ".env"
@@ -1,8 +1,8 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey, JSON
+from sqlalchemy import create_engine, Column, Integer, String, Date, DateTime, Float, Boolean, Text, ForeignKey, JSON, UniqueConstraint, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy.sql import func
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import uuid
 
 from ..config.settings import settings
@@ -34,6 +34,7 @@ class AzureConnection(Base):
     client_id = Column(String, nullable=False)
     client_secret = Column(String, nullable=False)  # Encrypted
     subscription_id = Column(String, nullable=False)
+    batch_account_url = Column(String, nullable=True)  # Batch data-plane endpoint; discovered from the subscription when unset
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=func.now())
     
@@ -42,6 +43,14 @@ class AzureConnection(Base):
 
 class GenomicsJob(Base):
     __tablename__ = "genomics_jobs"
+    __table_args__ = (
+        # Keyset pagination on (started_at, id), optionally narrowed by a filter column
+        Index("ix_genomics_jobs_started_at_id", "started_at", "id"),
+        Index("ix_genomics_jobs_status_started_at_id", "status", "started_at", "id"),
+        Index("ix_genomics_jobs_project_started_at_id", "project_name", "started_at", "id"),
+        Index("ix_genomics_jobs_user_started_at_id", "user_email", "started_at", "id"),
+        Index("ix_genomics_jobs_pipeline_started_at_id", "pipeline_type", "started_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"))
@@ -67,6 +76,13 @@ class GenomicsJob(Base):
     estimated_cost = Column(Float, default=0.0)
     actual_cost = Column(Float, default=0.0)
     cost_last_updated = Column(DateTime, nullable=True)
+    cost_finalized_at = Column(DateTime, nullable=True)  # Set once the whole cost window is billed
+    
+    # Live task progress from the Nextflow weblog
+    tasks_submitted = Column(Integer, nullable=False, default=0)
+    tasks_completed = Column(Integer, nullable=False, default=0)
+    tasks_failed = Column(Integer, nullable=False, default=0)
+    running_cost = Column(Float, nullable=False, default=0.0)  # Compute cost of finished tasks so far
     
     # Metadata
     nextflow_config = Column(JSON, nullable=True)
@@ -78,6 +94,15 @@ class GenomicsJob(Base):
 
 class CostData(Base):
     __tablename__ = "cost_data"
+    __table_args__ = (
+        UniqueConstraint("resource_id", "usage_date", "sample_id", "service_name", "project_name", "user_email",
+                         name="uq_cost_data_natural_key"),
+        # Matched to the dashboard, reconciliation and rollup access paths
+        Index("ix_cost_data_project_usage_date", "project_name", "usage_date"),
+        Index("ix_cost_data_job_usage_date", "genomics_job_id", "usage_date"),
+        Index("ix_cost_data_sample_usage_date", "sample_id", "usage_date"),
+        Index("ix_cost_data_usage_date_billing_period", "usage_date", "billing_period"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     genomics_job_id = Column(Integer, ForeignKey("genomics_jobs.id"))
@@ -103,6 +128,136 @@ class CostData(Base):
     # Relationships
     genomics_job = relationship("GenomicsJob", back_populates="cost_data")
 
+class CostSyncWatermark(Base):
+    __tablename__ = "cost_sync_watermarks"
+    __table_args__ = (
+        UniqueConstraint("azure_connection_id", "scope", name="uq_cost_sync_watermark_scope"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    azure_connection_id = Column(Integer, ForeignKey("azure_connections.id"), nullable=False)
+    scope = Column(String, nullable=False)  # /subscriptions/{id}[/resourceGroups/{name}]
+    
+    # Sync progress
+    finalized_through = Column(Date, nullable=True)  # Last billing date that will not change
+    last_synced_at = Column(DateTime, nullable=True)
+
+class DailyCostRollup(Base):
+    __tablename__ = "daily_cost_rollups"
+    __table_args__ = (
+        UniqueConstraint("usage_date", "project_name", "user_email", "pipeline_type", "resource_type",
+                         name="uq_daily_cost_rollup_grain"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    usage_date = Column(Date, nullable=False)
+    
+    # Grain
+    project_name = Column(String, nullable=False)
+    user_email = Column(String, nullable=False)
+    pipeline_type = Column(String, nullable=False)
+    resource_type = Column(String, nullable=False)
+    
+    # Aggregates
+    cost_amount = Column(Float, nullable=False, default=0.0)
+    record_count = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime, default=func.now())
+
+class DailyCostSeries(Base):
+    __tablename__ = "daily_cost_series"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    usage_date = Column(Date, nullable=False, unique=True)
+    
+    # Cost split by resource category
+    total_cost = Column(Float, nullable=False, default=0.0)
+    compute_cost = Column(Float, nullable=False, default=0.0)
+    storage_cost = Column(Float, nullable=False, default=0.0)
+    network_cost = Column(Float, nullable=False, default=0.0)
+    other_cost = Column(Float, nullable=False, default=0.0)
+    job_count = Column(Integer, nullable=False, default=0)  # Jobs that incurred cost that day
+    refreshed_at = Column(DateTime, default=func.now())
+
+class DailyJobCost(Base):
+    __tablename__ = "daily_job_costs"
+    __table_args__ = (
+        UniqueConstraint("usage_date", "genomics_job_id", name="uq_daily_job_cost"),
+    )
+    
+    # One row per job and day it incurred cost; lets trends count distinct jobs over any range
+    id = Column(Integer, primary_key=True, index=True)
+    usage_date = Column(Date, nullable=False)
+    genomics_job_id = Column(Integer, ForeignKey("genomics_jobs.id"), nullable=False)
+    cost_amount = Column(Float, nullable=False, default=0.0)
+
+class PipelineUsageProfile(Base):
+    __tablename__ = "pipeline_usage_profiles"
+    __table_args__ = (
+        UniqueConstraint("pipeline_type", "workflow_name", name="uq_pipeline_usage_profile"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    pipeline_type = Column(String, nullable=False)
+    workflow_name = Column(String, nullable=False)  # "*" for the pipeline-wide profile
+    
+    # Observed per-job usage from reconciled cost data
+    job_count = Column(Integer, nullable=False, default=0)
+    stored_gb_samples = Column(JSON)  # Most recent observations, bounded
+    transferred_gb_samples = Column(JSON)
+    stored_gb_p50 = Column(Float)
+    stored_gb_p90 = Column(Float)
+    transferred_gb_p50 = Column(Float)
+    transferred_gb_p90 = Column(Float)
+    updated_at = Column(DateTime, default=func.now())
+
+class ProcessTrace(Base):
+    __tablename__ = "process_traces"
+    __table_args__ = (
+        UniqueConstraint("genomics_job_id", "task_id", name="uq_process_trace_task"),
+        Index("ix_process_traces_job_process", "genomics_job_id", "process"),
+    )
+    
+    # One Nextflow task from trace.txt; typed numeric columns only, so aggregates scan narrow data
+    id = Column(Integer, primary_key=True, index=True)
+    genomics_job_id = Column(Integer, ForeignKey("genomics_jobs.id"), nullable=False)
+    task_id = Column(Integer, nullable=False)
+    process = Column(String, nullable=False)
+    name = Column(String, nullable=True)
+    status = Column(String, nullable=True)  # COMPLETED, FAILED, ABORTED, CACHED
+    exit_code = Column(Integer, nullable=True)
+    attempt = Column(Integer, nullable=True)
+    
+    # Requested resources
+    cpus = Column(Integer, nullable=True)
+    memory_bytes = Column(Float, nullable=True)
+    
+    # Timing
+    submitted_at = Column(DateTime, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    duration_seconds = Column(Float, nullable=True)  # Submission to completion
+    realtime_seconds = Column(Float, nullable=True)  # Execution only
+    
+    # Observed usage
+    cpu_percent = Column(Float, nullable=True)
+    peak_rss_bytes = Column(Float, nullable=True)
+    peak_vmem_bytes = Column(Float, nullable=True)
+    read_bytes = Column(Float, nullable=True)
+    write_bytes = Column(Float, nullable=True)
+    
+    # Attributed compute cost
+    vm_size = Column(String, nullable=True)
+    cost_amount = Column(Float, nullable=False, default=0.0)
+
+class SchedulerLease(Base):
+    __tablename__ = "scheduler_leases"
+    
+    # Leader lock for background schedulers shared by every worker and replica
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)  # host:pid:uuid of the current leader
+    acquired_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
 class BudgetAlert(Base):
     __tablename__ = "budget_alerts"
     
@@ -124,6 +279,7 @@ class BudgetAlert(Base):
     is_active = Column(Boolean, default=True)
     last_triggered = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), index=True)  # Watermark for alert evaluation
 
 class OptimizationRecommendation(Base):
     __tablename__ = "optimization_recommendations"
@@ -150,6 +306,67 @@ class OptimizationRecommendation(Base):
 # Create all tables
 def create_tables():
     Base.metadata.create_all(bind=engine)
+    ensure_cost_data_partitions()
+
+def cost_data_partition_ddl(month_start: date) -> str:
+    """DDL for the monthly cost_data partition starting at month_start"""
+    
+    next_month = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS cost_data_{month_start:%Y_%m} PARTITION OF cost_data "
+        f"FOR VALUES FROM ('{month_start:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}')"
+    )
+
+def ensure_cost_data_partitions(months_ahead: int = 3):
+    """Create the current and upcoming monthly partitions of cost_data on PostgreSQL"""
+    
+    if engine.dialect.name != "postgresql":
+        return
+    
+    with engine.begin() as conn:
+        is_partitioned = conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'cost_data')"
+        )).scalar()
+        if not is_partitioned:
+            return
+        
+        # Workers starting together would otherwise race to split the same month out of the default partition
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('cost_data_partitions'))"))
+        
+        month_start = datetime.utcnow().date().replace(day=1)
+        for _ in range(months_ahead + 1):
+            _create_cost_data_partition(conn, month_start)
+            month_start = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def _create_cost_data_partition(conn, month_start: date):
+    """Create one monthly partition, moving in any rows the default partition already holds for the month"""
+    
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": f"cost_data_{month_start:%Y_%m}"}).scalar():
+        return
+    
+    month = {
+        "start": month_start,
+        "end": (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    }
+    has_default = conn.execute(text("SELECT to_regclass('cost_data_default')")).scalar() is not None
+    if not has_default or not conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM cost_data_default WHERE usage_date >= :start AND usage_date < :end)"
+    ), month).scalar():
+        conn.execute(text(cost_data_partition_ddl(month_start)))
+        return
+    
+    # PostgreSQL rejects a partition whose range has rows in the default partition, so detach the default,
+    # create the month, move its rows over and reattach; the transaction keeps writers out meanwhile
+    columns = ", ".join(column.name for column in CostData.__table__.columns)
+    conn.execute(text("ALTER TABLE cost_data DETACH PARTITION cost_data_default"))
+    conn.execute(text(cost_data_partition_ddl(month_start)))
+    conn.execute(text(
+        f"INSERT INTO cost_data ({columns}) SELECT {columns} FROM cost_data_default "
+        "WHERE usage_date >= :start AND usage_date < :end"
+    ), month)
+    conn.execute(text("DELETE FROM cost_data_default WHERE usage_date >= :start AND usage_date < :end"), month)
+    conn.execute(text("ALTER TABLE cost_data ATTACH PARTITION cost_data_default DEFAULT"))
 
 # Database dependency
 def get_db():
@@ -0,0 +1,87 @@
+from sqlalchemy import event
+from typing import Dict, Optional, Tuple
+import hashlib
+import threading
+
+from ..models.database import AzureConnection
+from .azure_cost_service import AzureCostService
+from .azure_executor import azure_executor
+
+class AzureServiceRegistry:
+    """Process-wide cache of AzureCostService instances keyed by AzureConnection.id"""
+
+    def __init__(self):
+        self._services: Dict[int, Tuple[str, AzureCostService]] = {}
+        self._lock = threading.Lock()
+
+    def _fingerprint(self, connection: AzureConnection) -> str:
+        """Hash the credential fields so rotated secrets produce a new service"""
+        
+        material = "|".join([
+            connection.tenant_id,
+            connection.client_id,
+            connection.client_secret,
+            connection.subscription_id,
+            connection.batch_account_url or ""
+        ])
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def get(self, connection: AzureConnection) -> AzureCostService:
+        """Return the shared service for a connection, creating it on first use"""
+        
+        if not connection.is_active:
+            self.evict(connection.id)
+            raise ValueError(f"Azure connection {connection.id} is not active")
+        
+        fingerprint = self._fingerprint(connection)
+        stale: Optional[AzureCostService] = None
+        
+        with self._lock:
+            entry = self._services.get(connection.id)
+            if entry and entry[0] == fingerprint:
+                return entry[1]
+            
+            if entry:
+                stale = entry[1]
+            service = AzureCostService(connection)
+            self._services[connection.id] = (fingerprint, service)
+        
+        if stale:
+            stale.close()
+        
+        return service
+
+    def evict(self, connection_id: int):
+        """Drop and close the cached service for a connection"""
+        
+        with self._lock:
+            entry = self._services.pop(connection_id, None)
+        
+        if entry:
+            entry[1].close()
+        azure_executor.forget(connection_id)
+
+    def close_all(self):
+        """Close every cached service, e.g. on application shutdown"""
+        
+        with self._lock:
+            connection_ids = list(self._services)
+        
+        for connection_id in connection_ids:
+            self.evict(connection_id)
+
+# Shared registry for this process
+azure_services = AzureServiceRegistry()
+
+def get_azure_service(connection: AzureConnection) -> AzureCostService:
+    """Get the cached AzureCostService for an AzureConnection"""
+    return azure_services.get(connection)
+
+# Keep the cache in step with connection rows changed through the ORM
+@event.listens_for(AzureConnection, "after_update")
+def _evict_updated_connection(mapper, db_connection, target: AzureConnection):
+    azure_services.evict(target.id)
+
+@event.listens_for(AzureConnection, "after_delete")
+def _evict_deleted_connection(mapper, db_connection, target: AzureConnection):
+    azure_services.evict(target.id)
@@ -2,42 +2,187 @@ from azure.identity import ClientSecretCredential
 from azure.mgmt.costmanagement import CostManagementClient
 from azure.mgmt.resource import ResourceManagementClient
 from azure.mgmt.batch import BatchManagementClient
-from datetime import datetime, timedelta
+from azure.mgmt.costmanagement.models import QueryResult
+from azure.core.exceptions import ResourceNotFoundError
+from azure.core.rest import HttpRequest
+from azure.core.pipeline.transport import RequestsTransport
+from sqlalchemy import func
+from datetime import date, datetime, time, timedelta
 import asyncio
+import threading
 import httpx
-from typing import Dict, List, Optional
+import requests
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple
+from bisect import bisect_right
+from collections import defaultdict
+from urllib.parse import quote
 import json
+import numpy as np
 
 from ..config.settings import settings
-from ..models.database import GenomicsJob, CostData, AzureConnection
+from ..models.database import GenomicsJob, CostData, AzureConnection, CostSyncWatermark
+from .azure_executor import azure_executor
+from .batch_pool_cache import BatchPoolCache, PoolConfig
+from .price_catalog import (
+    DEDICATED, DEFAULT_VM_COST_PER_HOUR, LOW_PRIORITY, LOW_PRIORITY_COST_FACTOR, get_price_catalog
+)
+from .cost_data_writer import upsert_cost_data
+from .cost_rollups import refresh_daily_rollups, rollup_totals
+from .budget_alerts import budget_alerts, cost_deltas, mark_triggered
+from .usage_profiles import update_usage_profiles, usage_profiles
+from .runtime_predictor import runtime_models
+from .resource_tagging import ResourceTagger, TokenBucket
+
+# Rows yielded per batch when streaming Cost Management results
+COST_BATCH_SIZE = 5000
+
+# Batch service (data plane) REST API used for live pool and task state
+BATCH_DATA_PLANE_SCOPE = "https://batch.core.windows.net/.default"
+BATCH_DATA_PLANE_API_VERSION = "2023-11-01.18.0"
+
+# Typical genomics data sizes per pipeline, in GB, until enough history is reconciled
+PIPELINE_STORAGE_GB = {
+    "WGS": 200,  # GB for whole genome sequencing
+    "RNA-seq": 50,  # GB for RNA sequencing
+    "ChIP-seq": 20,  # GB for ChIP sequencing
+    "ATAC-seq": 15,  # GB for ATAC sequencing
+}
+DEFAULT_STORAGE_GB = 100
+PIPELINE_NETWORK_GB = {
+    "WGS": 50,   # GB data transfer
+    "RNA-seq": 20,
+    "ChIP-seq": 10,
+    "ATAC-seq": 8,
+}
+DEFAULT_NETWORK_GB = 25
+
+# Storage days billed at each tier: 30 days hot, then cool for the rest of the year
+HOT_STORAGE_DAYS = 30
+COOL_STORAGE_DAYS = 335
+
+# Rollups, alert totals and usage profiles are shared by concurrent reconciliation batches;
+# each batch refreshes and commits them while holding this lock
+_aggregates_lock = threading.Lock()
+
+# (vm_size, region) pairs already reported as missing from the price catalog
+_unpriced_vm_sizes = set()
+
+# Pool ids (None for jobs without a pool) already reported as priced at AZURE_BATCH_COST_PER_HOUR
+_default_rate_pools = set()
+
+def _factorize(values) -> Tuple[np.ndarray, List]:
+    """Integer codes into the list of distinct values, in first-seen order"""
+    
+    codes: Dict = {}
+    index = np.fromiter((codes.setdefault(value, len(codes)) for value in values), dtype=np.intp, count=len(values))
+    return index, list(codes)
+
+def _odata_string(value: str) -> str:
+    # Single quotes inside an OData string literal are escaped by doubling them
+    return value.replace("'", "''")
+
+def _pool_changed(cached: PoolConfig, metrics: Dict) -> bool:
+    # The data plane may report VM sizes in a different case than the management API
+    return (
+        (cached.vm_size or "").lower() != (metrics["vm_size"] or "").lower()
+        or cached.target_dedicated_nodes != metrics["target_dedicated_nodes"]
+        or cached.target_low_priority_nodes != metrics["target_low_priority_nodes"]
+    )
 
 class AzureCostService:
     def __init__(self, azure_connection: AzureConnection):
         self.connection = azure_connection
+        # Snapshot identifiers so cached services never touch a detached ORM row
+        self.connection_id = azure_connection.id
+        self.subscription_id = azure_connection.subscription_id
+        self.batch_account_url = azure_connection.batch_account_url
         self.credential = ClientSecretCredential(
             tenant_id=azure_connection.tenant_id,
             client_id=azure_connection.client_id,
             client_secret=azure_connection.client_secret
         )
         
+        # One HTTP session shared by all management clients for connection reuse
+        self._session = requests.Session()
+        transport = RequestsTransport(session=self._session, session_owner=False)
+        
         self.cost_client = CostManagementClient(
             credential=self.credential,
-            subscription_id=azure_connection.subscription_id
+            subscription_id=self.subscription_id,
+            transport=transport
         )
         
         self.resource_client = ResourceManagementClient(
             credential=self.credential,
-            subscription_id=azure_connection.subscription_id
+            subscription_id=self.subscription_id,
+            transport=transport
         )
         
         self.batch_client = BatchManagementClient(
             credential=self.credential,
-            subscription_id=azure_connection.subscription_id
+            subscription_id=self.subscription_id,
+            transport=transport
         )
+        
+        # Pool configurations rarely change; list them once per TTL, not per estimate
+        self.pool_cache = BatchPoolCache(self._list_batch_pools, ttl_seconds=settings.BATCH_POOL_CACHE_TTL_SECONDS)
+        self._batch_urls: Dict[str, str] = {}  # pool id -> data-plane URL of the account that runs it
+        
+        # Tag writes share the subscription's ARM write budget, so one limiter per service
+        self.tagger = ResourceTagger(
+            self.resource_client.tags,
+            self._call,
+            TokenBucket(settings.TAGGING_WRITES_PER_SECOND, settings.TAGGING_WRITE_BURST),
+            max_retries=settings.TAGGING_MAX_RETRIES
+        )
+
+    def close(self):
+        """Close management clients, the shared HTTP session and the credential"""
+        
+        self.pool_cache.close()
+        for client in (self.cost_client, self.resource_client, self.batch_client):
+            try:
+                client.close()
+            except Exception as e:
+                print(f"Error closing Azure client: {e}")
+        self._session.close()
+        self.credential.close()
 
-    async def get_cost_data(self, start_date: datetime, end_date: datetime, 
-                           resource_group: Optional[str] = None) -> List[Dict]:
-        """Fetch cost data from Azure Cost Management API"""
+    async def _call(self, func, *args, **kwargs):
+        """Run a blocking Azure SDK call without stalling the event loop"""
+        return await azure_executor.run(self.connection_id, func, *args, **kwargs)
+
+    async def iter_cost_data(self, start_date: datetime, end_date: datetime,
+                             resource_group: Optional[str] = None,
+                             batch_size: int = COST_BATCH_SIZE) -> AsyncIterator[List[Dict]]:
+        """Stream cost data page by page, following next_link, in batches of parsed rows"""
+        
+        query_definition = self._build_cost_query(start_date, end_date, resource_group)
+        
+        # Execute query; a failed page raises, since a stream that ends early reads as zero cost
+        scope = self.cost_scope(resource_group)
+        page = await self._call(self.cost_client.query.usage, scope=scope, parameters=query_definition)
+        
+        while page is not None:
+            for batch in self._iter_cost_batches(page, batch_size):
+                yield batch
+            
+            if not getattr(page, "next_link", None):
+                break
+            
+            page = await self._call(self._fetch_next_cost_page, page.next_link, query_definition)
+
+    def cost_scope(self, resource_group: Optional[str] = None) -> str:
+        """Cost Management scope for the subscription or one of its resource groups"""
+        
+        scope = f"/subscriptions/{self.subscription_id}"
+        if resource_group:
+            scope += f"/resourceGroups/{resource_group}"
+        return scope
+
+    def _build_cost_query(self, start_date: datetime, end_date: datetime,
+                          resource_group: Optional[str] = None) -> Dict:
+        """Build the Cost Management query definition"""
         
         # Build query parameters
         query_definition = {
@@ -94,42 +239,48 @@ class AzureCostService:
                 }
             }
         
-        # Execute query
-        scope = f"/subscriptions/{self.connection.subscription_id}"
-        if resource_group:
-            scope += f"/resourceGroups/{resource_group}"
-            
-        try:
-            result = self.cost_client.query.usage(scope=scope, parameters=query_definition)
-            return self._parse_cost_response(result)
-        except Exception as e:
-            print(f"Error fetching cost data: {e}")
-            return []
+        return query_definition
 
-    def _parse_cost_response(self, response) -> List[Dict]:
-        """Parse Azure Cost Management API response"""
-        cost_data = []
+    def _fetch_next_cost_page(self, next_link: str, query_definition: Dict) -> QueryResult:
+        """Fetch the next page of a Cost Management query result"""
+        
+        # next_link pages are requested by re-posting the query to the link URL
+        request = HttpRequest("POST", next_link, json=query_definition)
+        response = self.cost_client._send_request(request)
+        response.raise_for_status()
+        return QueryResult.deserialize(response.json())
+
+    def _iter_cost_batches(self, response, batch_size: int) -> Iterator[List[Dict]]:
+        """Parse one Cost Management result page into batches of cost entries"""
+        
+        if not (hasattr(response, 'rows') and response.rows):
+            return
         
-        if hasattr(response, 'rows') and response.rows:
-            columns = [col.name for col in response.columns]
+        columns = [col.name for col in response.columns]
+        batch = []
+        
+        for row in response.rows:
+            row_dict = dict(zip(columns, row))
             
-            for row in response.rows:
-                row_dict = dict(zip(columns, row))
-                
-                cost_entry = {
-                    "resource_id": row_dict.get("ResourceId", ""),
-                    "service_name": row_dict.get("ServiceName", ""),
-                    "cost_amount": float(row_dict.get("PreTaxCost", 0)),
-                    "currency": row_dict.get("Currency", "USD"),
-                    "usage_date": row_dict.get("UsageDate", ""),
-                    "sample_id": row_dict.get("sample_id", ""),
-                    "project": row_dict.get("project", ""),
-                    "workflow_type": row_dict.get("workflow_type", ""),
-                    "user": row_dict.get("user", "")
-                }
-                cost_data.append(cost_entry)
+            cost_entry = {
+                "resource_id": row_dict.get("ResourceId", ""),
+                "service_name": row_dict.get("ServiceName", ""),
+                "cost_amount": float(row_dict.get("PreTaxCost", 0)),
+                "currency": row_dict.get("Currency", "USD"),
+                "usage_date": row_dict.get("UsageDate", ""),
+                "sample_id": row_dict.get("sample_id", ""),
+                "project": row_dict.get("project", ""),
+                "workflow_type": row_dict.get("workflow_type", ""),
+                "user": row_dict.get("user", "")
+            }
+            batch.append(cost_entry)
+            
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
         
-        return cost_data
+        if batch:
+            yield batch
 
     async def estimate_job_cost(self, job: GenomicsJob) -> float:
         """Estimate cost for a genomics job before completion"""
@@ -137,11 +288,12 @@ class AzureCostService:
         estimated_cost = 0.0
         
         # Compute cost estimation (Azure Batch)
-        if job.estimated_runtime_hours:
+        runtime_hours = await self._runtime_hours(job)
+        if runtime_hours:
             # Get current batch pool info
             batch_cost = await self._estimate_batch_cost(
                 job.azure_batch_pool_id, 
-                job.estimated_runtime_hours
+                runtime_hours
             )
             estimated_cost += batch_cost
         
@@ -155,89 +307,182 @@ class AzureCostService:
         
         return round(estimated_cost, 2)
 
+    async def estimate_job_costs(self, jobs: List[GenomicsJob]) -> Dict:
+        """Estimate a whole cohort at once: per-job breakdowns plus totals"""
+        
+        if not jobs:
+            return {
+                "jobs": [],
+                "price_catalog_version": get_price_catalog().version,
+                "default_rate_jobs": 0,
+                "totals": {"compute_cost": 0.0, "storage_cost": 0.0, "network_cost": 0.0, "total_cost": 0.0}
+            }
+        
+        # Read each ORM attribute once; everything after this works on arrays
+        job_ids, pool_ids, runtimes, pipeline_types, workflow_names = zip(*[
+            (job.job_id, job.azure_batch_pool_id, job.estimated_runtime_hours, job.pipeline_type, job.workflow_name)
+            for job in jobs
+        ])
+        runtime_hours = np.array(runtimes, dtype=np.float64)
+        missing_runtimes = np.flatnonzero(np.isnan(runtime_hours))
+        if missing_runtimes.size:
+            runtime_hours[missing_runtimes] = [await self._runtime_hours(jobs[i]) or 0.0 for i in missing_runtimes]
+        
+        # One pool lookup for the whole batch instead of one per job
+        pool_rates = {}
+        if any(pool_id and hours for pool_id, hours in zip(pool_ids, runtime_hours)):
+            pool_rates = await self._pool_hourly_rates()
+        
+        pool_index, pools = _factorize(pool_ids)
+        priced = np.array([bool(pool_id) and pool_id in pool_rates for pool_id in pools])[pool_index]
+        hourly_rates = np.array([
+            pool_rates[pool_id] if pool_id and pool_id in pool_rates else self._default_batch_rate(pool_id)
+            for pool_id in pools
+        ], dtype=np.float64)[pool_index]
+        
+        # Learned profiles differ per workflow, so look each distinct pair up once
+        profile_index, profile_keys = _factorize(list(zip(pipeline_types, workflow_names)))
+        usage_gb = np.array([self._usage_gb(pipeline, workflow) for pipeline, workflow in profile_keys],
+                            dtype=np.float64)[profile_index]
+        storage_gb, network_gb = usage_gb[:, 0], usage_gb[:, 1]
+        
+        compute_costs = runtime_hours * hourly_rates
+        storage_costs = storage_gb * self._storage_cost_per_gb()
+        network_costs = network_gb * settings.AZURE_NETWORK_COST_PER_GB
+        total_costs = compute_costs + storage_costs + network_costs
+        
+        breakdowns = [
+            {
+                "job_id": job_id,
+                "compute_cost": compute,
+                "storage_cost": storage,
+                "network_cost": network,
+                "total_cost": total
+            }
+            for job_id, compute, storage, network, total in zip(
+                job_ids,
+                np.round(compute_costs, 2).tolist(),
+                np.round(storage_costs, 2).tolist(),
+                np.round(network_costs, 2).tolist(),
+                np.round(total_costs, 2).tolist()
+            )
+        ]
+        
+        return {
+            "jobs": breakdowns,
+            "price_catalog_version": get_price_catalog().version,
+            # Jobs with compute time whose pool could not be priced, billed at AZURE_BATCH_COST_PER_HOUR
+            "default_rate_jobs": int(np.count_nonzero(~priced & (runtime_hours > 0))),
+            "totals": {
+                "compute_cost": round(float(compute_costs.sum()), 2),
+                "storage_cost": round(float(storage_costs.sum()), 2),
+                "network_cost": round(float(network_costs.sum()), 2),
+                "total_cost": round(float(np.round(total_costs, 2).sum()), 2)
+            }
+        }
+
+    async def _runtime_hours(self, job: GenomicsJob) -> Optional[float]:
+        """The client's runtime estimate, else the runtime model's prediction"""
+        
+        # Only a missing estimate falls back, as in estimate_job_costs; an explicit 0 means no compute
+        if job.estimated_runtime_hours is not None:
+            return job.estimated_runtime_hours
+        
+        prediction = runtime_models.predict_job(job)
+        return prediction.hours if prediction else None
+
     async def _estimate_batch_cost(self, pool_id: Optional[str], runtime_hours: float) -> float:
         """Estimate Azure Batch compute costs"""
         
         if not pool_id:
-            # Use default pricing for Standard_D2s_v3
-            return runtime_hours * settings.AZURE_BATCH_COST_PER_HOUR
+            return runtime_hours * self._default_batch_rate(pool_id)
         
-        try:
-            # Get actual pool configuration
-            pools = self.batch_client.pool.list()
-            for pool in pools:
-                if pool.id == pool_id:
-                    vm_size = pool.vm_size
-                    target_dedicated_nodes = pool.target_dedicated_nodes or 0
-                    target_low_priority_nodes = pool.target_low_priority_nodes or 0
-                    
-                    # Calculate cost based on VM size and node count
-                    dedicated_cost = target_dedicated_nodes * runtime_hours * self._get_vm_cost_per_hour(vm_size)
-                    low_priority_cost = target_low_priority_nodes * runtime_hours * self._get_vm_cost_per_hour(vm_size, low_priority=True)
-                    
-                    return dedicated_cost + low_priority_cost
-        except Exception as e:
-            print(f"Error estimating batch cost: {e}")
+        pool = await self.pool_cache.get(pool_id)
+        if pool is not None:
+            return runtime_hours * self._pool_cost_per_hour(pool)
         
         # Fallback to default pricing
-        return runtime_hours * settings.AZURE_BATCH_COST_PER_HOUR
-
-    def _get_vm_cost_per_hour(self, vm_size: str, low_priority: bool = False) -> float:
-        """Get VM cost per hour based on size"""
-        
-        # Simplified pricing model - in production, use Azure Pricing API
-        vm_pricing = {
-            "Standard_D2s_v3": 0.096,
-            "Standard_D4s_v3": 0.192,
-            "Standard_D8s_v3": 0.384,
-            "Standard_D16s_v3": 0.768,
-            "Standard_F4s_v2": 0.169,
-            "Standard_F8s_v2": 0.338,
-            "Standard_F16s_v2": 0.676
-        }
+        return runtime_hours * self._default_batch_rate(pool_id)
+
+    def _default_batch_rate(self, pool_id: Optional[str]) -> float:
+        """The configured flat Batch rate, reported once per pool so the guesswork is visible"""
+        
+        if pool_id not in _default_rate_pools:
+            _default_rate_pools.add(pool_id)
+            if pool_id:
+                print(f"No configuration for Batch pool {pool_id}; "
+                      f"pricing at AZURE_BATCH_COST_PER_HOUR ({settings.AZURE_BATCH_COST_PER_HOUR}/h)")
+            else:
+                print(f"Job without a Batch pool; pricing at AZURE_BATCH_COST_PER_HOUR ({settings.AZURE_BATCH_COST_PER_HOUR}/h)")
+        return settings.AZURE_BATCH_COST_PER_HOUR
+
+    async def _pool_hourly_rates(self) -> Dict[str, float]:
+        """Hourly cost of each Batch pool at its target node counts"""
+        
+        pools = await self.pool_cache.get_all()
+        return {pool_id: self._pool_cost_per_hour(pool) for pool_id, pool in pools.items()}
+
+    def _pool_cost_per_hour(self, pool: PoolConfig) -> float:
+        # Calculate cost based on VM size and node count
+        return (
+            pool.target_dedicated_nodes * self._get_vm_cost_per_hour(pool.vm_size)
+            + pool.target_low_priority_nodes * self._get_vm_cost_per_hour(pool.vm_size, low_priority=True)
+        )
+
+    async def _list_batch_pools(self) -> List:
+        """List every Batch pool in the subscription (one management API call)"""
+        return await self._call(lambda: list(self.batch_client.pool.list()))
+
+    def _get_vm_cost_per_hour(self, vm_size: str, low_priority: bool = False, region: Optional[str] = None) -> float:
+        """Get VM cost per hour from the price catalog"""
+        
+        region = region or settings.AZURE_DEFAULT_REGION
+        price = get_price_catalog().price(vm_size, region, LOW_PRIORITY if low_priority else DEDICATED)
+        if price is not None:
+            return price
         
-        base_cost = vm_pricing.get(vm_size, 0.096)  # Default to D2s_v3
+        # Unknown size: say so once instead of silently pricing it as D2s_v3
+        if (vm_size, region) not in _unpriced_vm_sizes:
+            _unpriced_vm_sizes.add((vm_size, region))
+            print(f"No price for {vm_size} in {region}; using default rate")
         
         if low_priority:
-            return base_cost * 0.2  # Low-priority is ~80% cheaper
+            return DEFAULT_VM_COST_PER_HOUR * LOW_PRIORITY_COST_FACTOR
         
-        return base_cost
+        return DEFAULT_VM_COST_PER_HOUR
 
-    async def _estimate_storage_cost(self, job: GenomicsJob) -> float:
-        """Estimate Azure Storage costs"""
-        
-        # Estimate based on typical genomics data sizes
-        workflow_storage_estimates = {
-            "WGS": 200,  # GB for whole genome sequencing
-            "RNA-seq": 50,  # GB for RNA sequencing
-            "ChIP-seq": 20,  # GB for ChIP sequencing
-            "ATAC-seq": 15,  # GB for ATAC sequencing
-        }
+    def _storage_cost_per_gb(self) -> float:
+        # Assume 30 days retention in hot storage, then move to cool
+        return (settings.AZURE_STORAGE_HOT_COST_PER_GB * HOT_STORAGE_DAYS
+                + settings.AZURE_STORAGE_COOL_COST_PER_GB * COOL_STORAGE_DAYS)
+
+    def _usage_gb(self, pipeline_type: str, workflow_name: Optional[str] = None) -> Tuple[float, float]:
+        """Expected (stored GB, transferred GB) for a job: learned medians, else the fixed tables"""
         
-        estimated_gb = workflow_storage_estimates.get(job.pipeline_type, 100)
+        profile = usage_profiles.lookup(pipeline_type, workflow_name)
+        if profile is not None:
+            return profile
         
-        # Assume 30 days retention in hot storage, then move to cool
-        hot_storage_cost = estimated_gb * settings.AZURE_STORAGE_HOT_COST_PER_GB * 30
-        cool_storage_cost = estimated_gb * settings.AZURE_STORAGE_COOL_COST_PER_GB * 335  # Rest of year
+        # Estimate based on typical genomics data sizes and data movement patterns
+        return (
+            PIPELINE_STORAGE_GB.get(pipeline_type, DEFAULT_STORAGE_GB),
+            PIPELINE_NETWORK_GB.get(pipeline_type, DEFAULT_NETWORK_GB)
+        )
+
+    async def _estimate_storage_cost(self, job: GenomicsJob) -> float:
+        """Estimate Azure Storage costs"""
         
-        return hot_storage_cost + cool_storage_cost
+        estimated_gb = self._usage_gb(job.pipeline_type, job.workflow_name)[0]
+        return estimated_gb * self._storage_cost_per_gb()
 
     async def _estimate_network_cost(self, job: GenomicsJob) -> float:
         """Estimate Azure network/data transfer costs"""
         
-        # Estimate based on typical data movement patterns
-        workflow_network_estimates = {
-            "WGS": 50,   # GB data transfer
-            "RNA-seq": 20,
-            "ChIP-seq": 10,
-            "ATAC-seq": 8,
-        }
-        
-        estimated_transfer_gb = workflow_network_estimates.get(job.pipeline_type, 25)
+        estimated_transfer_gb = self._usage_gb(job.pipeline_type, job.workflow_name)[1]
         return estimated_transfer_gb * settings.AZURE_NETWORK_COST_PER_GB
 
-    async def tag_resources_for_job(self, job: GenomicsJob, resource_group: str) -> bool:
-        """Tag Azure resources for cost attribution"""
+    async def tag_resources_for_job(self, job: GenomicsJob, resource_group: str) -> Dict:
+        """Tag Azure resources for cost attribution; returns per-resource outcomes"""
         
         tags = {
             "sample_id": job.sample_id,
@@ -249,54 +494,113 @@ class AzureCostService:
         }
         
         try:
-            # Get all resources in the resource group
-            resources = self.resource_client.resources.list_by_resource_group(resource_group)
-            
-            tagged_count = 0
-            for resource in resources:
-                try:
-                    # Update resource tags
-                    existing_tags = resource.tags or {}
-                    existing_tags.update(tags)
-                    
-                    # Apply tags to resource
-                    self.resource_client.resources.update_by_id(
-                        resource_id=resource.id,
-                        api_version="2021-04-01",
-                        parameters={
-                            "tags": existing_tags
-                        }
-                    )
-                    tagged_count += 1
-                    
-                except Exception as e:
-                    print(f"Error tagging resource {resource.id}: {e}")
-            
-            print(f"Successfully tagged {tagged_count} resources for job {job.job_id}")
-            return tagged_count > 0
-            
+            # Listed resources carry their current tags, so no-op updates are skipped without extra reads
+            resources = await self._call(
+                lambda: list(self.resource_client.resources.list_by_resource_group(resource_group))
+            )
         except Exception as e:
             print(f"Error tagging resources: {e}")
-            return False
+            return {"job_id": job.job_id, "resource_group": resource_group, "error": str(e), "resources": []}
+        
+        results = await self.tagger.tag_resources(resources, tags)
+        summary = {"updated": 0, "unchanged": 0, "failed": 0}
+        for result in results:
+            summary[result.status] += 1
+            if result.status == "failed":
+                print(f"Error tagging resource {result.resource_id}: {result.error}")
+        
+        print(f"Tagged resources for job {job.job_id}: {summary['updated']} updated, "
+              f"{summary['unchanged']} already tagged, {summary['failed']} failed")
+        return {
+            "job_id": job.job_id,
+            "resource_group": resource_group,
+            **summary,
+            "resources": [result.to_dict() for result in results]
+        }
 
-    async def get_batch_job_metrics(self, job_id: str, pool_id: str) -> Dict:
-        """Get real-time metrics from Azure Batch job"""
+    async def get_batch_pool_metrics(self, pool_id: str) -> Dict:
+        """Node and task state of one Batch pool, summed over the active jobs running on it"""
         
-        try:
-            # This would integrate with Azure Batch API to get job metrics
-            # For now, return mock data
-            return {
-                "status": "running",
-                "progress_percentage": 65,
-                "active_nodes": 4,
-                "running_tasks": 12,
-                "completed_tasks": 45,
-                "failed_tasks": 1,
-                "estimated_completion": "2024-01-15T14:30:00Z"
-            }
-        except Exception as e:
-            print(f"Error getting batch job metrics: {e}")
-            return {}
+        metrics = await self._call(self._fetch_batch_pool_metrics, pool_id)
+        
+        # The live pool is the first to show a resize or re-creation; stale configs would misprice estimates
+        cached = self.pool_cache.cached(pool_id)
+        if cached is not None and _pool_changed(cached, metrics):
+            print(f"Batch pool {pool_id} changed since it was listed; reloading pool configurations")
+            self.pool_cache.invalidate()
+        return metrics
+
+    def _fetch_batch_pool_metrics(self, pool_id: str) -> Dict:
+        # Pool and task state live on the Batch account's data plane, not in the management API
+        account_url = self._batch_account_url(pool_id)
+        pool = self._batch_get(f"{account_url}/pools/{quote(pool_id, safe='')}", {
+            "$select": "id,state,allocationState,vmSize,currentDedicatedNodes,currentLowPriorityNodes,"
+                       "targetDedicatedNodes,targetLowPriorityNodes"
+        })
+        jobs = self._batch_get(f"{account_url}/jobs", {
+            "$filter": f"executionInfo/poolId eq '{_odata_string(pool_id)}' and state eq 'active'",
+            "$select": "id"
+        }).get("value", [])
+        
+        tasks = defaultdict(int)
+        for job in jobs:
+            counts = self._batch_get(f"{account_url}/jobs/{quote(job['id'], safe='')}/taskcounts").get("taskCounts", {})
+            for state in ("active", "running", "completed", "succeeded", "failed"):
+                tasks[state] += counts.get(state, 0)
+        
+        return {
+            "pool_id": pool_id,
+            "allocation_state": pool.get("allocationState"),
+            "vm_size": pool.get("vmSize"),
+            "target_dedicated_nodes": pool.get("targetDedicatedNodes", 0),
+            "target_low_priority_nodes": pool.get("targetLowPriorityNodes", 0),
+            "active_nodes": pool.get("currentDedicatedNodes", 0) + pool.get("currentLowPriorityNodes", 0),
+            "batch_jobs": len(jobs),
+            "queued_tasks": tasks["active"],
+            "running_tasks": tasks["running"],
+            "completed_tasks": tasks["completed"],
+            "failed_tasks": tasks["failed"]
+        }
+
+    def _batch_account_url(self, pool_id: str) -> str:
+        """Data-plane URL of the Batch account running a pool: the connection's, else discovered once per pool"""
+        
+        account_url = self.batch_account_url or self._batch_urls.get(pool_id)
+        if not account_url:
+            account_url = self._batch_urls[pool_id] = self._find_batch_account(pool_id)
+        if not account_url.startswith("https://"):
+            account_url = f"https://{account_url}"
+        return account_url.rstrip("/")
+
+    def _find_batch_account(self, pool_id: str) -> str:
+        """Endpoint of the subscription's Batch account that has the pool"""
+        
+        accounts = list(self.batch_client.batch_account.list())
+        if not accounts:
+            raise ValueError(f"No Batch account in subscription {self.subscription_id}")
+        if len(accounts) == 1:
+            return accounts[0].account_endpoint
+        
+        for account in accounts:
+            # /subscriptions/{id}/resourceGroups/{group}/providers/Microsoft.Batch/batchAccounts/{name}
+            resource_group = account.id.split("/")[4]
+            try:
+                self.batch_client.pool.get(resource_group, account.name, pool_id)
+            except ResourceNotFoundError:
+                continue
+            return account.account_endpoint
+        raise ValueError(f"No Batch account in subscription {self.subscription_id} has pool {pool_id}")
+
+    def _batch_get(self, url: str, params: Optional[Dict] = None) -> Dict:
+        token = self.credential.get_token(BATCH_DATA_PLANE_SCOPE).token
+        response = self._session.get(
+            url,
+            params={"api-version": BATCH_DATA_PLANE_API_VERSION, **(params or {})},
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=30
+        )
+        response.raise_for_status()
+        return response.json()
 
 # Cost reconciliation service
 class CostReconciliationService:
@@ -306,30 +610,225 @@ class CostReconciliationService:
     async def reconcile_job_costs(self, job: GenomicsJob, db_session) -> Dict:
         """Reconcile estimated costs with actual Azure costs"""
         
-        if not job.completed_at:
-            return {"status": "job_not_completed"}
+        results = await self.reconcile_jobs([job], db_session)
+        return results[job.job_id]
+
+    async def reconcile_pending_jobs(self, db_session) -> Dict[str, Dict]:
+        """Reconcile every completed job whose costs are not finalized yet"""
+        
+        pending_jobs = db_session.query(GenomicsJob).filter(
+            GenomicsJob.status == "completed",
+            GenomicsJob.completed_at.isnot(None),
+            GenomicsJob.cost_finalized_at.is_(None)
+        ).all()
         
-        # Get actual costs from Azure (with 24-48h delay)
-        end_date = job.completed_at + timedelta(days=2)  # Account for billing delay
-        start_date = job.started_at - timedelta(hours=1)  # Buffer for job start
+        return await self.reconcile_jobs(pending_jobs, db_session)
+
+    async def reconcile_jobs(self, jobs: List[GenomicsJob], db_session) -> Dict[str, Dict]:
+        """Reconcile many jobs with one cost pull per resource group"""
+        
+        results = {}
+        jobs_by_scope: Dict[Optional[str], List[GenomicsJob]] = defaultdict(list)
+        
+        for job in jobs:
+            if not job.completed_at:
+                results[job.job_id] = {"status": "job_not_completed"}
+            else:
+                jobs_by_scope[job.azure_resource_group].append(job)
+        
+        already_finalized = {job.id for job in jobs if job.cost_finalized_at}
+        for resource_group, scope_jobs in jobs_by_scope.items():
+            touched_days = set()
+            try:
+                scope_results = await self._sync_scope(resource_group, scope_jobs, touched_days, db_session)
+                with _aggregates_lock:
+                    self._refresh_aggregates(touched_days, db_session)
+                    db_session.commit()
+                results.update(scope_results)
+            except Exception as e:
+                # Nothing from a partly read window is kept: no watermark move, no settled cost
+                db_session.rollback()
+                print(f"Error syncing costs for {resource_group}: {e}")
+                for job in scope_jobs:
+                    results[job.job_id] = {"status": "cost_fetch_failed", "error": str(e)}
+        
+        # Only settled costs teach the storage and network profiles
+        newly_finalized = [job for job in jobs if job.cost_finalized_at and job.id not in already_finalized]
+        if newly_finalized:
+            with _aggregates_lock:
+                update_usage_profiles(db_session, newly_finalized)
+                db_session.commit()
+                runtime_models.learn(newly_finalized)
+        
+        return results
+
+    async def _sync_scope(self, resource_group: Optional[str], jobs: List[GenomicsJob],
+                          touched_days: Set[date], db_session) -> Dict[str, Dict]:
+        """Incrementally sync one resource group's costs and settle its jobs"""
+        
+        watermark = self._get_watermark(resource_group, db_session)
+        synced_at = datetime.utcnow()
+        
+        windows = {job.id: self._job_cost_window(job) for job in jobs}
+        fetch_starts = {
+            job.id: self._job_fetch_start(job, windows[job.id], watermark)
+            for job in jobs
+        }
         
-        actual_costs = await self.azure_service.get_cost_data(
-            start_date=start_date,
-            end_date=end_date,
-            resource_group=job.azure_resource_group
+        jobs_to_fetch = [job for job in jobs if fetch_starts[job.id] <= windows[job.id][1].date()]
+        if jobs_to_fetch:
+            # Re-fetched days are upserted in place, so stored rows stay authoritative
+            write_stats = await self._pull_scope_costs(resource_group, jobs_to_fetch, fetch_starts,
+                                                       windows, touched_days, db_session)
+            print(f"Cost sync for {watermark.scope}: {write_stats['inserted']} rows inserted, "
+                  f"{write_stats['updated']} rows updated")
+        
+        totals = dict(
+            db_session.query(CostData.genomics_job_id, func.sum(CostData.cost_amount))
+            .filter(CostData.genomics_job_id.in_([job.id for job in jobs]))
+            .group_by(CostData.genomics_job_id)
+            .all()
         )
         
-        # Filter costs for this specific job
-        job_costs = [
-            cost for cost in actual_costs 
-            if cost.get("sample_id") == job.sample_id
-        ]
+        window_end = max(end for _, end in windows.values()).date()
+        finalized_through = min(
+            window_end,
+            synced_at.date() - timedelta(days=settings.COST_FINALIZATION_DAYS)
+        )
+        if watermark.finalized_through is None or finalized_through > watermark.finalized_through:
+            watermark.finalized_through = finalized_through
+        watermark.last_synced_at = synced_at
+        
+        results = {}
+        for job in jobs:
+            results[job.job_id] = self._settle_job(job, totals.get(job.id) or 0.0, synced_at)
+            if windows[job.id][1].date() <= watermark.finalized_through:
+                job.cost_finalized_at = synced_at
+        
+        return results
+
+    def _get_watermark(self, resource_group: Optional[str], db_session) -> CostSyncWatermark:
+        """Get or create the sync watermark for a connection and scope"""
+        
+        scope = self.azure_service.cost_scope(resource_group)
+        watermark = db_session.query(CostSyncWatermark).filter(
+            CostSyncWatermark.azure_connection_id == self.azure_service.connection_id,
+            CostSyncWatermark.scope == scope
+        ).first()
+        
+        if watermark is None:
+            watermark = CostSyncWatermark(
+                azure_connection_id=self.azure_service.connection_id,
+                scope=scope
+            )
+            db_session.add(watermark)
+        
+        return watermark
+
+    def _job_fetch_start(self, job: GenomicsJob, window: Tuple[datetime, datetime],
+                         watermark: CostSyncWatermark) -> date:
+        """First billing date that still has to be fetched for a job"""
+        
+        start_date = window[0].date()
+        
+        # Finalized days are already stored only if the job took part in the last sync
+        if (watermark.finalized_through is None
+                or watermark.last_synced_at is None
+                or job.cost_last_updated is None
+                or job.cost_last_updated < watermark.last_synced_at):
+            return start_date
+        
+        return max(start_date, watermark.finalized_through + timedelta(days=1))
+
+    async def _pull_scope_costs(self, resource_group: Optional[str], jobs: List[GenomicsJob],
+                                fetch_starts: Dict[int, date],
+                                windows: Dict[int, Tuple[datetime, datetime]],
+                                touched_days: Set[date], db_session) -> Dict[str, int]:
+        """Pull one resource group's costs once and fan rows out to its jobs"""
+        
+        jobs_by_id = {job.id: job for job in jobs}
+        runs_by_key = self._runs_by_attribution_key(resource_group, jobs, db_session)
+        
+        write_stats = {"inserted": 0, "updated": 0}
+        
+        # Stream cost pages so rows are written while later pages are still being fetched
+        async for batch in self.azure_service.iter_cost_data(
+            start_date=datetime.combine(min(fetch_starts[job.id] for job in jobs), time.min),
+            end_date=max(windows[job.id][1] for job in jobs),
+            resource_group=resource_group
+        ):
+            rows = []
+            for cost in batch:
+                runs = runs_by_key.get((cost.get("sample_id"), cost.get("project")))
+                if not runs:
+                    continue
+                
+                # A cost row belongs to one run only: the latest one started by its usage date
+                usage_date = self._parse_usage_date(cost["usage_date"]).date()
+                owner = max(bisect_right(runs[0], usage_date) - 1, 0)
+                job = jobs_by_id.get(runs[1][owner])
+                if job is not None and fetch_starts[job.id] <= usage_date <= windows[job.id][1].date():
+                    rows.append(self._build_cost_values(job, cost))
+                    touched_days.add(usage_date)
+            
+            batch_stats = upsert_cost_data(db_session, rows)
+            write_stats["inserted"] += batch_stats["inserted"]
+            write_stats["updated"] += batch_stats["updated"]
+        
+        return write_stats
+
+    def _refresh_aggregates(self, touched_days: Set[date], db_session):
+        """Bring dashboard rollups and budget alert totals in step with the days a pull touched"""
+        
+        if not touched_days:
+            return
+        
+        # Totals are seeded once per leadership term; after that only alerts saved since the last batch are read
+        budget_alerts.refresh(db_session)
+        previous_totals = rollup_totals(db_session, touched_days)
+        refresh_daily_rollups(db_session, touched_days)
         
-        total_actual_cost = sum(cost["cost_amount"] for cost in job_costs)
+        # Budget alerts see only what changed, not a re-sum of every cost
+        triggered = budget_alerts.apply(cost_deltas(previous_totals, rollup_totals(db_session, touched_days)))
+        mark_triggered(db_session, triggered)
+
+    def _runs_by_attribution_key(self, resource_group: Optional[str], jobs: List[GenomicsJob],
+                                 db_session) -> Dict[Tuple[str, str], Tuple[List[date], List[int]]]:
+        """Start date and id of every run sharing the jobs' sample and project tags, oldest first"""
+        
+        # All runs are loaded, not just those being synced, so a row picks the same owner on every pull
+        query = db_session.query(
+            GenomicsJob.id, GenomicsJob.sample_id, GenomicsJob.project_name, GenomicsJob.started_at
+        ).filter(GenomicsJob.sample_id.in_({job.sample_id for job in jobs}))
+        if resource_group:
+            query = query.filter(GenomicsJob.azure_resource_group == resource_group)
+        
+        keys = {(job.sample_id, job.project_name) for job in jobs}
+        runs: Dict[Tuple[str, str], List[Tuple[date, int]]] = defaultdict(list)
+        for job_id, sample_id, project_name, started_at in query.all():
+            if (sample_id, project_name) in keys and started_at is not None:
+                runs[(sample_id, project_name)].append((started_at.date(), job_id))
+        
+        indexed = {}
+        for key, key_runs in runs.items():
+            key_runs.sort()
+            indexed[key] = ([start for start, _ in key_runs], [job_id for _, job_id in key_runs])
+        return indexed
+
+    def _job_cost_window(self, job: GenomicsJob) -> Tuple[datetime, datetime]:
+        """Time window in which a job's costs can appear"""
+        
+        # Get actual costs from Azure (with 24-48h delay)
+        end_date = job.completed_at + timedelta(days=2)  # Account for billing delay
+        start_date = job.started_at - timedelta(hours=1)  # Buffer for job start
+        return start_date, end_date
+
+    def _settle_job(self, job: GenomicsJob, total_actual_cost: float, synced_at: datetime) -> Dict:
+        """Record the actual cost on a job and report estimate accuracy"""
         
         # Update job with actual cost
         job.actual_cost = total_actual_cost
-        job.cost_last_updated = datetime.utcnow()
+        job.cost_last_updated = synced_at
         
         # Calculate accuracy metrics
         if job.estimated_cost > 0:
@@ -337,26 +836,6 @@ class CostReconciliationService:
         else:
             accuracy_percentage = 0
         
-        # Store detailed cost data
-        for cost in job_costs:
-            cost_record = CostData(
-                genomics_job_id=job.id,
-                resource_id=cost["resource_id"],
-                resource_type=self._extract_resource_type(cost["resource_id"]),
-                service_name=cost["service_name"],
-                cost_amount=cost["cost_amount"],
-                currency=cost["currency"],
-                billing_period=cost["usage_date"][:10],
-                usage_date=datetime.fromisoformat(cost["usage_date"].replace("Z", "+00:00")),
-                sample_id=cost["sample_id"],
-                project_name=cost["project"],
-                user_email=cost["user"],
-                azure_tags=cost
-            )
-            db_session.add(cost_record)
-        
-        db_session.commit()
-        
         return {
             "status": "reconciled",
             "estimated_cost": job.estimated_cost,
@@ -365,6 +844,34 @@ class CostReconciliationService:
             "cost_variance": total_actual_cost - job.estimated_cost
         }
 
+    def _parse_usage_date(self, usage_date) -> datetime:
+        """Parse a Cost Management UsageDate (20240115 or ISO 8601)"""
+        
+        value = str(usage_date)
+        if value.isdigit():
+            return datetime.strptime(value, "%Y%m%d")
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+
+    def _build_cost_values(self, job: GenomicsJob, cost: Dict) -> Dict:
+        """Build CostData column values for a parsed cost entry"""
+        
+        usage_date = self._parse_usage_date(cost["usage_date"])
+        
+        return {
+            "genomics_job_id": job.id,
+            "resource_id": cost["resource_id"],
+            "resource_type": self._extract_resource_type(cost["resource_id"]),
+            "service_name": cost["service_name"],
+            "cost_amount": cost["cost_amount"],
+            "currency": cost["currency"],
+            "billing_period": usage_date.strftime("%Y-%m-%d"),
+            "usage_date": usage_date,
+            "sample_id": cost["sample_id"],
+            "project_name": cost["project"],
+            "user_email": cost["user"],
+            "azure_tags": cost
+        }
+
     def _extract_resource_type(self, resource_id: str) -> str:
         """Extract resource type from Azure resource ID"""
         
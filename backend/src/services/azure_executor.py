@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Hashable
+import asyncio
+import functools
+import threading
+
+from ..config.settings import settings
+
+class AzureCallExecutor:
+    """Run blocking Azure SDK calls off the event loop with per-connection limits"""
+
+    def __init__(self, max_workers: int, per_connection_limit: int):
+        self.max_workers = max_workers
+        self.per_connection_limit = per_connection_limit
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="azure-sdk")
+        # Thread-level gates, so the limit holds across the event loops reconciliation batches run in worker threads
+        self._semaphores = {}  # connection key -> threading.BoundedSemaphore
+        self._semaphores_lock = threading.Lock()
+
+    def _get_semaphore(self, connection_key: Hashable) -> threading.BoundedSemaphore:
+        """Get or create the concurrency gate for a connection"""
+        
+        with self._semaphores_lock:
+            semaphore = self._semaphores.get(connection_key)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_connection_limit)
+                self._semaphores[connection_key] = semaphore
+            return semaphore
+
+    async def run(self, connection_key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        """Run func(*args, **kwargs) on the worker pool, bounded per connection"""
+        
+        semaphore = self._get_semaphore(connection_key)
+        await self._acquire(semaphore)
+        try:
+            future = self._pool.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            semaphore.release()
+            raise
+        
+        # The slot is held until the call itself returns, even if the awaiting coroutine is cancelled
+        future.add_done_callback(lambda _: semaphore.release())
+        return await asyncio.wrap_future(future)
+
+    async def _acquire(self, semaphore: threading.BoundedSemaphore):
+        # A free slot is taken without leaving the loop; otherwise wait in a helper thread, not on the loop
+        if semaphore.acquire(blocking=False):
+            return
+        
+        acquiring = asyncio.get_running_loop().run_in_executor(None, semaphore.acquire)
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The helper thread still takes the slot; hand it back once it has
+            acquiring.add_done_callback(lambda _: semaphore.release())
+            raise
+
+    def forget(self, connection_key: Hashable):
+        """Drop the concurrency gate for a connection that is no longer used"""
+        with self._semaphores_lock:
+            self._semaphores.pop(connection_key, None)
+
+    def shutdown(self):
+        """Stop accepting calls and release worker threads"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+# Shared executor for all Azure management-plane calls in this process
+azure_executor = AzureCallExecutor(
+    max_workers=settings.AZURE_SDK_MAX_WORKERS,
+    per_connection_limit=settings.AZURE_SDK_MAX_CONCURRENCY_PER_CONNECTION
+)
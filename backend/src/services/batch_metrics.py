@@ -0,0 +1,179 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import random
+import time
+
+from ..config.settings import settings
+from ..models.database import AzureConnection, GenomicsJob, SessionLocal
+from .azure_client_pool import get_azure_service
+from .weblog_writer import job_progress
+
+def poll_interval(age_seconds: float, rng: random.Random = random) -> float:
+    """Seconds until a job is polled again: often while young, rarely once long-running, with jitter"""
+    
+    interval = min(
+        max(age_seconds * settings.BATCH_METRICS_INTERVAL_AGE_FRACTION, settings.BATCH_METRICS_MIN_INTERVAL_SECONDS),
+        settings.BATCH_METRICS_MAX_INTERVAL_SECONDS
+    )
+    return interval * (1 + rng.uniform(-settings.BATCH_METRICS_JITTER, settings.BATCH_METRICS_JITTER))
+
+class BatchMetricsCollector:
+    """Polls Batch for running jobs on an adaptive schedule and keeps the latest snapshot per job in memory;
+    only the worker for which is_leader() holds polls, the others record the snapshots it shares"""
+
+    def __init__(self, tick_seconds: float, ttl_seconds: float):
+        self.tick_seconds = tick_seconds
+        self.ttl_seconds = ttl_seconds
+        self.on_snapshot: Optional[Callable[[Dict], None]] = None
+        self.is_leader: Callable[[], bool] = lambda: True
+        self.pool_requests = 0
+        self._snapshots: Dict[str, Tuple[float, Dict]] = {}
+        self._next_poll: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Latest snapshot for a job, or None if it has none younger than the TTL; never calls Azure"""
+        
+        entry = self._snapshots.get(job_id)
+        if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+            return None
+        return entry[1]
+
+    def record(self, snapshot: Dict):
+        """Keep a snapshot polled by another worker"""
+        self._snapshots[snapshot["job_id"]] = (time.monotonic(), snapshot)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def poll_due(self) -> int:
+        """Poll every running job whose next poll time has passed; returns jobs refreshed"""
+        
+        now = time.monotonic()
+        jobs, connections = await asyncio.get_running_loop().run_in_executor(None, self._load_running_jobs)
+        
+        # Jobs that finished drop off the schedule; their last snapshot expires with the TTL
+        running_ids = {job.job_id for job in jobs}
+        for job_id in [job_id for job_id in self._next_poll if job_id not in running_ids]:
+            del self._next_poll[job_id]
+        
+        due = [job for job in jobs if self._next_poll.get(job.job_id, 0.0) <= now]
+        if not due:
+            return 0
+        
+        # One Batch request set per pool and account, however many jobs share the pool
+        groups: Dict[Tuple[Optional[int], Optional[str]], List[GenomicsJob]] = defaultdict(list)
+        for job in due:
+            connection = connections.get(job.organization_id)
+            groups[(connection.id if connection else None, job.azure_batch_pool_id)].append(job)
+        
+        keys = list(groups)
+        pool_metrics = await asyncio.gather(
+            *(self._pool_metrics(connections, groups[key][0], key[1]) for key in keys)
+        )
+        
+        utcnow = datetime.utcnow()
+        for key, pool in zip(keys, pool_metrics):
+            for job in groups[key]:
+                snapshot = job_metrics_snapshot(job, pool, utcnow)
+                self._snapshots[job.job_id] = (now, snapshot)
+                
+                age_seconds = (utcnow - job.started_at).total_seconds() if job.started_at else 0.0
+                self._next_poll[job.job_id] = now + poll_interval(age_seconds)
+                
+                if self.on_snapshot is not None:
+                    self.on_snapshot(snapshot)
+        
+        self._expire(now)
+        return len(due)
+
+    async def _pool_metrics(self, connections: Dict[int, AzureConnection], job: GenomicsJob,
+                            pool_id: Optional[str]) -> Optional[Dict]:
+        connection = connections.get(job.organization_id)
+        if connection is None or not pool_id:
+            return None
+        
+        self.pool_requests += 1
+        try:
+            return await get_azure_service(connection).get_batch_pool_metrics(pool_id)
+        except Exception as e:
+            print(f"Error getting Batch metrics for pool {pool_id}: {e}")
+            return None
+
+    def _load_running_jobs(self) -> Tuple[List[GenomicsJob], Dict[int, AzureConnection]]:
+        db = SessionLocal()
+        try:
+            jobs = db.query(GenomicsJob).filter(GenomicsJob.status == "running").all()
+            organization_ids = {job.organization_id for job in jobs}
+            connections = {}
+            if organization_ids:
+                for connection in db.query(AzureConnection).filter(
+                    AzureConnection.organization_id.in_(organization_ids),
+                    AzureConnection.is_active.is_(True)
+                ).all():
+                    connections.setdefault(connection.organization_id, connection)
+            
+            # Snapshots are built after the session closes
+            db.expunge_all()
+            return jobs, connections
+        finally:
+            db.close()
+
+    def _expire(self, now: float):
+        for job_id in [job_id for job_id, (fetched_at, _) in self._snapshots.items()
+                       if now - fetched_at > self.ttl_seconds]:
+            del self._snapshots[job_id]
+
+    async def _run(self):
+        while True:
+            try:
+                if self.is_leader():
+                    await self.poll_due()
+                else:
+                    # A worker that later takes over polls every job straight away
+                    self._next_poll.clear()
+                    self._expire(time.monotonic())
+            except Exception as e:
+                print(f"Error polling Batch metrics: {e}")
+            await asyncio.sleep(self.tick_seconds)
+
+def job_metrics_snapshot(job: GenomicsJob, pool: Optional[Dict], now: datetime) -> Dict:
+    """Job metrics from its weblog task counters and, when reachable, its Batch pool's state"""
+    
+    # Task counts specific to this run come from the weblog; the pool's cover every run sharing it
+    pool = pool or {}
+    has_task_events = bool(job.tasks_submitted)
+    
+    estimated_completion = None
+    if job.started_at and job.estimated_runtime_hours:
+        estimated_completion = (job.started_at + timedelta(hours=job.estimated_runtime_hours)).isoformat() + "Z"
+    
+    return {
+        "job_id": job.job_id,
+        "project_name": job.project_name,
+        "status": job.status,
+        "progress_percentage": job_progress(job),
+        "pool_id": job.azure_batch_pool_id,
+        "allocation_state": pool.get("allocation_state"),
+        "active_nodes": pool.get("active_nodes"),
+        "running_tasks": pool.get("running_tasks"),
+        "completed_tasks": job.tasks_completed if has_task_events else pool.get("completed_tasks"),
+        "failed_tasks": job.tasks_failed if has_task_events else pool.get("failed_tasks"),
+        "running_cost": round(job.running_cost or 0.0, 4),
+        "estimated_completion": estimated_completion,
+        "updated_at": now.isoformat() + "Z"
+    }
+
+# Shared collector for this process
+batch_metrics = BatchMetricsCollector(
+    tick_seconds=settings.BATCH_METRICS_TICK_SECONDS,
+    ttl_seconds=settings.BATCH_METRICS_CACHE_TTL_SECONDS
+)
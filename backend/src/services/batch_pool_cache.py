@@ -0,0 +1,130 @@
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+import asyncio
+import threading
+import time
+import weakref
+
+class PoolConfig:
+    """The parts of a Batch pool that drive its compute cost"""
+
+    __slots__ = ("pool_id", "vm_size", "target_dedicated_nodes", "target_low_priority_nodes")
+
+    def __init__(self, pool_id: str, vm_size: str, target_dedicated_nodes: int, target_low_priority_nodes: int):
+        self.pool_id = pool_id
+        self.vm_size = vm_size
+        self.target_dedicated_nodes = target_dedicated_nodes
+        self.target_low_priority_nodes = target_low_priority_nodes
+
+    @classmethod
+    def from_pool(cls, pool) -> "PoolConfig":
+        return cls(
+            pool.id,
+            pool.vm_size,
+            pool.target_dedicated_nodes or 0,
+            pool.target_low_priority_nodes or 0
+        )
+
+class BatchPoolCache:
+    """TTL-bounded pool configurations indexed by pool id, refreshed ahead of expiry"""
+
+    def __init__(self, list_pools: Callable[[], Awaitable[Iterable]], ttl_seconds: float,
+                 refresh_ahead_fraction: float = 0.8, miss_refresh_seconds: float = 30.0):
+        self.list_pools = list_pools
+        self.ttl_seconds = ttl_seconds
+        self.refresh_after_seconds = ttl_seconds * refresh_ahead_fraction
+        self.miss_refresh_seconds = miss_refresh_seconds
+        self.refresh_count = 0
+        self._pools: Dict[str, PoolConfig] = {}
+        self._loaded_at: Optional[float] = None
+        # Reconciliation batches run under asyncio.run in worker threads, each on its own event loop;
+        # asyncio locks and tasks are bound to one loop, so each running loop gets its own
+        self._refresh_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._background: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._loops_lock = threading.Lock()
+
+    async def get(self, pool_id: str) -> Optional[PoolConfig]:
+        """Configuration for one pool, or None if the subscription has no such pool"""
+        
+        pools = await self.get_all()
+        config = pools.get(pool_id)
+        
+        # An unknown id may be a pool created since the last listing
+        if config is None and self._age() > self.miss_refresh_seconds:
+            await self.refresh()
+            config = self._pools.get(pool_id)
+        
+        return config
+
+    async def get_all(self) -> Dict[str, PoolConfig]:
+        """Every cached pool; blocks on a listing only when the cache is empty or expired"""
+        
+        age = self._age()
+        if age > self.ttl_seconds:
+            await self.refresh()
+        elif age > self.refresh_after_seconds:
+            # Serve the current entries while a fresh listing loads
+            loop = asyncio.get_running_loop()
+            with self._loops_lock:
+                if loop not in self._background:
+                    self._background[loop] = loop.create_task(self._refresh_in_background(loop))
+        return self._pools
+
+    def cached(self, pool_id: str) -> Optional[PoolConfig]:
+        """The cached configuration for a pool, without listing pools"""
+        return self._pools.get(pool_id)
+
+    async def refresh(self):
+        """Reload pool configurations; concurrent callers share one listing"""
+        
+        loaded_at = self._loaded_at
+        async with self._refresh_lock():
+            # Another caller refreshed while we waited for the lock
+            if self._loaded_at != loaded_at:
+                return
+            
+            try:
+                pools = await self.list_pools()
+                self._pools = {pool.id: PoolConfig.from_pool(pool) for pool in pools}
+                self.refresh_count += 1
+            except Exception as e:
+                # Keep serving the last known pools until the next attempt
+                print(f"Error refreshing Batch pool cache: {e}")
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """Force the next lookup to list pools again, e.g. after a pool was resized or re-created"""
+        self._loaded_at = None
+
+    def close(self):
+        with self._loops_lock:
+            tasks = list(self._background.values())
+            self._background.clear()
+        for task in tasks:
+            # The task may belong to another thread's loop, which must cancel it itself
+            loop = task.get_loop()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(task.cancel)
+
+    def _age(self) -> float:
+        if self._loaded_at is None:
+            return float("inf")
+        return time.monotonic() - self._loaded_at
+
+    def _refresh_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._loops_lock:
+            lock = self._refresh_locks.get(loop)
+            if lock is None:
+                lock = self._refresh_locks[loop] = asyncio.Lock()
+        return lock
+
+    async def _refresh_in_background(self, loop: asyncio.AbstractEventLoop):
+        try:
+            await self.refresh()
+        finally:
+            with self._loops_lock:
+                self._background.pop(loop, None)
@@ -0,0 +1,289 @@
+from sqlalchemy import func
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import threading
+
+from ..models.database import BudgetAlert, DailyCostRollup
+
+TIME_PERIODS = ("daily", "weekly", "monthly")
+
+# Scope of a running total: ("project", name), ("user", email) or ("total", None)
+Scope = Tuple[str, Optional[str]]
+
+TOTAL_SCOPE: Scope = ("total", None)
+
+# One daily cost change: (usage_date, project_name, user_email, delta)
+CostDelta = Tuple[date, str, str, float]
+
+# Alerts saved up to this long before the last sync are read again, so one whose transaction
+# committed only after that sync, carrying an earlier updated_at, is still picked up
+ALERT_SYNC_OVERLAP = timedelta(minutes=5)
+
+def window_start(time_period: str, day: date) -> date:
+    """First day of the daily, weekly (Monday) or monthly window containing day"""
+    
+    if time_period == "daily":
+        return day
+    if time_period == "weekly":
+        return day - timedelta(days=day.weekday())
+    if time_period == "monthly":
+        return day.replace(day=1)
+    raise ValueError(f"Unsupported time period: {time_period}")
+
+def alert_scope(alert_type: str, project_name: Optional[str], user_email: Optional[str]) -> Optional[Scope]:
+    """Running-total scope an alert watches, or None for alert types without one"""
+    
+    if alert_type == "project" and project_name:
+        return ("project", project_name)
+    if alert_type == "user" and user_email:
+        return ("user", user_email)
+    if alert_type == "total":
+        return TOTAL_SCOPE
+    return None
+
+class AlertRule:
+    """An active BudgetAlert, detached from the session it was loaded in"""
+
+    __slots__ = ("alert_id", "name", "scope", "time_period", "limit", "last_triggered")
+
+    def __init__(self, alert: BudgetAlert):
+        self.alert_id = alert.id
+        self.name = alert.name
+        self.scope = alert_scope(alert.alert_type, alert.project_name, alert.user_email)
+        self.time_period = alert.time_period or "monthly"
+        self.last_triggered = alert.last_triggered
+        
+        # threshold_percentage fires early, at that share of the budget
+        self.limit = alert.threshold_amount
+        if alert.threshold_percentage:
+            self.limit = alert.threshold_amount * alert.threshold_percentage / 100
+
+class AlertIndex:
+    """Active alert rules keyed by (time_period, scope), so a cost change reaches only the alerts it can affect"""
+
+    def __init__(self):
+        self._by_id: Dict[int, AlertRule] = {}
+        self._by_key: Dict[Tuple[str, Scope], Dict[int, AlertRule]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def add(self, rule: AlertRule):
+        """Index a rule, replacing any earlier version of the same alert"""
+        
+        self.remove(rule.alert_id)
+        if rule.scope is None:
+            return
+        
+        self._by_id[rule.alert_id] = rule
+        self._by_key.setdefault((rule.time_period, rule.scope), {})[rule.alert_id] = rule
+
+    def remove(self, alert_id: int):
+        rule = self._by_id.pop(alert_id, None)
+        if rule is None:
+            return
+        
+        key = (rule.time_period, rule.scope)
+        rules = self._by_key.get(key)
+        if rules is not None:
+            rules.pop(alert_id, None)
+            if not rules:
+                del self._by_key[key]
+
+    def rules_for(self, key: Tuple[str, Scope]) -> Iterable[AlertRule]:
+        return self._by_key.get(key, {}).values()
+
+class BudgetAlertEvaluator:
+    """Running cost totals per scope and window, checked against active alerts as costs land"""
+
+    def __init__(self):
+        self.rules = AlertIndex()
+        self.on_trigger: Optional[Callable[[AlertRule, float], None]] = None
+        self.seeded = False
+        self._totals: Dict[Tuple[str, Scope], float] = defaultdict(float)
+        self._window_starts: Dict[str, date] = {}
+        self._rules_synced_through: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Drop the seeded state, e.g. when this worker becomes the reconciliation leader and another
+        leader may have moved the totals meanwhile; the next refresh seeds again"""
+        self.seeded = False
+
+    def refresh(self, db_session):
+        """Seed once, then only pick up alerts created or edited since the last call"""
+        
+        if self.seeded:
+            self.sync_rules(db_session)
+        else:
+            self.load(db_session)
+
+    def load(self, db_session, today: Optional[date] = None):
+        """Load active alerts and seed current-window totals from the daily rollups"""
+        
+        today = today or datetime.utcnow().date()
+        rules = AlertIndex()
+        synced_through = db_session.query(func.now()).scalar()
+        for alert in db_session.query(BudgetAlert).filter(BudgetAlert.is_active.is_(True)).all():
+            rules.add(AlertRule(alert))
+        
+        window_starts = {period: window_start(period, today) for period in TIME_PERIODS}
+        earliest = min(window_starts.values())
+        
+        totals = (
+            db_session.query(
+                DailyCostRollup.usage_date,
+                DailyCostRollup.project_name,
+                DailyCostRollup.user_email,
+                func.sum(DailyCostRollup.cost_amount)
+            )
+            .filter(DailyCostRollup.usage_date >= earliest, DailyCostRollup.usage_date <= today)
+            .group_by(DailyCostRollup.usage_date, DailyCostRollup.project_name, DailyCostRollup.user_email)
+            .all()
+        )
+        
+        with self._lock:
+            self.rules = rules
+            self._totals = defaultdict(float)
+            self._window_starts = window_starts
+            self._add_deltas(totals)
+            self._rules_synced_through = synced_through
+            self.seeded = True
+
+    def sync_rules(self, db_session) -> int:
+        """Update the index in place with alerts saved since the last load or sync; returns alerts read"""
+        
+        # Database time on both sides, so worker clocks do not matter
+        synced_through = db_session.query(func.now()).scalar()
+        alerts = db_session.query(BudgetAlert).filter(
+            BudgetAlert.updated_at >= self._rules_synced_through - ALERT_SYNC_OVERLAP
+        ).all()
+        for alert in alerts:
+            self.add_rule(alert)
+        self._rules_synced_through = synced_through
+        return len(alerts)
+
+    def add_rule(self, alert: BudgetAlert):
+        """Start watching a new or changed alert"""
+        
+        with self._lock:
+            if alert.is_active:
+                self.rules.add(AlertRule(alert))
+            else:
+                self.rules.remove(alert.id)
+
+    def current_amount(self, db_session, alert: BudgetAlert, today: Optional[date] = None) -> float:
+        """Spend so far in the alert's current window, read from the rollups so every worker agrees"""
+        
+        scope = alert_scope(alert.alert_type, alert.project_name, alert.user_email)
+        if scope is None:
+            return 0.0
+        
+        today = today or datetime.utcnow().date()
+        query = db_session.query(func.sum(DailyCostRollup.cost_amount)).filter(
+            DailyCostRollup.usage_date >= window_start(alert.time_period or "monthly", today),
+            DailyCostRollup.usage_date <= today
+        )
+        if scope[0] == "project":
+            query = query.filter(DailyCostRollup.project_name == scope[1])
+        elif scope[0] == "user":
+            query = query.filter(DailyCostRollup.user_email == scope[1])
+        return round(query.scalar() or 0.0, 2)
+
+    def apply(self, deltas: Iterable[CostDelta], today: Optional[date] = None) -> List[Tuple[AlertRule, float]]:
+        """Fold daily cost changes into the running totals; returns alerts that crossed their limit"""
+        
+        now = datetime.utcnow()
+        triggered = []
+        with self._lock:
+            self._roll_windows(today or now.date())
+            touched = self._add_deltas(deltas)
+            if not touched:
+                return []
+            
+            for key in touched:
+                amount = self._totals[key]
+                window = self._window_starts[key[0]]
+                
+                for rule in self.rules.rules_for(key):
+                    # Fire once per window, the first time the total reaches the limit
+                    if amount >= rule.limit and (rule.last_triggered is None or rule.last_triggered.date() < window):
+                        rule.last_triggered = now
+                        triggered.append((rule, amount))
+        
+        if self.on_trigger is not None:
+            for rule, amount in triggered:
+                self.on_trigger(rule, amount)
+        
+        return triggered
+
+    def _add_deltas(self, deltas: Iterable[CostDelta]) -> set:
+        """Add each change to every scope and window it belongs to, O(1) per change"""
+        
+        window_starts = self._window_starts
+        
+        # Windows a usage date falls into; late data for an earlier window cannot trigger an alert any more
+        current_periods: Dict[date, Tuple[str, ...]] = {}
+        
+        # Sum the batch per scope first so each row costs three dictionary updates
+        scope_sums: Dict[Tuple[Tuple[str, ...], Scope], float] = defaultdict(float)
+        for usage_date, project_name, user_email, delta in deltas:
+            if not delta:
+                continue
+            
+            periods = current_periods.get(usage_date)
+            if periods is None:
+                periods = tuple(
+                    period for period in TIME_PERIODS
+                    if window_start(period, usage_date) == window_starts[period]
+                )
+                current_periods[usage_date] = periods
+            if not periods:
+                continue
+            
+            scope_sums[(periods, ("project", project_name))] += delta
+            scope_sums[(periods, ("user", user_email))] += delta
+            scope_sums[(periods, TOTAL_SCOPE)] += delta
+        
+        touched = set()
+        totals = self._totals
+        for (periods, scope), delta in scope_sums.items():
+            for period in periods:
+                totals[(period, scope)] += delta
+                touched.add((period, scope))
+        
+        return touched
+
+    def _roll_windows(self, today: date):
+        """Start fresh totals for windows that have ended"""
+        
+        for period in TIME_PERIODS:
+            start = window_start(period, today)
+            if self._window_starts.get(period) != start:
+                self._window_starts[period] = start
+                for key in [key for key in self._totals if key[0] == period]:
+                    del self._totals[key]
+
+def cost_deltas(before: Dict[Tuple[date, str, str], float],
+                after: Dict[Tuple[date, str, str], float]) -> List[CostDelta]:
+    """Changes between two rollup_totals snapshots of the same days"""
+    
+    deltas = []
+    for key in set(before) | set(after):
+        delta = after.get(key, 0.0) - before.get(key, 0.0)
+        if delta:
+            usage_date, project_name, user_email = key
+            deltas.append((usage_date, project_name, user_email, delta))
+    return deltas
+
+def mark_triggered(db_session, triggered: List[Tuple[AlertRule, float]]):
+    """Persist last_triggered for alerts that just fired"""
+    
+    for rule, _ in triggered:
+        db_session.query(BudgetAlert).filter(BudgetAlert.id == rule.alert_id).update(
+            {BudgetAlert.last_triggered: rule.last_triggered}, synchronize_session=False
+        )
+
+# Shared evaluator for this process
+budget_alerts = BudgetAlertEvaluator()
@@ -0,0 +1,93 @@
+from sqlalchemy import literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Dict, List, Tuple
+
+from ..config.settings import settings
+from ..models.database import CostData
+
+# Natural key of a cost row: the Cost Management grouping dimensions that are stored as columns;
+# must match uq_cost_data_natural_key
+COST_DATA_KEY = ("resource_id", "usage_date", "sample_id", "service_name", "project_name", "user_email")
+
+# Columns refreshed when a row for an existing key is written again
+COST_DATA_UPDATE_COLUMNS = (
+    "genomics_job_id", "resource_type", "cost_amount", "currency", "billing_period", "azure_tags"
+)
+
+# Bind parameter limits per statement
+DIALECT_MAX_PARAMS = {
+    "postgresql": 65535,
+    "sqlite": 32766
+}
+
+def upsert_cost_data(db_session, rows: List[Dict], chunk_size: int = None) -> Dict[str, int]:
+    """Idempotently write cost rows in set-based chunks, keyed on the natural key"""
+    
+    dialect = db_session.get_bind().dialect.name
+    if dialect not in DIALECT_MAX_PARAMS:
+        raise ValueError(f"Bulk cost upsert is not supported on {dialect}")
+    
+    rows = _merge_duplicate_keys(rows)
+    if not rows:
+        return {"inserted": 0, "updated": 0}
+    
+    chunk_size = min(
+        chunk_size or settings.COST_UPSERT_CHUNK_SIZE,
+        DIALECT_MAX_PARAMS[dialect] // len(rows[0])
+    )
+    
+    inserted = 0
+    for offset in range(0, len(rows), chunk_size):
+        chunk = rows[offset:offset + chunk_size]
+        if dialect == "postgresql":
+            inserted += _upsert_postgresql(db_session, chunk)
+        else:
+            inserted += _upsert_sqlite(db_session, chunk)
+    
+    return {"inserted": inserted, "updated": len(rows) - inserted}
+
+def _merge_duplicate_keys(rows: List[Dict]) -> List[Dict]:
+    """One row per natural key with the costs summed; one statement cannot update the same row twice"""
+    
+    # Rows sharing a key differ only in grouping tags that are not stored, such as workflow_type,
+    # so together they are the key's cost
+    merged: Dict[Tuple, Dict] = {}
+    for row in rows:
+        key = tuple(row[column] for column in COST_DATA_KEY)
+        if key in merged:
+            merged[key] = {**row, "cost_amount": merged[key]["cost_amount"] + row["cost_amount"]}
+        else:
+            merged[key] = row
+    
+    return list(merged.values())
+
+def _upsert_postgresql(db_session, chunk: List[Dict]) -> int:
+    """INSERT ... ON CONFLICT DO UPDATE, counting inserts via xmax"""
+    
+    stmt = postgresql_insert(CostData).values(chunk)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_cost_data_natural_key",
+        set_={column: stmt.excluded[column] for column in COST_DATA_UPDATE_COLUMNS}
+    ).returning(literal_column("(xmax = 0)"))
+    
+    # xmax is 0 only for freshly inserted tuples
+    return sum(1 for (was_inserted,) in db_session.execute(stmt) if was_inserted)
+
+def _upsert_sqlite(db_session, chunk: List[Dict]) -> int:
+    """INSERT ... ON CONFLICT DO UPDATE, counting inserts from pre-existing keys"""
+    
+    key_columns = [getattr(CostData, column) for column in COST_DATA_KEY]
+    keys = [tuple(row[column] for column in COST_DATA_KEY) for row in chunk]
+    existing = db_session.execute(
+        select(*key_columns).where(tuple_(*key_columns).in_(keys))
+    ).all()
+    
+    stmt = sqlite_insert(CostData).values(chunk)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(COST_DATA_KEY),
+        set_={column: stmt.excluded[column] for column in COST_DATA_UPDATE_COLUMNS}
+    )
+    db_session.execute(stmt)
+    
+    return len(chunk) - len(existing)
@@ -0,0 +1,156 @@
+from sqlalchemy import func, insert
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from ..models.database import CostData, DailyCostRollup, DailyCostSeries, DailyJobCost, GenomicsJob
+
+# Trend categories for the resource types assigned by CostReconciliationService._extract_resource_type
+RESOURCE_TYPE_CATEGORIES = {
+    "Batch": "compute_cost",
+    "Compute": "compute_cost",
+    "Storage": "storage_cost",
+    "Network": "network_cost"
+}
+
+def refresh_daily_rollups(db_session, days: Iterable[date]) -> int:
+    """Recompute the daily rollup rows for the given usage dates from cost_data"""
+    
+    days = sorted(set(days))
+    if not days:
+        return 0
+    
+    billing_periods = [day.strftime("%Y-%m-%d") for day in days]
+    pipeline_type = func.coalesce(GenomicsJob.pipeline_type, "unknown")
+    
+    aggregates = (
+        db_session.query(
+            CostData.billing_period,
+            CostData.project_name,
+            CostData.user_email,
+            pipeline_type,
+            CostData.resource_type,
+            func.sum(CostData.cost_amount),
+            func.count(CostData.id)
+        )
+        .outerjoin(GenomicsJob, GenomicsJob.id == CostData.genomics_job_id)
+        .filter(
+            CostData.usage_date >= datetime.combine(days[0], time.min),
+            CostData.usage_date < datetime.combine(days[-1] + timedelta(days=1), time.min),
+            CostData.billing_period.in_(billing_periods)
+        )
+        .group_by(
+            CostData.billing_period,
+            CostData.project_name,
+            CostData.user_email,
+            pipeline_type,
+            CostData.resource_type
+        )
+        .all()
+    )
+    
+    # Days are rebuilt wholesale, so rows that moved or vanished drop out too
+    db_session.query(DailyCostRollup).filter(
+        DailyCostRollup.usage_date.in_(days)
+    ).delete(synchronize_session=False)
+    
+    refreshed_at = datetime.utcnow()
+    rows = [
+        {
+            "usage_date": datetime.strptime(billing_period, "%Y-%m-%d").date(),
+            "project_name": project_name,
+            "user_email": user_email,
+            "pipeline_type": pipeline,
+            "resource_type": resource_type,
+            "cost_amount": cost_amount or 0.0,
+            "record_count": record_count,
+            "refreshed_at": refreshed_at
+        }
+        for billing_period, project_name, user_email, pipeline, resource_type, cost_amount, record_count
+        in aggregates
+    ]
+    if rows:
+        db_session.execute(insert(DailyCostRollup), rows)
+    
+    _refresh_daily_series(db_session, days, rows, refreshed_at)
+    
+    return len(rows)
+
+def rollup_totals(db_session, days: Iterable[date]) -> Dict[Tuple[date, str, str], float]:
+    """Stored daily cost per (usage_date, project_name, user_email) for the given days"""
+    
+    days = sorted(set(days))
+    if not days:
+        return {}
+    
+    totals = (
+        db_session.query(
+            DailyCostRollup.usage_date,
+            DailyCostRollup.project_name,
+            DailyCostRollup.user_email,
+            func.sum(DailyCostRollup.cost_amount)
+        )
+        .filter(DailyCostRollup.usage_date.in_(days))
+        .group_by(DailyCostRollup.usage_date, DailyCostRollup.project_name, DailyCostRollup.user_email)
+        .all()
+    )
+    return {(usage_date, project_name, user_email): cost or 0.0 for usage_date, project_name, user_email, cost in totals}
+
+def _refresh_daily_series(db_session, days: List[date], rollup_rows: List[Dict], refreshed_at: datetime):
+    """Rebuild the per-day cost trend series and per-day job costs from freshly computed rollup rows"""
+    
+    job_costs = (
+        db_session.query(CostData.billing_period, CostData.genomics_job_id, func.sum(CostData.cost_amount))
+        .filter(
+            CostData.usage_date >= datetime.combine(days[0], time.min),
+            CostData.usage_date < datetime.combine(days[-1] + timedelta(days=1), time.min),
+            CostData.billing_period.in_([day.strftime("%Y-%m-%d") for day in days]),
+            CostData.genomics_job_id.isnot(None)
+        )
+        .group_by(CostData.billing_period, CostData.genomics_job_id)
+        .all()
+    )
+    job_cost_rows = [
+        {
+            "usage_date": datetime.strptime(billing_period, "%Y-%m-%d").date(),
+            "genomics_job_id": job_id,
+            "cost_amount": cost_amount or 0.0
+        }
+        for billing_period, job_id, cost_amount in job_costs
+    ]
+    job_counts: Dict[date, int] = {}
+    for row in job_cost_rows:
+        job_counts[row["usage_date"]] = job_counts.get(row["usage_date"], 0) + 1
+    
+    db_session.query(DailyJobCost).filter(
+        DailyJobCost.usage_date.in_(days)
+    ).delete(synchronize_session=False)
+    
+    if job_cost_rows:
+        db_session.execute(insert(DailyJobCost), job_cost_rows)
+    
+    series: Dict[date, Dict] = {}
+    for row in rollup_rows:
+        point = series.get(row["usage_date"])
+        if point is None:
+            point = {
+                "usage_date": row["usage_date"],
+                "total_cost": 0.0,
+                "compute_cost": 0.0,
+                "storage_cost": 0.0,
+                "network_cost": 0.0,
+                "other_cost": 0.0,
+                "job_count": job_counts.get(row["usage_date"], 0),
+                "refreshed_at": refreshed_at
+            }
+            series[row["usage_date"]] = point
+        
+        category = RESOURCE_TYPE_CATEGORIES.get(row["resource_type"], "other_cost")
+        point[category] += row["cost_amount"]
+        point["total_cost"] += row["cost_amount"]
+    
+    db_session.query(DailyCostSeries).filter(
+        DailyCostSeries.usage_date.in_(days)
+    ).delete(synchronize_session=False)
+    
+    if series:
+        db_session.execute(insert(DailyCostSeries), list(series.values()))
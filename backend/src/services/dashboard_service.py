@@ -0,0 +1,201 @@
+from sqlalchemy import distinct, func
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from ..models.database import BudgetAlert, DailyCostRollup, DailyCostSeries, DailyJobCost, GenomicsJob
+
+TREND_GRANULARITIES = ("daily", "weekly", "monthly")
+
+# Longest window, in days, served at each granularity when none is requested
+TREND_DAILY_MAX_DAYS = 90
+TREND_WEEKLY_MAX_DAYS = 730
+
+TREND_FIELDS = ("total_cost", "compute_cost", "storage_cost", "network_cost", "job_count")
+
+def _bucket_start(day: date, start: date, granularity: str) -> date:
+    """First day of the trend bucket holding day, clipped to the window start"""
+    
+    if granularity == "weekly":
+        return max(start, day - timedelta(days=day.weekday()))
+    if granularity == "monthly":
+        return max(start, day.replace(day=1))
+    return day
+
+class DashboardService:
+    """Dashboard aggregates served from daily cost rollups"""
+
+    def __init__(self, db_session):
+        self.db = db_session
+
+    def get_overview(self, today: Optional[date] = None, top_project_count: int = 3) -> Dict:
+        """Totals, month-over-month trend and top projects for the current month"""
+        
+        today = today or datetime.utcnow().date()
+        month_start = today.replace(day=1)
+        previous_month_start = (month_start - timedelta(days=1)).replace(day=1)
+        
+        # Compare against the same number of elapsed days in the previous month
+        previous_period_end = min(
+            previous_month_start + (today - month_start),
+            month_start - timedelta(days=1)
+        )
+        
+        total_this_month = self._sum_costs(month_start, today)
+        total_previous_period = self._sum_costs(previous_month_start, previous_period_end)
+        
+        if total_previous_period > 0:
+            cost_trend_percentage = (total_this_month - total_previous_period) / total_previous_period * 100
+        else:
+            cost_trend_percentage = 0.0
+        
+        month_start_at = datetime.combine(month_start, datetime.min.time())
+        samples_this_month = self.db.query(func.count(distinct(GenomicsJob.sample_id))).filter(
+            GenomicsJob.started_at >= month_start_at
+        ).scalar() or 0
+        
+        return {
+            "total_cost_this_month": round(total_this_month, 2),
+            "total_jobs_running": self._count_jobs("running"),
+            "total_jobs_completed": self._count_jobs("completed"),
+            "average_cost_per_sample": round(total_this_month / samples_this_month, 2) if samples_this_month else 0.0,
+            "cost_trend_percentage": round(cost_trend_percentage, 1),
+            "top_projects": self._top_projects(month_start, today, top_project_count),
+            "recent_alerts": self._recent_alerts()
+        }
+
+    def get_cost_snapshot(self, today: Optional[date] = None) -> Dict:
+        """Month-to-date cost and running job count pushed to live dashboards"""
+        
+        today = today or datetime.utcnow().date()
+        return {
+            "total_cost": round(self._sum_costs(today.replace(day=1), today), 2),
+            "active_jobs": self._count_jobs("running")
+        }
+
+    def get_cost_trends(self, days: int = 30, granularity: Optional[str] = None,
+                        today: Optional[date] = None) -> List[Dict]:
+        """Cost series for the last `days` days, downsampled for long ranges"""
+        
+        if granularity is None:
+            if days <= TREND_DAILY_MAX_DAYS:
+                granularity = "daily"
+            elif days <= TREND_WEEKLY_MAX_DAYS:
+                granularity = "weekly"
+            else:
+                granularity = "monthly"
+        if granularity not in TREND_GRANULARITIES:
+            raise ValueError(f"Unsupported granularity: {granularity}")
+        
+        today = today or datetime.utcnow().date()
+        start = today - timedelta(days=days - 1)
+        
+        points = {
+            point.usage_date: point
+            for point in self.db.query(DailyCostSeries).filter(
+                DailyCostSeries.usage_date >= start,
+                DailyCostSeries.usage_date <= today
+            )
+        }
+        
+        # Walk the window once so days without costs still appear as zeros
+        buckets: Dict[date, Dict] = {}
+        day = start
+        while day <= today:
+            bucket = buckets.setdefault(_bucket_start(day, start, granularity), dict.fromkeys(TREND_FIELDS, 0))
+            point = points.get(day)
+            if point:
+                for field in TREND_FIELDS:
+                    bucket[field] += getattr(point, field)
+            day += timedelta(days=1)
+        
+        # A job billed on several days of a week or month counts once there, so daily counts cannot be summed
+        if granularity != "daily":
+            bucket_jobs: Dict[date, Set[int]] = {bucket_start: set() for bucket_start in buckets}
+            for usage_date, job_id in self.db.query(DailyJobCost.usage_date, DailyJobCost.genomics_job_id).filter(
+                DailyJobCost.usage_date >= start,
+                DailyJobCost.usage_date <= today
+            ):
+                bucket_jobs[_bucket_start(usage_date, start, granularity)].add(job_id)
+            for bucket_start, job_ids in bucket_jobs.items():
+                buckets[bucket_start]["job_count"] = len(job_ids)
+        
+        return [
+            {
+                "date": bucket_start.strftime("%Y-%m-%d"),
+                "total_cost": round(bucket["total_cost"], 2),
+                "compute_cost": round(bucket["compute_cost"], 2),
+                "storage_cost": round(bucket["storage_cost"], 2),
+                "network_cost": round(bucket["network_cost"], 2),
+                "job_count": bucket["job_count"]
+            }
+            for bucket_start, bucket in buckets.items()
+        ]
+
+    def _sum_costs(self, start: date, end: date) -> float:
+        """Total cost over an inclusive range of usage dates"""
+        
+        if end < start:
+            return 0.0
+        
+        total = self.db.query(func.sum(DailyCostRollup.cost_amount)).filter(
+            DailyCostRollup.usage_date >= start,
+            DailyCostRollup.usage_date <= end
+        ).scalar()
+        return total or 0.0
+
+    def _count_jobs(self, status: str) -> int:
+        """Number of jobs currently in a status"""
+        return self.db.query(func.count(GenomicsJob.id)).filter(GenomicsJob.status == status).scalar() or 0
+
+    def _top_projects(self, start: date, end: date, limit: int) -> List[Dict]:
+        """Most expensive projects over a date range with their sample counts"""
+        
+        project_cost = func.sum(DailyCostRollup.cost_amount)
+        top_projects = (
+            self.db.query(DailyCostRollup.project_name, project_cost)
+            .filter(DailyCostRollup.usage_date >= start, DailyCostRollup.usage_date <= end)
+            .group_by(DailyCostRollup.project_name)
+            .order_by(project_cost.desc())
+            .limit(limit)
+            .all()
+        )
+        if not top_projects:
+            return []
+        
+        project_names = [name for name, _ in top_projects]
+        samples = dict(
+            self.db.query(GenomicsJob.project_name, func.count(distinct(GenomicsJob.sample_id)))
+            .filter(
+                GenomicsJob.project_name.in_(project_names),
+                GenomicsJob.started_at >= datetime.combine(start, datetime.min.time())
+            )
+            .group_by(GenomicsJob.project_name)
+            .all()
+        )
+        
+        return [
+            {"name": name, "cost": round(cost or 0.0, 2), "samples": samples.get(name, 0)}
+            for name, cost in top_projects
+        ]
+
+    def _recent_alerts(self, limit: int = 5) -> List[Dict]:
+        """Most recently triggered budget alerts"""
+        
+        alerts = (
+            self.db.query(BudgetAlert)
+            .filter(BudgetAlert.last_triggered.isnot(None))
+            .order_by(BudgetAlert.last_triggered.desc())
+            .limit(limit)
+            .all()
+        )
+        
+        return [
+            {
+                "id": alert.id,
+                "type": "budget_exceeded",
+                "message": f"{alert.name} reached its {alert.time_period} threshold of ${alert.threshold_amount:,.2f}",
+                "timestamp": alert.last_triggered.isoformat() + "Z",
+                "severity": "warning"
+            }
+            for alert in alerts
+        ]
@@ -0,0 +1,77 @@
+from sqlalchemy import func, select, tuple_
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import base64
+import binascii
+import json
+
+from ..models.database import GenomicsJob
+
+MAX_JOBS_PAGE_SIZE = 200
+
+class JobService:
+    """Job listing with keyset pagination over (started_at, id)"""
+
+    def __init__(self, db_session):
+        self.db = db_session
+
+    def list_jobs(self, status: Optional[str] = None, project: Optional[str] = None,
+                  user: Optional[str] = None, pipeline_type: Optional[str] = None,
+                  started_after: Optional[datetime] = None, started_before: Optional[datetime] = None,
+                  cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[GenomicsJob], Optional[str]]:
+        """Return one page of jobs, newest first, and the cursor for the next page"""
+        
+        limit = max(1, min(limit, MAX_JOBS_PAGE_SIZE))
+        query = self.db.query(GenomicsJob)
+        
+        # Filters are pushed down to SQL so only one page is ever loaded
+        if status:
+            query = query.filter(GenomicsJob.status == status)
+        if project:
+            query = query.filter(GenomicsJob.project_name == project)
+        if user:
+            query = query.filter(GenomicsJob.user_email == user)
+        if pipeline_type:
+            query = query.filter(GenomicsJob.pipeline_type == pipeline_type)
+        if started_after:
+            query = query.filter(GenomicsJob.started_at >= started_after)
+        if started_before:
+            query = query.filter(GenomicsJob.started_at < started_before)
+        
+        if cursor:
+            started_at, job_pk = decode_job_cursor(cursor)
+            # Compare against the stored value: SQLite keeps func.now() text without microseconds,
+            # which never equals the bound datetime, so the page would not advance
+            anchor = select(GenomicsJob.started_at).where(GenomicsJob.id == job_pk).scalar_subquery()
+            query = query.filter(
+                tuple_(GenomicsJob.started_at, GenomicsJob.id) < tuple_(func.coalesce(anchor, started_at), job_pk)
+            )
+        
+        jobs = (
+            query.order_by(GenomicsJob.started_at.desc(), GenomicsJob.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+        
+        next_cursor = None
+        if len(jobs) > limit:
+            jobs = jobs[:limit]
+            next_cursor = encode_job_cursor(jobs[-1])
+        
+        return jobs, next_cursor
+
+def encode_job_cursor(job: GenomicsJob) -> str:
+    """Opaque cursor pointing just past a job in (started_at, id) order"""
+    
+    payload = json.dumps({"s": job.started_at.isoformat(), "i": job.id})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_job_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor from encode_job_cursor, raising ValueError if it is malformed"""
+    
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload: Dict = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["s"]), int(payload["i"])
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
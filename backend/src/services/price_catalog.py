@@ -0,0 +1,199 @@
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import csv
+import json
+import os
+import sys
+import threading
+
+from ..config.settings import settings
+
+DEDICATED = "dedicated"
+LOW_PRIORITY = "low_priority"
+SPOT = "spot"
+
+# Simplified pricing model used when no Retail Prices export has been loaded: East US Linux
+# pay-as-you-go rates, applied in every region; covers the pools in config/nextflow.config
+VM_PRICING_PER_HOUR = {
+    "Standard_B4ms": 0.166,
+    "Standard_D2s_v3": 0.096,
+    "Standard_D4s_v3": 0.192,
+    "Standard_D8s_v3": 0.384,
+    "Standard_D16s_v3": 0.768,
+    "Standard_E16s_v3": 1.008,
+    "Standard_F4s_v2": 0.169,
+    "Standard_F8s_v2": 0.338,
+    "Standard_F16s_v2": 0.676
+}
+DEFAULT_VM_COST_PER_HOUR = 0.096  # Standard_D2s_v3
+LOW_PRIORITY_COST_FACTOR = 0.2  # Low-priority is ~80% cheaper
+
+# Region key for prices that apply everywhere (the built-in table)
+ANY_REGION = "*"
+
+PriceKey = Tuple[str, str, str]
+
+class PriceCatalog:
+    """Hourly VM prices indexed by (sku, region, priority)"""
+
+    def __init__(self, prices: Dict[PriceKey, float], version: str, loaded_at: Optional[datetime] = None):
+        self.prices = prices
+        self.version = version
+        self.loaded_at = loaded_at or datetime.utcnow()
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def price(self, sku: str, region: str, priority: str = DEDICATED) -> Optional[float]:
+        """Hourly price for a VM size in a region, or None if the catalog cannot price it"""
+        
+        sku, region = _normalize(sku), _normalize_region(region)
+        prices = self.prices
+        
+        for candidate_region in (region, ANY_REGION):
+            price = prices.get((sku, candidate_region, priority))
+            if price is not None:
+                return price
+            
+            # Batch low-priority nodes are billed as spot capacity and vice versa
+            if priority != DEDICATED:
+                other = SPOT if priority == LOW_PRIORITY else LOW_PRIORITY
+                price = prices.get((sku, candidate_region, other))
+                if price is not None:
+                    return price
+            
+            dedicated = prices.get((sku, candidate_region, DEDICATED))
+            if dedicated is not None:
+                return dedicated if priority == DEDICATED else dedicated * LOW_PRIORITY_COST_FACTOR
+        
+        return None
+
+    @classmethod
+    def builtin(cls) -> "PriceCatalog":
+        """Catalog of the simplified pricing model, valid in every region"""
+        
+        prices = {(_normalize(sku), ANY_REGION, DEDICATED): price for sku, price in VM_PRICING_PER_HOUR.items()}
+        return cls(prices, version="builtin")
+
+    @classmethod
+    def from_retail_prices(cls, items: Iterable[Dict], version: str) -> "PriceCatalog":
+        """Index Azure Retail Prices API items, keeping Linux pay-as-you-go hourly VM meters"""
+        
+        prices: Dict[PriceKey, float] = {}
+        for item in items:
+            key = _retail_price_key(item)
+            if key is None:
+                continue
+            
+            price = float(item.get("retailPrice", item.get("unitPrice", 0.0)))
+            # Several meters can map to one key; the cheapest is what Batch bills
+            if key not in prices or price < prices[key]:
+                prices[key] = price
+        
+        return cls(prices, version=version)
+
+class PriceCatalogStore:
+    """Versioned catalog snapshots: one directory of Retail Prices exports per version"""
+
+    def __init__(self, directory: str, pinned_version: Optional[str] = None):
+        self.directory = directory
+        self.pinned_version = pinned_version or None
+        self._catalog: Optional[PriceCatalog] = None
+        self._lock = threading.Lock()
+
+    def versions(self) -> List[str]:
+        """Snapshot versions on disk, oldest first (names sort chronologically, e.g. 2026-10-01)"""
+        
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if os.path.isdir(os.path.join(self.directory, name))
+        )
+
+    def current(self) -> PriceCatalog:
+        """The active catalog, loading the pinned or latest snapshot on first use"""
+        
+        catalog = self._catalog
+        if catalog is None:
+            with self._lock:
+                if self._catalog is None:
+                    self._catalog = self._load(self.pinned_version)
+                catalog = self._catalog
+        return catalog
+
+    def activate(self, version: Optional[str] = None) -> PriceCatalog:
+        """Load a snapshot (latest if version is None) and swap it in atomically"""
+        
+        catalog = self._load(version)
+        with self._lock:
+            self._catalog = catalog
+        return catalog
+
+    def _load(self, version: Optional[str]) -> PriceCatalog:
+        versions = self.versions()
+        if version is None:
+            if not versions:
+                return PriceCatalog.builtin()
+            version = versions[-1]
+        elif version not in versions:
+            raise ValueError(f"Price catalog snapshot {version} not found in {self.directory}")
+        
+        snapshot_dir = os.path.join(self.directory, version)
+        paths = sorted(
+            os.path.join(snapshot_dir, name) for name in os.listdir(snapshot_dir)
+            if name.endswith((".json", ".csv"))
+        )
+        catalog = PriceCatalog.from_retail_prices(_read_exports(paths), version=version)
+        print(f"Loaded price catalog {version}: {len(catalog)} prices from {len(paths)} files")
+        return catalog
+
+def _normalize(value: str) -> str:
+    return sys.intern((value or "").strip().lower())
+
+def _normalize_region(region: str) -> str:
+    # "East US" (display name) and "eastus" (ARM name) are the same region
+    return _normalize((region or "").replace(" ", ""))
+
+def _retail_price_key(item: Dict) -> Optional[PriceKey]:
+    """(sku, region, priority) for a Linux consumption VM meter billed per hour, else None"""
+    
+    if item.get("serviceName", "Virtual Machines") != "Virtual Machines":
+        return None
+    if item.get("type", "Consumption") != "Consumption" or item.get("unitOfMeasure", "1 Hour") != "1 Hour":
+        return None
+    if "Windows" in item.get("productName", ""):
+        return None
+    
+    sku = item.get("armSkuName")
+    region = item.get("armRegionName")
+    if not sku or not region:
+        return None
+    
+    meter = f"{item.get('skuName', '')} {item.get('meterName', '')}"
+    if "Spot" in meter:
+        priority = SPOT
+    elif "Low Priority" in meter:
+        priority = LOW_PRIORITY
+    else:
+        priority = DEDICATED
+    
+    return _normalize(sku), _normalize_region(region), priority
+
+def _read_exports(paths: Iterable[str]) -> Iterator[Dict]:
+    """Items from Retail Prices API pages ({"Items": [...]}) or CSV exports of the same fields"""
+    
+    for path in paths:
+        with open(path, newline="") as export:
+            if path.endswith(".csv"):
+                yield from csv.DictReader(export)
+            else:
+                payload = json.load(export)
+                yield from payload.get("Items", []) if isinstance(payload, dict) else payload
+
+# Shared catalog for this process
+price_catalogs = PriceCatalogStore(settings.PRICE_CATALOG_DIR, settings.PRICE_CATALOG_VERSION)
+
+def get_price_catalog() -> PriceCatalog:
+    """Get the active VM price catalog"""
+    return price_catalogs.current()
@@ -0,0 +1,298 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import asyncio
+import os
+import socket
+import time
+import uuid
+
+from sqlalchemy import case, func, or_
+from sqlalchemy.exc import IntegrityError
+
+from ..config.settings import settings
+from ..models.database import AzureConnection, GenomicsJob, SchedulerLease, SessionLocal, engine
+from .azure_client_pool import get_azure_service
+from .azure_cost_service import CostReconciliationService
+
+# Lease shared by every worker and replica; only its holder reconciles
+LEASE_NAME = "cost_reconciliation"
+
+def acquire_lease(db_session, name: str, holder: str, lease_seconds: float) -> bool:
+    """Take a free or expired lease, or renew our own; True while holder is the leader"""
+    
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=lease_seconds)
+    
+    # One conditional UPDATE, so two workers racing for an expired lease cannot both win it
+    renewed = db_session.query(SchedulerLease).filter(
+        SchedulerLease.name == name,
+        or_(SchedulerLease.holder == holder, SchedulerLease.expires_at < now)
+    ).update({
+        SchedulerLease.acquired_at: case((SchedulerLease.holder == holder, SchedulerLease.acquired_at), else_=now),
+        SchedulerLease.holder: holder,
+        SchedulerLease.expires_at: expires_at
+    }, synchronize_session=False)
+    if renewed:
+        db_session.commit()
+        return True
+    
+    try:
+        db_session.add(SchedulerLease(name=name, holder=holder, acquired_at=now, expires_at=expires_at))
+        db_session.commit()
+        return True
+    except IntegrityError:
+        # Someone else holds it
+        db_session.rollback()
+        return False
+
+def release_lease(db_session, name: str, holder: str):
+    """Give the lease up so another worker can take over without waiting for it to expire"""
+    
+    db_session.query(SchedulerLease).filter(
+        SchedulerLease.name == name,
+        SchedulerLease.holder == holder
+    ).delete(synchronize_session=False)
+    db_session.commit()
+
+def due_jobs_query(db_session, billing_delay_hours: float, retry_hours: float):
+    """Completed jobs past the billing delay whose costs are not finalized and not reconciled recently"""
+    
+    now = datetime.utcnow()
+    
+    # Jobs of organizations without an active connection cannot be reconciled and are not queued
+    connected = db_session.query(AzureConnection.organization_id).filter(AzureConnection.is_active.is_(True))
+    return db_session.query(GenomicsJob).filter(
+        GenomicsJob.status == "completed",
+        GenomicsJob.completed_at.isnot(None),
+        GenomicsJob.completed_at <= now - timedelta(hours=billing_delay_hours),
+        GenomicsJob.cost_finalized_at.is_(None),
+        or_(
+            GenomicsJob.cost_last_updated.is_(None),
+            GenomicsJob.cost_last_updated <= now - timedelta(hours=retry_hours)
+        ),
+        GenomicsJob.organization_id.in_(connected)
+    )
+
+class ReconciliationScheduler:
+    """Reconciles due jobs in prioritized batches with bounded concurrency on whichever worker holds the lease"""
+
+    def __init__(self, interval_seconds: float, billing_delay_hours: float, retry_hours: float,
+                 batch_size: int, max_concurrency: int, max_jobs_per_run: int, lease_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.billing_delay_hours = billing_delay_hours
+        self.retry_hours = retry_hours
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_jobs_per_run = max_jobs_per_run
+        self.lease_seconds = lease_seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.on_reconciled: Optional[Callable[[], None]] = None
+        self.on_leader_elected: Optional[Callable[[], None]] = None
+        self.is_leader = False
+        self.last_run_at: Optional[datetime] = None
+        self.last_run_jobs = 0
+        self.last_run_failed = 0
+        self.last_error: Optional[str] = None
+        self._renewed_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.is_leader:
+            self.is_leader = False
+            await asyncio.get_running_loop().run_in_executor(None, self._release)
+
+    async def run_once(self) -> int:
+        """Reconcile the due jobs if this worker is the leader; returns jobs reconciled"""
+        
+        loop = asyncio.get_running_loop()
+        if not await self._renew(force=True):
+            return 0
+        
+        batches = await loop.run_in_executor(None, self._plan_batches)
+        
+        # Batches of one resource group share its watermark, so they run one after another;
+        # SQLite allows a single writer, so there batches never overlap at all
+        max_concurrency = 1 if engine.dialect.name == "sqlite" else self.max_concurrency
+        semaphore = asyncio.Semaphore(max_concurrency)
+        scope_locks: Dict[Tuple[int, Optional[str]], asyncio.Lock] = defaultdict(asyncio.Lock)
+
+        async def run_batch(connection: AzureConnection, resource_group: Optional[str], job_ids: List[int]):
+            async with scope_locks[(connection.id, resource_group)], semaphore:
+                if not await self._renew():
+                    return 0, 0
+                try:
+                    # Reconciliation does its session work synchronously, so each batch gets a worker thread
+                    results = await loop.run_in_executor(None, self._reconcile_batch, connection, job_ids)
+                    reconciled = sum(1 for result in results.values() if result.get("status") == "reconciled")
+                    return reconciled, len(results) - reconciled
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"Error reconciling {len(job_ids)} jobs in {resource_group}: {e}")
+                    return 0, len(job_ids)
+        
+        # Batches are created in priority order and the semaphore admits them in that order
+        outcomes = await asyncio.gather(*(run_batch(*batch) for batch in batches))
+        
+        self.last_run_at = datetime.utcnow()
+        self.last_run_jobs = sum(reconciled for reconciled, _ in outcomes)
+        self.last_run_failed = sum(failed for _, failed in outcomes)
+        if self.last_run_jobs and self.on_reconciled is not None:
+            self.on_reconciled()
+        return self.last_run_jobs
+
+    def status(self) -> Dict:
+        """Queue depth and lag from the database, so every worker reports the same queue"""
+        
+        db = SessionLocal()
+        try:
+            due = due_jobs_query(db, self.billing_delay_hours, self.retry_hours)
+            queue_depth, never_reconciled, oldest_completed, oldest_attempt = due.with_entities(
+                func.count(GenomicsJob.id),
+                func.count(GenomicsJob.id) - func.count(GenomicsJob.cost_last_updated),
+                func.min(case((GenomicsJob.cost_last_updated.is_(None), GenomicsJob.completed_at))),
+                func.min(GenomicsJob.cost_last_updated)
+            ).one()
+            lease = db.query(SchedulerLease).filter(SchedulerLease.name == LEASE_NAME).first()
+        finally:
+            db.close()
+        
+        # Lag: how long the longest-waiting job has been due
+        now = datetime.utcnow()
+        due_since = []
+        if oldest_completed is not None:
+            due_since.append(oldest_completed + timedelta(hours=self.billing_delay_hours))
+        if oldest_attempt is not None:
+            due_since.append(oldest_attempt + timedelta(hours=self.retry_hours))
+        lag_seconds = max((now - min(due_since)).total_seconds(), 0.0) if due_since else 0.0
+        
+        leader = lease.holder if lease is not None and lease.expires_at >= now else None
+        return {
+            "leader": leader,
+            "is_leader": leader == self.holder,
+            "lease_expires_at": lease.expires_at.isoformat() + "Z" if leader else None,
+            "queue_depth": queue_depth,
+            "never_reconciled": never_reconciled,
+            "lag_seconds": round(lag_seconds, 1),
+            # Run figures are this worker's own and only move on the leader
+            "last_run_at": self.last_run_at.isoformat() + "Z" if self.last_run_at else None,
+            "last_run_jobs": self.last_run_jobs,
+            "last_run_failed": self.last_run_failed,
+            "last_error": self.last_error
+        }
+
+    async def _renew(self, force: bool = False) -> bool:
+        # Renewed at the start of every run and, during a long run, whenever a third of the lease has passed
+        if not force and self.is_leader and time.monotonic() - self._renewed_at < self.lease_seconds / 3:
+            return True
+        
+        was_leader = self.is_leader
+        self.is_leader = await asyncio.get_running_loop().run_in_executor(None, self._acquire)
+        if self.is_leader:
+            self._renewed_at = time.monotonic()
+            # State kept only by the leader may have moved on under another holder meanwhile
+            if not was_leader and self.on_leader_elected is not None:
+                self.on_leader_elected()
+        return self.is_leader
+
+    def _acquire(self) -> bool:
+        db = SessionLocal()
+        try:
+            return acquire_lease(db, LEASE_NAME, self.holder, self.lease_seconds)
+        finally:
+            db.close()
+
+    def _release(self):
+        db = SessionLocal()
+        try:
+            release_lease(db, LEASE_NAME, self.holder)
+        finally:
+            db.close()
+
+    def _plan_batches(self) -> List[Tuple[AzureConnection, Optional[str], List[int]]]:
+        """Split the due jobs into batches per connection and resource group, most urgent first"""
+        
+        db = SessionLocal()
+        try:
+            # Never-reconciled jobs first, then the longest finished
+            due = due_jobs_query(db, self.billing_delay_hours, self.retry_hours).with_entities(
+                GenomicsJob.id, GenomicsJob.organization_id, GenomicsJob.azure_resource_group
+            ).order_by(
+                GenomicsJob.cost_last_updated.isnot(None),
+                GenomicsJob.completed_at
+            ).limit(self.max_jobs_per_run).all()
+            
+            connections: Dict[int, AzureConnection] = {}
+            organization_ids = {organization_id for _, organization_id, _ in due}
+            if organization_ids:
+                for connection in db.query(AzureConnection).filter(
+                    AzureConnection.organization_id.in_(organization_ids),
+                    AzureConnection.is_active.is_(True)
+                ).all():
+                    connections.setdefault(connection.organization_id, connection)
+            db.expunge_all()
+        finally:
+            db.close()
+        
+        batches: List[Tuple[AzureConnection, Optional[str], List[int]]] = []
+        open_batches: Dict[Tuple[int, Optional[str]], List[int]] = {}
+        for job_id, organization_id, resource_group in due:
+            connection = connections.get(organization_id)
+            if connection is None:
+                continue
+            key = (connection.id, resource_group)
+            batch = open_batches.get(key)
+            if batch is None or len(batch) >= self.batch_size:
+                batch = open_batches[key] = []
+                batches.append((connection, resource_group, batch))
+            batch.append(job_id)
+        return batches
+
+    def _reconcile_batch(self, connection: AzureConnection, job_ids: List[int]) -> Dict[str, Dict]:
+        """Reconcile one batch in its own session and event loop, off the server's loop"""
+        
+        return asyncio.run(self._reconcile_batch_async(connection, job_ids))
+
+    async def _reconcile_batch_async(self, connection: AzureConnection, job_ids: List[int]) -> Dict[str, Dict]:
+        db = SessionLocal()
+        try:
+            # Another pass or an API call may have finalized some of them meanwhile
+            jobs = db.query(GenomicsJob).filter(
+                GenomicsJob.id.in_(job_ids),
+                GenomicsJob.cost_finalized_at.is_(None)
+            ).all()
+            if not jobs:
+                return {}
+            return await CostReconciliationService(get_azure_service(connection)).reconcile_jobs(jobs, db)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error in cost reconciliation: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+# Shared scheduler for this process; it only does work while holding the lease
+reconciliation_scheduler = ReconciliationScheduler(
+    interval_seconds=settings.RECONCILIATION_INTERVAL_SECONDS,
+    billing_delay_hours=settings.RECONCILIATION_BILLING_DELAY_HOURS,
+    retry_hours=settings.RECONCILIATION_RETRY_HOURS,
+    batch_size=settings.RECONCILIATION_BATCH_SIZE,
+    max_concurrency=settings.RECONCILIATION_MAX_CONCURRENCY,
+    max_jobs_per_run=settings.RECONCILIATION_MAX_JOBS_PER_RUN,
+    lease_seconds=settings.RECONCILIATION_LEASE_SECONDS
+)
@@ -0,0 +1,142 @@
+from azure.core.exceptions import HttpResponseError
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+import asyncio
+import time
+
+# Response headers Azure Resource Manager uses to report the remaining write budget
+REMAINING_WRITES_HEADERS = (
+    "x-ms-ratelimit-remaining-subscription-writes",
+    "x-ms-ratelimit-remaining-subscription-resource-requests"
+)
+
+# Fallback pause after a 429 without Retry-After
+DEFAULT_RETRY_AFTER_SECONDS = 5.0
+
+# After a 429 the rate halves; each accepted write wins back this share of the configured rate
+RATE_RECOVERY_FRACTION = 0.05
+
+class TokenBucket:
+    """Async token bucket for ARM writes that also honours Retry-After and remaining-write headers"""
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.max_rate_per_second = rate_per_second
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a write may be sent"""
+        
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate_per_second)
+
+    def pause(self, seconds: float):
+        """Stop all writes for a while after Azure answered 429, then resume at half the rate"""
+        
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+        self.rate_per_second = max(self.rate_per_second / 2, self.max_rate_per_second * RATE_RECOVERY_FRACTION)
+
+    def observe(self, headers: Dict[str, str]):
+        """Record an accepted write: recover the rate and never hold more tokens than Azure says are left"""
+        
+        self.rate_per_second = min(
+            self.rate_per_second + self.max_rate_per_second * RATE_RECOVERY_FRACTION, self.max_rate_per_second
+        )
+        for name in REMAINING_WRITES_HEADERS:
+            remaining = headers.get(name)
+            if remaining is not None and remaining.isdigit():
+                self._tokens = min(self._tokens, float(remaining))
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+class TagResult:
+    """Outcome of tagging one resource"""
+
+    __slots__ = ("resource_id", "status", "changed_tags", "attempts", "error")
+
+    def __init__(self, resource_id: str, status: str, changed_tags: Optional[Dict[str, str]] = None,
+                 attempts: int = 0, error: Optional[str] = None):
+        self.resource_id = resource_id
+        self.status = status  # updated, unchanged, failed
+        self.changed_tags = changed_tags or {}
+        self.attempts = attempts
+        self.error = error
+
+    def to_dict(self) -> Dict:
+        return {
+            "resource_id": self.resource_id,
+            "status": self.status,
+            "changed_tags": self.changed_tags,
+            "attempts": self.attempts,
+            "error": self.error
+        }
+
+def tag_changes(existing: Optional[Dict[str, str]], desired: Dict[str, str]) -> Dict[str, str]:
+    """Desired tags whose value differs from what the resource already carries"""
+    
+    existing = existing or {}
+    return {name: value for name, value in desired.items() if existing.get(name) != value}
+
+def retry_after_seconds(error: HttpResponseError) -> float:
+    headers = error.response.headers if error.response is not None else {}
+    try:
+        return float(headers.get("Retry-After", DEFAULT_RETRY_AFTER_SECONDS))
+    except ValueError:
+        return DEFAULT_RETRY_AFTER_SECONDS
+
+class ResourceTagger:
+    """Merges tags onto resources concurrently, skipping resources whose tags already match"""
+
+    def __init__(self, tags_client, call: Callable[..., Awaitable], limiter: TokenBucket, max_retries: int):
+        self.tags_client = tags_client
+        self.call = call
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    async def tag_resources(self, resources: Iterable, desired: Dict[str, str]) -> List[TagResult]:
+        """Tag every resource; concurrency is bounded by call, the write rate by the limiter"""
+        
+        return await asyncio.gather(*(self._tag_resource(resource, desired) for resource in resources))
+
+    async def _tag_resource(self, resource, desired: Dict[str, str]) -> TagResult:
+        changes = tag_changes(resource.tags, desired)
+        if not changes:
+            return TagResult(resource.id, "unchanged")
+        
+        attempts = 0
+        while True:
+            attempts += 1
+            await self.limiter.acquire()
+            try:
+                # PATCH .../providers/Microsoft.Resources/tags/default merges, leaving other tags alone
+                headers = await self.call(
+                    self.tags_client.update_at_scope,
+                    scope=resource.id,
+                    parameters={"operation": "Merge", "properties": {"tags": changes}},
+                    cls=lambda pipeline_response, deserialized, response_headers: pipeline_response.http_response.headers
+                )
+                self.limiter.observe(headers or {})
+                return TagResult(resource.id, "updated", changes, attempts)
+            except HttpResponseError as e:
+                if e.status_code == 429 and attempts <= self.max_retries:
+                    self.limiter.pause(retry_after_seconds(e))
+                    continue
+                return TagResult(resource.id, "failed", changes, attempts, str(e.message or e))
+            except Exception as e:
+                return TagResult(resource.id, "failed", changes, attempts, str(e))
@@ -0,0 +1,238 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import math
+import os
+import threading
+import numpy as np
+
+from ..config.settings import settings
+from ..models.database import GenomicsJob
+
+# Fixed leading features: intercept, log input size, whether an input size was known
+BIAS, LOG_INPUT_GB, HAS_INPUT_SIZE = 0, 1, 2
+NUMERIC_FEATURES = 3
+
+# Ridge penalty on categorical weights; keeps rare workflows close to their pipeline's mean
+RIDGE_PENALTY = 1.0
+
+# Log-space spread assumed while there are too few runs to measure it
+DEFAULT_LOG_SIGMA = 0.5
+
+# z-score of the two-sided 90% prediction interval
+INTERVAL_Z = 1.645
+
+# (pipeline_type, workflow_name, vm_size, input_gb)
+RuntimeFeatures = Tuple[str, str, str, Optional[float]]
+
+class RuntimePrediction:
+    """Predicted runtime with a 90% interval, in hours"""
+    
+    __slots__ = ("hours", "lower_hours", "upper_hours", "sample_count")
+
+    def __init__(self, hours: float, lower_hours: float, upper_hours: float, sample_count: int):
+        self.hours = hours
+        self.lower_hours = lower_hours
+        self.upper_hours = upper_hours
+        self.sample_count = sample_count
+
+    def to_dict(self) -> Dict:
+        return {
+            "hours": round(self.hours, 2),
+            "lower_hours": round(self.lower_hours, 2),
+            "upper_hours": round(self.upper_hours, 2),
+            "sample_count": self.sample_count
+        }
+
+class RuntimePredictor:
+    """Log-linear ridge regression over job metadata, kept as X'X, X'y, y'y and n so new runs fold in exactly"""
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.xtx = np.zeros((NUMERIC_FEATURES, NUMERIC_FEATURES))
+        self.xty = np.zeros(NUMERIC_FEATURES)
+        self.yty = 0.0
+        self.sample_count = 0
+        self.weights: Optional[np.ndarray] = None
+        self.log_sigma = DEFAULT_LOG_SIGMA
+        # (vocabulary, weights, log_sigma, sample_count) of the last solve, replaced in one assignment so
+        # predict() never pairs a vocabulary grown by a concurrent update() with older, shorter weights
+        self._fitted: Optional[Tuple[Dict[str, int], np.ndarray, float, int]] = None
+
+    def predict(self, features: RuntimeFeatures) -> Optional[RuntimePrediction]:
+        """Runtime for one job, or None until the model has seen enough runs"""
+        
+        fitted = self._fitted
+        if fitted is None:
+            return None
+        vocabulary, weights, log_sigma, sample_count = fitted
+        
+        pipeline_type, workflow_name, vm_size, input_gb = features
+        log_hours = weights[BIAS]
+        if input_gb is not None:
+            log_hours += weights[LOG_INPUT_GB] * math.log1p(input_gb) + weights[HAS_INPUT_SIZE]
+        
+        # Categories never seen in training contribute nothing
+        for key in (f"pipeline:{pipeline_type}", f"workflow:{workflow_name}", f"vm:{vm_size}"):
+            index = vocabulary.get(key)
+            if index is not None:
+                log_hours += weights[index]
+        
+        spread = INTERVAL_Z * log_sigma
+        return RuntimePrediction(
+            math.exp(log_hours), math.exp(log_hours - spread), math.exp(log_hours + spread), sample_count
+        )
+
+    def update(self, samples: Iterable[Tuple[RuntimeFeatures, float]]) -> int:
+        """Fold (features, actual hours) pairs into the statistics and re-solve; returns runs added"""
+        
+        samples = [(features, hours) for features, hours in samples if hours and hours > 0]
+        if not samples:
+            return 0
+        
+        rows = [self._feature_indexes(features) for features, _ in samples]
+        self._grow(len(self.vocabulary) + NUMERIC_FEATURES)
+        
+        x = np.zeros((len(samples), self.xtx.shape[0]))
+        for row, (((_, _, _, input_gb), _), indexes) in enumerate(zip(samples, rows)):
+            x[row, BIAS] = 1.0
+            if input_gb is not None:
+                x[row, LOG_INPUT_GB] = math.log1p(input_gb)
+                x[row, HAS_INPUT_SIZE] = 1.0
+            x[row, indexes] = 1.0
+        y = np.log(np.array([hours for _, hours in samples]))
+        
+        self.xtx += x.T @ x
+        self.xty += x.T @ y
+        self.yty += float(y @ y)
+        self.sample_count += len(samples)
+        self._solve()
+        return len(samples)
+
+    def save(self, path: str):
+        """Write the model atomically so readers never see a partial file"""
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as model_file:
+            np.savez_compressed(
+                model_file,
+                xtx=self.xtx,
+                xty=self.xty,
+                stats=np.array([self.yty, self.sample_count]),
+                vocabulary=np.array(json.dumps(self.vocabulary))
+            )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "RuntimePredictor":
+        model = cls()
+        with np.load(path) as saved:
+            model.xtx = saved["xtx"]
+            model.xty = saved["xty"]
+            model.yty, sample_count = saved["stats"].tolist()
+            model.sample_count = int(sample_count)
+            model.vocabulary = json.loads(str(saved["vocabulary"]))
+        model._solve()
+        return model
+
+    def _feature_indexes(self, features: RuntimeFeatures) -> List[int]:
+        pipeline_type, workflow_name, vm_size, _ = features
+        indexes = []
+        for key in (f"pipeline:{pipeline_type}", f"workflow:{workflow_name}", f"vm:{vm_size}"):
+            if key not in self.vocabulary:
+                self.vocabulary[key] = len(self.vocabulary) + NUMERIC_FEATURES
+            indexes.append(self.vocabulary[key])
+        return indexes
+
+    def _grow(self, size: int):
+        # New categories start with no observations
+        current = self.xtx.shape[0]
+        if size > current:
+            self.xtx = np.pad(self.xtx, ((0, size - current), (0, size - current)))
+            self.xty = np.pad(self.xty, (0, size - current))
+
+    def _solve(self):
+        if self.sample_count < settings.RUNTIME_MODEL_MIN_SAMPLES:
+            self.weights = None
+            self._fitted = None
+            return
+        
+        size = self.xtx.shape[0]
+        penalty = np.full(size, RIDGE_PENALTY)
+        penalty[BIAS] = 0.0
+        weights = np.linalg.solve(self.xtx + np.diag(penalty), self.xty)
+        
+        # Residual sum of squares straight from the statistics
+        residual = self.yty - 2 * weights @ self.xty + weights @ self.xtx @ weights
+        degrees_of_freedom = self.sample_count - size
+        if degrees_of_freedom > 0:
+            self.log_sigma = math.sqrt(max(residual, 0.0) / degrees_of_freedom)
+        else:
+            self.log_sigma = max(math.sqrt(max(residual, 0.0) / self.sample_count), DEFAULT_LOG_SIGMA)
+        self.weights = weights
+        self._fitted = (dict(self.vocabulary), weights, self.log_sigma, self.sample_count)
+
+class RuntimeModelStore:
+    """The process-wide runtime model: loaded from disk once, updated as jobs are reconciled"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.model = RuntimePredictor()
+        self._lock = threading.Lock()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            print(f"No runtime model at {self.path}; runtimes will not be predicted yet")
+            return
+        
+        try:
+            self.model = RuntimePredictor.load(self.path)
+            print(f"Loaded runtime model trained on {self.model.sample_count} runs")
+        except Exception as e:
+            print(f"Error loading runtime model: {e}")
+
+    def predict_job(self, job: GenomicsJob) -> Optional[RuntimePrediction]:
+        return self.model.predict(job_runtime_features(job))
+
+    def learn(self, jobs: Iterable[GenomicsJob]) -> int:
+        """Add finished jobs to the model and persist it; returns runs added"""
+        
+        samples = [
+            (job_runtime_features(job), job_runtime_hours(job))
+            for job in jobs
+        ]
+        with self._lock:
+            added = self.model.update(samples)
+            if added:
+                try:
+                    self.model.save(self.path)
+                except Exception as e:
+                    print(f"Error saving runtime model: {e}")
+        return added
+
+def job_runtime_features(job: GenomicsJob) -> RuntimeFeatures:
+    """Model inputs for a job; VM size and input size come from its Nextflow config when present"""
+    
+    config = job.nextflow_config or {}
+    vm_size = config.get("vm_size") or config.get("vmType")
+    if not vm_size:
+        # A Batch pool runs a single VM size, so the pool id stands in for it
+        vm_size = f"pool:{job.azure_batch_pool_id}" if job.azure_batch_pool_id else "unknown"
+    
+    input_gb = config.get("input_size_gb")
+    if input_gb is None and config.get("input_size_bytes") is not None:
+        input_gb = float(config["input_size_bytes"]) / 1024 ** 3
+    
+    return job.pipeline_type, job.workflow_name, vm_size, float(input_gb) if input_gb is not None else None
+
+def job_runtime_hours(job: GenomicsJob) -> Optional[float]:
+    """Observed runtime of a finished job"""
+    
+    if job.actual_runtime_hours:
+        return job.actual_runtime_hours
+    if job.started_at and job.completed_at:
+        return (job.completed_at - job.started_at).total_seconds() / 3600
+    return None
+
+# Shared runtime model for this process
+runtime_models = RuntimeModelStore(settings.RUNTIME_MODEL_PATH)
@@ -0,0 +1,300 @@
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import re
+
+from ..config.settings import settings
+from ..models.database import GenomicsJob, ProcessTrace
+from .cost_data_writer import DIALECT_MAX_PARAMS
+from .price_catalog import DEDICATED, DEFAULT_VM_COST_PER_HOUR, LOW_PRIORITY, get_price_catalog
+
+# Columns refreshed when a task is ingested again, e.g. from a re-uploaded or resumed trace
+TRACE_UPDATE_COLUMNS = (
+    "process", "name", "status", "exit_code", "attempt", "cpus", "memory_bytes",
+    "submitted_at", "started_at", "completed_at", "duration_seconds", "realtime_seconds",
+    "cpu_percent", "peak_rss_bytes", "peak_vmem_bytes", "read_bytes", "write_bytes",
+    "vm_size", "cost_amount"
+)
+
+# Nextflow prints sizes in binary units ("1.5 GB" is 1.5 GiB)
+SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4, "PB": 1024 ** 5}
+
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400}
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(ms|d|h|m|s)")
+
+# vCPU count embedded in Azure VM size names: Standard_D4s_v3, Standard_F16s_v2, Standard_NC6s_v3
+VM_VCPUS_PATTERN = re.compile(r"^standard_[a-z]+?(\d+)", re.IGNORECASE)
+
+def parse_size(value: str) -> Optional[float]:
+    """Bytes from a trace size, raw ("1610612736") or formatted ("1.5 GB")"""
+    
+    if not value or value == "-":
+        return None
+    number, _, unit = value.partition(" ")
+    return float(number) * SIZE_UNITS.get(unit.upper(), 1)
+
+def parse_duration(value: str) -> Optional[float]:
+    """Seconds from a trace duration, raw milliseconds ("3723000") or formatted ("1h 2m 3s")"""
+    
+    if not value or value == "-":
+        return None
+    if value.isdigit():
+        return int(value) / 1000
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in DURATION_PATTERN.findall(value))
+
+def parse_percent(value: str) -> Optional[float]:
+    if not value or value == "-":
+        return None
+    return float(value.rstrip("%"))
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    """Trace timestamp, raw epoch milliseconds or "2024-01-15 10:20:30.123" """
+    
+    if not value or value == "-":
+        return None
+    if value.isdigit():
+        return datetime.utcfromtimestamp(int(value) / 1000)
+    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f" if "." in value else "%Y-%m-%d %H:%M:%S")
+
+def parse_int(value: str) -> Optional[int]:
+    if not value or value == "-":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+def vm_vcpus(vm_size: Optional[str]) -> Optional[int]:
+    """vCPUs of an Azure VM size, read from its name"""
+    
+    match = VM_VCPUS_PATTERN.match(vm_size or "")
+    return int(match.group(1)) if match else None
+
+def job_vm_size(job: GenomicsJob) -> Optional[str]:
+    """VM size a job's tasks ran on, from its Nextflow config"""
+    
+    config = job.nextflow_config or {}
+    return config.get("vm_size") or config.get("vmType")
+
+class NodePricing:
+    """Hourly price and vCPU count of the VM size a job's tasks share"""
+
+    __slots__ = ("vm_size", "vcpus", "cost_per_hour")
+
+    def __init__(self, vm_size: Optional[str], cost_per_hour: float):
+        self.vm_size = vm_size
+        self.vcpus = vm_vcpus(vm_size)
+        self.cost_per_hour = cost_per_hour
+
+    def task_cost(self, cpus: Optional[int], realtime_seconds: Optional[float], status: Optional[str]) -> float:
+        """A task holds its share of the node's vCPUs for as long as it executes; cached tasks cost nothing"""
+        
+        if not realtime_seconds or status == "CACHED":
+            return 0.0
+        share = min((cpus or 1) / self.vcpus, 1.0) if self.vcpus else 1.0
+        return realtime_seconds / 3600 * self.cost_per_hour * share
+
+def node_pricing(job: GenomicsJob, vm_size: Optional[str] = None,
+                 low_priority: bool = False, region: Optional[str] = None) -> NodePricing:
+    """One price for the whole run: every task of a job shares its pool's VM size"""
+    
+    vm_size = vm_size or job_vm_size(job)
+    price = None
+    if vm_size:
+        priority = LOW_PRIORITY if low_priority else DEDICATED
+        price = get_price_catalog().price(vm_size, region or settings.AZURE_DEFAULT_REGION, priority)
+    return NodePricing(vm_size, price if price is not None else DEFAULT_VM_COST_PER_HOUR)
+
+def trace_row(genomics_job_id: int, field: Callable[[str], Optional[str]], pricing: NodePricing) -> Optional[Dict]:
+    """process_traces row for one task; field(name) returns the task's raw or formatted trace value"""
+    
+    task_id = parse_int(field("task_id"))
+    if task_id is None:
+        return None
+    
+    status = field("status")
+    cpus = parse_int(field("cpus"))
+    realtime = parse_duration(field("realtime"))
+    
+    return {
+        "genomics_job_id": genomics_job_id,
+        "task_id": task_id,
+        "process": field("process") or "unknown",
+        "name": field("name"),
+        "status": status,
+        "exit_code": parse_int(field("exit")),
+        "attempt": parse_int(field("attempt")),
+        "cpus": cpus,
+        "memory_bytes": parse_size(field("memory")),
+        "submitted_at": parse_timestamp(field("submit")),
+        "started_at": parse_timestamp(field("start")),
+        "completed_at": parse_timestamp(field("complete")),
+        "duration_seconds": parse_duration(field("duration")),
+        "realtime_seconds": realtime,
+        "cpu_percent": parse_percent(field("%cpu")),
+        "peak_rss_bytes": parse_size(field("peak_rss")),
+        "peak_vmem_bytes": parse_size(field("peak_vmem")),
+        "read_bytes": parse_size(field("read_bytes")),
+        "write_bytes": parse_size(field("write_bytes")),
+        "vm_size": pricing.vm_size,
+        "cost_amount": round(pricing.task_cost(cpus, realtime, status), 6)
+    }
+
+class TraceIngestor:
+    """Parses a Nextflow trace.txt fed in arbitrary byte chunks and writes per-task usage and cost in batches"""
+
+    def __init__(self, db_session, job: GenomicsJob, vm_size: Optional[str] = None,
+                 low_priority: bool = False, region: Optional[str] = None, batch_size: int = None):
+        self.db = db_session
+        self.job = job
+        self.batch_size = batch_size or settings.TRACE_INGEST_BATCH_SIZE
+        self.pricing = node_pricing(job, vm_size=vm_size, low_priority=low_priority, region=region)
+        
+        self.tasks = 0
+        self.skipped_lines = 0
+        self.total_cost = 0.0
+        self._columns: Optional[Dict[str, int]] = None
+        self._remainder = b""
+        self._pending: List[Dict] = []
+
+    def feed(self, data: bytes):
+        """Consume the next chunk; only complete lines are parsed, the tail waits for the next chunk"""
+        
+        lines = (self._remainder + data).split(b"\n")
+        self._remainder = lines.pop()
+        if len(self._remainder) > settings.TRACE_MAX_LINE_BYTES:
+            raise ValueError("Trace line exceeds TRACE_MAX_LINE_BYTES; is this a Nextflow trace file?")
+        
+        for line in lines:
+            self._parse_line(line)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def finish(self) -> Dict:
+        """Parse any final unterminated line, write what is left and summarize the ingestion"""
+        
+        if self._remainder:
+            self._parse_line(self._remainder)
+            self._remainder = b""
+        self._flush()
+        
+        if self._columns is None:
+            raise ValueError("Trace is empty")
+        
+        return {
+            "job_id": self.job.job_id,
+            "tasks": self.tasks,
+            "skipped_lines": self.skipped_lines,
+            "vm_size": self.pricing.vm_size,
+            "node_cost_per_hour": self.pricing.cost_per_hour,
+            "total_cost": round(self.total_cost, 4)
+        }
+
+    def _parse_line(self, line: bytes):
+        line = line.rstrip(b"\r")
+        if not line:
+            return
+        
+        fields = line.decode("utf-8", errors="replace").split("\t")
+        if self._columns is None:
+            self._columns = {name: index for index, name in enumerate(fields)}
+            if "task_id" not in self._columns or "process" not in self._columns:
+                raise ValueError("Trace header must include task_id and process")
+            return
+        
+        try:
+            row = self._trace_row(fields)
+        except (ValueError, IndexError):
+            row = None
+        if row is None:
+            self.skipped_lines += 1
+            return
+        
+        self._pending.append(row)
+        self.tasks += 1
+        self.total_cost += row["cost_amount"]
+
+    def _trace_row(self, fields: List[str]) -> Optional[Dict]:
+        columns = self._columns
+
+        def field(name: str) -> Optional[str]:
+            index = columns.get(name)
+            return fields[index] if index is not None and index < len(fields) else None
+        
+        return trace_row(self.job.id, field, self.pricing)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        upsert_process_traces(self.db, self._pending)
+        self.db.commit()
+        self._pending = []
+
+def upsert_process_traces(db_session, rows: List[Dict]):
+    """Idempotently write trace rows in one batched statement, keyed on (genomics_job_id, task_id)"""
+    
+    dialect = db_session.get_bind().dialect.name
+    if dialect not in DIALECT_MAX_PARAMS:
+        raise ValueError(f"Bulk trace upsert is not supported on {dialect}")
+    if not rows:
+        return
+    
+    # A resumed run can list a task twice; the last line wins unless it would undo a finished task
+    latest: Dict[Tuple[int, int], Dict] = {}
+    for row in rows:
+        key = (row["genomics_job_id"], row["task_id"])
+        existing = latest.get(key)
+        if existing is None or row["completed_at"] is not None or existing["completed_at"] is None:
+            latest[key] = row
+    rows = list(latest.values())
+    insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+    
+    # One statement executed over all rows; unlike a multi-VALUES insert it compiles once and is cached
+    stmt = insert(ProcessTrace)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["genomics_job_id", "task_id"],
+        set_={column: stmt.excluded[column] for column in TRACE_UPDATE_COLUMNS},
+        # A late submitted/started event must not overwrite a task that already finished
+        where=or_(ProcessTrace.completed_at.is_(None), stmt.excluded.completed_at.isnot(None))
+    )
+    db_session.execute(stmt, rows)
+
+def process_costs(db_session, job: GenomicsJob) -> List[Dict]:
+    """Per-process usage and attributed cost for a job, most expensive first"""
+    
+    rows = (
+        db_session.query(
+            ProcessTrace.process,
+            func.count(ProcessTrace.id),
+            func.sum(ProcessTrace.realtime_seconds),
+            func.sum(ProcessTrace.realtime_seconds * ProcessTrace.cpus),
+            func.avg(ProcessTrace.cpu_percent),
+            func.max(ProcessTrace.peak_rss_bytes),
+            func.sum(ProcessTrace.read_bytes),
+            func.sum(ProcessTrace.write_bytes),
+            func.sum(ProcessTrace.cost_amount)
+        )
+        .filter(ProcessTrace.genomics_job_id == job.id)
+        .group_by(ProcessTrace.process)
+        .order_by(func.sum(ProcessTrace.cost_amount).desc())
+        .all()
+    )
+    
+    total = sum(row[8] or 0.0 for row in rows)
+    return [
+        {
+            "process": process,
+            "tasks": tasks,
+            "realtime_hours": round((realtime or 0.0) / 3600, 3),
+            "cpu_hours": round((cpu_seconds or 0.0) / 3600, 3),
+            "avg_cpu_percent": round(cpu_percent, 1) if cpu_percent is not None else None,
+            "peak_rss_gb": round(peak_rss / 1024 ** 3, 3) if peak_rss is not None else None,
+            "read_gb": round((read_bytes or 0.0) / 1024 ** 3, 3),
+            "write_gb": round((write_bytes or 0.0) / 1024 ** 3, 3),
+            "cost": round(cost or 0.0, 2),
+            "percentage": round((cost or 0.0) / total * 100, 1) if total else 0.0
+        }
+        for process, tasks, realtime, cpu_seconds, cpu_percent, peak_rss, read_bytes, write_bytes, cost in rows
+    ]
@@ -0,0 +1,171 @@
+from sqlalchemy import func
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+import numpy as np
+
+from ..config.settings import settings
+from ..models.database import CostData, GenomicsJob, PipelineUsageProfile, SessionLocal
+
+# workflow_name of the profile that covers every workflow of a pipeline type
+ANY_WORKFLOW = "*"
+
+# Days in the billing month Azure prices storage against (GB-month)
+STORAGE_BILLING_DAYS = 30
+
+class UsageProfileStore:
+    """In-memory (pipeline_type, workflow_name) -> (stored GB, transferred GB) medians"""
+
+    def __init__(self, min_jobs: int, refresh_seconds: float):
+        self.min_jobs = min_jobs
+        self.refresh_seconds = refresh_seconds
+        self._profiles: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def lookup(self, pipeline_type: str, workflow_name: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """Typical (stored GB, transferred GB) for a job, or None while there is too little history"""
+        
+        self._ensure_fresh()
+        profiles = self._profiles
+        
+        # The workflow's own history first, then everything run under the pipeline type
+        if workflow_name:
+            profile = profiles.get((pipeline_type, workflow_name))
+            if profile is not None:
+                return profile
+        return profiles.get((pipeline_type, ANY_WORKFLOW))
+
+    def load(self, db_session):
+        """Replace the cached profiles with those stored in the database"""
+        
+        profiles = {}
+        for row in db_session.query(PipelineUsageProfile).filter(
+            PipelineUsageProfile.job_count >= self.min_jobs
+        ).all():
+            profiles[(row.pipeline_type, row.workflow_name)] = (row.stored_gb_p50, row.transferred_gb_p50)
+        
+        self._profiles = profiles
+        self._loaded_at = time.monotonic()
+
+    def put(self, profile: PipelineUsageProfile):
+        """Apply a profile this process just updated without waiting for a reload"""
+        
+        key = (profile.pipeline_type, profile.workflow_name)
+        profiles = dict(self._profiles)
+        if profile.job_count >= self.min_jobs:
+            profiles[key] = (profile.stored_gb_p50, profile.transferred_gb_p50)
+        else:
+            profiles.pop(key, None)
+        self._profiles = profiles
+
+    def _ensure_fresh(self):
+        # Other workers' reconciliations reach this process on the next reload
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds:
+            return
+        
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds:
+                return
+            
+            db = SessionLocal()
+            try:
+                self.load(db)
+            except Exception as e:
+                print(f"Error loading usage profiles: {e}")
+                self._loaded_at = time.monotonic()
+            finally:
+                db.close()
+
+def job_usage_observations(db_session, jobs: Iterable[GenomicsJob]) -> Dict[int, Tuple[float, float]]:
+    """(stored GB, transferred GB) per job, derived from its reconciled storage and network costs"""
+    
+    job_ids = [job.id for job in jobs]
+    if not job_ids:
+        return {}
+    
+    daily_costs = (
+        db_session.query(
+            CostData.genomics_job_id,
+            CostData.resource_type,
+            CostData.billing_period,
+            func.sum(CostData.cost_amount)
+        )
+        .filter(CostData.genomics_job_id.in_(job_ids))
+        .group_by(CostData.genomics_job_id, CostData.resource_type, CostData.billing_period)
+        .all()
+    )
+    
+    peak_storage_cost: Dict[int, float] = defaultdict(float)
+    network_cost: Dict[int, float] = defaultdict(float)
+    jobs_with_costs = set()
+    for job_id, resource_type, _, cost in daily_costs:
+        jobs_with_costs.add(job_id)
+        if resource_type == "Storage":
+            peak_storage_cost[job_id] = max(peak_storage_cost[job_id], cost or 0.0)
+        elif resource_type == "Network":
+            network_cost[job_id] += cost or 0.0
+    
+    # A day of storage costs 1/30 of the GB-month rate per GB held that day
+    storage_cost_per_gb_day = settings.AZURE_STORAGE_HOT_COST_PER_GB / STORAGE_BILLING_DAYS
+    return {
+        job_id: (
+            peak_storage_cost[job_id] / storage_cost_per_gb_day,
+            network_cost[job_id] / settings.AZURE_NETWORK_COST_PER_GB
+        )
+        for job_id in jobs_with_costs
+    }
+
+def update_usage_profiles(db_session, jobs: List[GenomicsJob]) -> int:
+    """Fold newly finalized jobs into their pipeline and workflow profiles; returns profiles touched"""
+    
+    observations = job_usage_observations(db_session, jobs)
+    if not observations:
+        return 0
+    
+    grouped: Dict[Tuple[str, str], List[Tuple[float, float]]] = defaultdict(list)
+    for job in jobs:
+        if job.id not in observations:
+            continue
+        grouped[(job.pipeline_type, job.workflow_name)].append(observations[job.id])
+        grouped[(job.pipeline_type, ANY_WORKFLOW)].append(observations[job.id])
+    
+    existing = {
+        (profile.pipeline_type, profile.workflow_name): profile
+        for profile in db_session.query(PipelineUsageProfile).filter(
+            PipelineUsageProfile.pipeline_type.in_({key[0] for key in grouped})
+        ).all()
+    }
+    
+    updated_at = datetime.utcnow()
+    max_samples = settings.USAGE_PROFILE_MAX_SAMPLES
+    for (pipeline_type, workflow_name), new_observations in grouped.items():
+        profile = existing.get((pipeline_type, workflow_name))
+        if profile is None:
+            profile = PipelineUsageProfile(pipeline_type=pipeline_type, workflow_name=workflow_name, job_count=0)
+            db_session.add(profile)
+        
+        # Keep a bounded window of recent jobs so profiles follow pipeline changes
+        stored = (profile.stored_gb_samples or []) + [round(stored_gb, 3) for stored_gb, _ in new_observations]
+        transferred = (profile.transferred_gb_samples or []) + [round(gb, 3) for _, gb in new_observations]
+        profile.stored_gb_samples = stored[-max_samples:]
+        profile.transferred_gb_samples = transferred[-max_samples:]
+        profile.job_count = (profile.job_count or 0) + len(new_observations)
+        
+        stored_p50, stored_p90 = np.quantile(profile.stored_gb_samples, [0.5, 0.9]).tolist()
+        transferred_p50, transferred_p90 = np.quantile(profile.transferred_gb_samples, [0.5, 0.9]).tolist()
+        profile.stored_gb_p50, profile.stored_gb_p90 = stored_p50, stored_p90
+        profile.transferred_gb_p50, profile.transferred_gb_p90 = transferred_p50, transferred_p90
+        profile.updated_at = updated_at
+        
+        usage_profiles.put(profile)
+    
+    return len(grouped)
+
+# Shared profiles for this process
+usage_profiles = UsageProfileStore(
+    min_jobs=settings.USAGE_PROFILE_MIN_JOBS,
+    refresh_seconds=settings.USAGE_PROFILE_REFRESH_SECONDS
+)
@@ -0,0 +1,209 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..models.database import GenomicsJob, ProcessTrace
+from .trace_ingestion import NodePricing, node_pricing, trace_row, upsert_process_traces
+
+# Weblog events that carry a task trace
+TASK_EVENTS = ("process_submitted", "process_started", "process_completed")
+
+class JobDelta:
+    """Counter changes for one job accumulated over a flushed batch"""
+
+    __slots__ = ("submitted", "completed", "failed", "cost")
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cost = 0.0
+
+def job_progress(job: GenomicsJob) -> int:
+    """Share of submitted tasks that have finished; Nextflow does not know the total up front"""
+    
+    if job.status == "completed":
+        return 100
+    if not job.tasks_submitted:
+        return 0
+    finished = (job.tasks_completed or 0) + (job.tasks_failed or 0)
+    return min(int(finished * 100 / job.tasks_submitted), 99)
+
+def parse_utc_time(value: Optional[str]) -> Optional[datetime]:
+    """Weblog utcTime, e.g. 2024-01-15T10:20:30Z"""
+    
+    if not value:
+        return None
+    return datetime.fromisoformat(value.rstrip("Z"))
+
+def apply_weblog_events(db_session, events: List[Dict[str, Any]]) -> Tuple[List[Dict], List[Dict]]:
+    """Write a batch of Nextflow weblog events; returns touched jobs' progress and events of unknown runs"""
+    
+    by_run: Dict[str, List[Dict]] = defaultdict(list)
+    for event in events:
+        if isinstance(event, dict) and isinstance(event.get("runName"), str) and event["runName"]:
+            by_run[event["runName"]].append(event)
+        else:
+            print(f"Skipping weblog event without a run name: {str(event)[:200]}")
+    if not by_run:
+        return [], []
+    
+    # Row locks serialize workers flushing the same run, so the counters below are read and moved by one at a time
+    jobs = {
+        job.job_id: job
+        for job in db_session.query(GenomicsJob).filter(
+            GenomicsJob.job_id.in_(list(by_run))
+        ).with_for_update().all()
+    }
+    
+    rows: List[Dict] = []
+    task_events: List[Tuple[str, Dict]] = []
+    deferred: List[Dict] = []
+    for run_name, run_events in by_run.items():
+        job = jobs.get(run_name)
+        if job is None:
+            try:
+                job = _register_job(db_session, run_name, run_events)
+            except (AttributeError, TypeError, ValueError) as e:
+                print(f"Skipping weblog run {run_name} with a malformed started event: {e}")
+                continue
+            if job is None:
+                # The run's "started" event may still be buffered in another flush or worker
+                deferred.extend(run_events)
+                continue
+            jobs[run_name] = job
+        
+        pricing: Optional[NodePricing] = None
+        for event in run_events:
+            # One malformed event is skipped; it must not cost the rest of the batch
+            try:
+                kind = event.get("event")
+                if kind in TASK_EVENTS and isinstance(event.get("trace"), dict):
+                    pricing = pricing or node_pricing(job)
+                    trace = event["trace"]
+                    row = trace_row(job.id, lambda name: _trace_value(trace, name), pricing)
+                    if row is None:
+                        continue
+                    
+                    rows.append(row)
+                    task_events.append((kind, row))
+                elif kind == "completed":
+                    workflow = _mapping(_mapping(event.get("metadata")).get("workflow"))
+                    job.status = "completed" if workflow.get("success", True) else "failed"
+                    job.completed_at = parse_utc_time(event.get("utcTime")) or datetime.utcnow()
+                    if job.started_at:
+                        job.actual_runtime_hours = (job.completed_at - job.started_at).total_seconds() / 3600
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                print(f"Skipping malformed weblog event for {run_name}: {e}")
+    
+    db_session.flush()
+    deltas = _task_deltas(db_session, task_events)
+    upsert_process_traces(db_session, rows)
+    
+    # Increment in SQL so concurrent workers flushing the same run do not overwrite each other
+    for job_id, delta in deltas.items():
+        if delta.submitted or delta.completed or delta.failed:
+            db_session.query(GenomicsJob).filter(GenomicsJob.id == job_id).update({
+                GenomicsJob.tasks_submitted: GenomicsJob.tasks_submitted + delta.submitted,
+                GenomicsJob.tasks_completed: GenomicsJob.tasks_completed + delta.completed,
+                GenomicsJob.tasks_failed: GenomicsJob.tasks_failed + delta.failed,
+                GenomicsJob.running_cost: GenomicsJob.running_cost + delta.cost
+            }, synchronize_session=False)
+    db_session.commit()
+    
+    touched = db_session.query(GenomicsJob).filter(GenomicsJob.job_id.in_(list(jobs))).all()
+    summaries = [
+        {
+            "job_id": job.job_id,
+            "project_name": job.project_name,
+            "status": job.status,
+            "tasks_submitted": job.tasks_submitted,
+            "tasks_completed": job.tasks_completed,
+            "tasks_failed": job.tasks_failed,
+            "running_cost": round(job.running_cost or 0.0, 4),
+            "progress_percentage": job_progress(job),
+            "cost_changed": bool(deltas.get(job.id) and deltas[job.id].cost)
+        }
+        for job in touched
+    ]
+    return summaries, deferred
+
+def _task_deltas(db_session, task_events: List[Tuple[str, Dict]]) -> Dict[int, JobDelta]:
+    """Counter changes per job, counting each task once when first seen and once when it finishes"""
+    
+    # Checked against the stored traces, so an event replayed by a retried or bisected batch adds nothing
+    known: Set[Tuple[int, int]] = set()
+    finished: Set[Tuple[int, int]] = set()
+    if task_events:
+        job_ids = {row["genomics_job_id"] for _, row in task_events}
+        task_ids = {row["task_id"] for _, row in task_events}
+        for job_id, task_id, completed_at in db_session.query(
+            ProcessTrace.genomics_job_id, ProcessTrace.task_id, ProcessTrace.completed_at
+        ).filter(ProcessTrace.genomics_job_id.in_(job_ids), ProcessTrace.task_id.in_(task_ids)):
+            known.add((job_id, task_id))
+            if completed_at is not None:
+                finished.add((job_id, task_id))
+    
+    deltas: Dict[int, JobDelta] = {}
+    for kind, row in task_events:
+        key = (row["genomics_job_id"], row["task_id"])
+        delta = deltas.setdefault(key[0], JobDelta())
+        if key not in known:
+            known.add(key)
+            delta.submitted += 1
+        if kind == "process_completed" and key not in finished:
+            finished.add(key)
+            if row["status"] == "FAILED":
+                delta.failed += 1
+            else:
+                delta.completed += 1
+            delta.cost += row["cost_amount"]
+    return deltas
+
+def _mapping(value: Any) -> Dict:
+    return value if isinstance(value, dict) else {}
+
+def _trace_value(trace: Dict[str, Any], name: str) -> Optional[str]:
+    # Weblog traces carry raw values (milliseconds, bytes, epoch millis), which the trace parsers accept as text
+    value = trace.get(name)
+    return None if value is None else str(value)
+
+def _register_job(db_session, run_name: str, run_events: List[Dict]) -> Optional[GenomicsJob]:
+    """Create a job from the run's "started" event when the pipeline did not register it through the API"""
+    
+    started = next((event for event in run_events if event.get("event") == "started"), None)
+    if started is None:
+        return None
+    
+    metadata = _mapping(started.get("metadata"))
+    params = _mapping(metadata.get("parameters"))
+    workflow = _mapping(metadata.get("workflow"))
+    manifest = _mapping(workflow.get("manifest"))
+    
+    job = GenomicsJob(
+        organization_id=1,  # Mock organization
+        job_id=run_name,
+        workflow_name=manifest.get("name") or "unknown",
+        sample_id=params.get("sample_id") or "unknown-sample",
+        project_name=params.get("project_name") or "default-project",
+        user_email=params.get("user_email") or "unknown",
+        pipeline_type=params.get("pipeline_type") or "unknown",
+        azure_resource_group=params.get("azure_resource_group") or "unknown",
+        azure_batch_pool_id=params.get("azure_batch_pool_id"),
+        estimated_runtime_hours=params.get("estimated_runtime_hours"),
+        nextflow_config={"input_size_gb": params.get("input_size_gb")},
+        started_at=parse_utc_time(started.get("utcTime")) or datetime.utcnow(),
+        status="running",
+        tasks_submitted=0,
+        tasks_completed=0,
+        tasks_failed=0,
+        running_cost=0.0
+    )
+    try:
+        # Another worker may register the same run from its own copy of the event
+        with db_session.begin_nested():
+            db_session.add(job)
+    except IntegrityError:
+        return db_session.query(GenomicsJob).filter(GenomicsJob.job_id == run_name).first()
+    return job
@@ -0,0 +1,117 @@
+from datetime import date, datetime
+
+from src.models.database import BudgetAlert, DailyCostRollup
+from src.services.budget_alerts import BudgetAlertEvaluator
+
+TODAY = date(2026, 1, 14)
+
+def add_alert(db_session, name: str, threshold_amount: float, **values) -> BudgetAlert:
+    alert = BudgetAlert(
+        name=name,
+        alert_type=values.pop("alert_type", "project"),
+        threshold_amount=threshold_amount,
+        time_period=values.pop("time_period", "monthly"),
+        project_name=values.pop("project_name", "cancer-genomics"),
+        is_active=True,
+        **values
+    )
+    db_session.add(alert)
+    db_session.commit()
+    return alert
+
+def add_rollup(db_session, day: date, cost_amount: float, resource_type: str = "Batch"):
+    db_session.add(DailyCostRollup(
+        usage_date=day,
+        project_name="cancer-genomics",
+        user_email="demo@genomecost.com",
+        pipeline_type="WGS",
+        resource_type=resource_type,
+        cost_amount=cost_amount,
+        record_count=1
+    ))
+    db_session.commit()
+
+def loaded_evaluator(db_session) -> BudgetAlertEvaluator:
+    evaluator = BudgetAlertEvaluator()
+    evaluator.load(db_session, today=TODAY)
+    return evaluator
+
+def triggered_names(triggered) -> list:
+    return sorted(rule.name for rule, _ in triggered)
+
+def test_alert_fires_once_when_the_seeded_total_crosses_its_limit(db_session):
+    add_alert(db_session, "monthly cap", 100.0)
+    add_rollup(db_session, date(2026, 1, 3), 90.0)
+    evaluator = loaded_evaluator(db_session)
+    
+    below = evaluator.apply([(TODAY, "cancer-genomics", "demo@genomecost.com", 5.0)], today=TODAY)
+    crossed = evaluator.apply([(TODAY, "cancer-genomics", "demo@genomecost.com", 10.0)], today=TODAY)
+    again = evaluator.apply([(TODAY, "cancer-genomics", "demo@genomecost.com", 10.0)], today=TODAY)
+    
+    assert below == []
+    assert [(rule.name, amount) for rule, amount in crossed] == [("monthly cap", 105.0)]
+    assert again == []
+
+def test_cost_change_reaches_only_alerts_on_its_scope_and_window(db_session):
+    add_alert(db_session, "cancer daily", 10.0, time_period="daily")
+    add_alert(db_session, "rare monthly", 10.0, project_name="rare-disease")
+    add_alert(db_session, "everything", 10.0, alert_type="total", project_name=None)
+    evaluator = loaded_evaluator(db_session)
+    
+    # Costs for earlier days of the month count toward monthly windows only
+    earlier = evaluator.apply([(date(2026, 1, 2), "cancer-genomics", "demo@genomecost.com", 20.0)], today=TODAY)
+    today = evaluator.apply([(TODAY, "cancer-genomics", "demo@genomecost.com", 20.0)], today=TODAY)
+    
+    assert triggered_names(earlier) == ["everything"]
+    assert triggered_names(today) == ["cancer daily"]
+
+def test_threshold_percentage_fires_early(db_session):
+    add_alert(db_session, "80 percent", 100.0, threshold_percentage=80.0)
+    evaluator = loaded_evaluator(db_session)
+    
+    triggered = evaluator.apply([(TODAY, "cancer-genomics", "demo@genomecost.com", 85.0)], today=TODAY)
+    
+    assert triggered_names(triggered) == ["80 percent"]
+
+def test_totals_restart_when_the_window_rolls_over(db_session):
+    add_alert(db_session, "daily cap", 10.0, time_period="daily")
+    evaluator = loaded_evaluator(db_session)
+    evaluator.apply([(TODAY, "cancer-genomics", "demo@genomecost.com", 8.0)], today=TODAY)
+    
+    tomorrow = date(2026, 1, 15)
+    triggered = evaluator.apply([(tomorrow, "cancer-genomics", "demo@genomecost.com", 8.0)], today=tomorrow)
+    
+    assert triggered == []
+
+def test_sync_picks_up_new_edited_and_deactivated_alerts(db_session):
+    edited = add_alert(db_session, "edited", 1000.0)
+    deactivated = add_alert(db_session, "deactivated", 10.0)
+    evaluator = loaded_evaluator(db_session)
+    
+    add_alert(db_session, "created later", 10.0)
+    edited.threshold_amount = 10.0
+    deactivated.is_active = False
+    db_session.commit()
+    read = evaluator.sync_rules(db_session)
+    triggered = evaluator.apply([(TODAY, "cancer-genomics", "demo@genomecost.com", 20.0)], today=TODAY)
+    
+    assert read == 3
+    assert triggered_names(triggered) == ["created later", "edited"]
+
+def test_refresh_seeds_once_until_invalidated(db_session):
+    today = datetime.utcnow().date()
+    add_alert(db_session, "monthly cap", 100.0)
+    add_rollup(db_session, today, 60.0)
+    evaluator = BudgetAlertEvaluator()
+    evaluator.refresh(db_session)
+    
+    # Costs another leader wrote reach the totals only when this worker seeds again
+    add_rollup(db_session, today, 30.0, resource_type="Storage")
+    evaluator.refresh(db_session)
+    before_reseed = evaluator.apply([(today, "cancer-genomics", "demo@genomecost.com", 10.0)], today=today)
+    evaluator.invalidate()
+    evaluator.refresh(db_session)
+    after_reseed = evaluator.apply([(today, "cancer-genomics", "demo@genomecost.com", 10.0)], today=today)
+    
+    assert before_reseed == []
+    assert [(rule.name, amount) for rule, amount in after_reseed] == [("monthly cap", 100.0)]
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from src.models.database import CostData
+from src.services.cost_data_writer import upsert_cost_data
+
+def cost_row(cost_amount: float, **values) -> dict:
+    row = {
+        "genomics_job_id": None,
+        "resource_id": "/subscriptions/sub/resourceGroups/rg-genomics/providers/Microsoft.Batch/batchAccounts/batch",
+        "resource_type": "Batch",
+        "service_name": "Azure Batch",
+        "cost_amount": cost_amount,
+        "currency": "USD",
+        "billing_period": "2026-01-05",
+        "usage_date": datetime(2026, 1, 5),
+        "sample_id": "sample-1",
+        "project_name": "cancer-genomics",
+        "user_email": "demo@genomecost.com",
+        "azure_tags": {}
+    }
+    row.update(values)
+    return row
+
+def stored_costs(db_session):
+    return sorted(
+        (row.sample_id, row.project_name, row.user_email, row.cost_amount)
+        for row in db_session.query(CostData)
+    )
+
+def test_reupsert_is_idempotent(db_session):
+    rows = [cost_row(1.5), cost_row(2.0, sample_id="sample-2")]
+    
+    first = upsert_cost_data(db_session, rows)
+    second = upsert_cost_data(db_session, rows)
+    db_session.commit()
+    
+    assert first == {"inserted": 2, "updated": 0}
+    assert second == {"inserted": 0, "updated": 2}
+    assert stored_costs(db_session) == [
+        ("sample-1", "cancer-genomics", "demo@genomecost.com", 1.5),
+        ("sample-2", "cancer-genomics", "demo@genomecost.com", 2.0)
+    ]
+
+def test_reupsert_replaces_a_restated_cost(db_session):
+    upsert_cost_data(db_session, [cost_row(1.5)])
+    upsert_cost_data(db_session, [cost_row(1.75)])
+    db_session.commit()
+    
+    assert stored_costs(db_session) == [("sample-1", "cancer-genomics", "demo@genomecost.com", 1.75)]
+
+def test_rows_differing_by_project_or_user_are_kept(db_session):
+    rows = [cost_row(1.0), cost_row(2.0, project_name="rare-disease"), cost_row(4.0, user_email="other@lab.com")]
+    
+    stats = upsert_cost_data(db_session, rows)
+    db_session.commit()
+    
+    assert stats == {"inserted": 3, "updated": 0}
+    assert sum(cost for *_, cost in stored_costs(db_session)) == 7.0
+
+def test_duplicate_keys_in_one_batch_are_summed(db_session):
+    # Same key, split by a grouping tag that is not stored
+    rows = [cost_row(1.0, azure_tags={"workflow_type": "align"}), cost_row(2.5, azure_tags={"workflow_type": "call"})]
+    
+    upsert_cost_data(db_session, rows)
+    upsert_cost_data(db_session, rows)
+    db_session.commit()
+    
+    assert stored_costs(db_session) == [("sample-1", "cancer-genomics", "demo@genomecost.com", 3.5)]
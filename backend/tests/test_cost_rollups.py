@@ -0,0 +1,104 @@
+from datetime import date, datetime
+
+from src.models.database import CostData, DailyCostRollup, DailyCostSeries, DailyJobCost, GenomicsJob
+from src.services.cost_rollups import refresh_daily_rollups, rollup_totals
+from src.services.dashboard_service import DashboardService
+
+def add_job(db_session, job_id: str, project_name: str = "cancer-genomics") -> GenomicsJob:
+    job = GenomicsJob(
+        job_id=job_id,
+        workflow_name="nf-core/sarek",
+        sample_id=f"sample-{job_id}",
+        project_name=project_name,
+        user_email="demo@genomecost.com",
+        pipeline_type="WGS",
+        azure_resource_group="rg-genomics"
+    )
+    db_session.add(job)
+    db_session.flush()
+    return job
+
+def add_cost(db_session, job: GenomicsJob, day: date, resource_type: str, cost_amount: float) -> CostData:
+    cost = CostData(
+        genomics_job_id=job.id,
+        resource_id=f"/subscriptions/sub/resourceGroups/rg-genomics/{resource_type}/{job.job_id}",
+        resource_type=resource_type,
+        service_name=f"Azure {resource_type}",
+        cost_amount=cost_amount,
+        billing_period=day.strftime("%Y-%m-%d"),
+        usage_date=datetime.combine(day, datetime.min.time()),
+        sample_id=job.sample_id,
+        project_name=job.project_name,
+        user_email=job.user_email
+    )
+    db_session.add(cost)
+    return cost
+
+def test_rollups_group_costs_per_day_and_dimension(db_session):
+    wgs = add_job(db_session, "wgs")
+    rare = add_job(db_session, "rare", project_name="rare-disease")
+    add_cost(db_session, wgs, date(2026, 1, 5), "Batch", 10.0)
+    add_cost(db_session, wgs, date(2026, 1, 5), "Storage", 2.0)
+    add_cost(db_session, rare, date(2026, 1, 5), "Batch", 5.0)
+    add_cost(db_session, wgs, date(2026, 1, 6), "Batch", 7.0)
+    db_session.commit()
+    
+    refresh_daily_rollups(db_session, [date(2026, 1, 5), date(2026, 1, 6)])
+    
+    assert db_session.query(DailyCostRollup).count() == 4
+    assert rollup_totals(db_session, [date(2026, 1, 5), date(2026, 1, 6)]) == {
+        (date(2026, 1, 5), "cancer-genomics", "demo@genomecost.com"): 12.0,
+        (date(2026, 1, 5), "rare-disease", "demo@genomecost.com"): 5.0,
+        (date(2026, 1, 6), "cancer-genomics", "demo@genomecost.com"): 7.0
+    }
+
+def test_refresh_rebuilds_a_day_without_vanished_rows(db_session):
+    job = add_job(db_session, "wgs")
+    kept = add_cost(db_session, job, date(2026, 1, 5), "Batch", 10.0)
+    removed = add_cost(db_session, job, date(2026, 1, 5), "Storage", 2.0)
+    db_session.commit()
+    refresh_daily_rollups(db_session, [date(2026, 1, 5)])
+    
+    db_session.delete(removed)
+    kept.cost_amount = 11.0
+    db_session.commit()
+    refresh_daily_rollups(db_session, [date(2026, 1, 5)])
+    
+    series = db_session.query(DailyCostSeries).one()
+    assert rollup_totals(db_session, [date(2026, 1, 5)]) == {
+        (date(2026, 1, 5), "cancer-genomics", "demo@genomecost.com"): 11.0
+    }
+    assert (series.total_cost, series.compute_cost, series.storage_cost) == (11.0, 11.0, 0.0)
+
+def test_series_splits_categories_and_counts_jobs_per_day(db_session):
+    first = add_job(db_session, "first")
+    second = add_job(db_session, "second")
+    add_cost(db_session, first, date(2026, 1, 5), "Batch", 10.0)
+    add_cost(db_session, first, date(2026, 1, 5), "Storage", 2.0)
+    add_cost(db_session, second, date(2026, 1, 5), "Network", 1.0)
+    add_cost(db_session, second, date(2026, 1, 5), "KeyVault", 0.5)
+    db_session.commit()
+    
+    refresh_daily_rollups(db_session, [date(2026, 1, 5)])
+    
+    series = db_session.query(DailyCostSeries).one()
+    assert (series.compute_cost, series.storage_cost, series.network_cost, series.other_cost) == (10.0, 2.0, 1.0, 0.5)
+    assert series.total_cost == 13.5
+    assert series.job_count == 2
+    assert db_session.query(DailyJobCost).count() == 2
+
+def test_weekly_trend_counts_a_job_billed_on_several_days_once(db_session):
+    long_run = add_job(db_session, "long-run")
+    short_run = add_job(db_session, "short-run")
+    for day in (5, 6, 7):
+        add_cost(db_session, long_run, date(2026, 1, day), "Batch", 1.0)
+    add_cost(db_session, short_run, date(2026, 1, 6), "Batch", 4.0)
+    db_session.commit()
+    refresh_daily_rollups(db_session, [date(2026, 1, day) for day in (5, 6, 7)])
+    
+    # 2026-01-05 is a Monday, so the whole window is one weekly bucket
+    daily = DashboardService(db_session).get_cost_trends(days=7, granularity="daily", today=date(2026, 1, 11))
+    weekly = DashboardService(db_session).get_cost_trends(days=7, granularity="weekly", today=date(2026, 1, 11))
+    
+    assert sum(point["job_count"] for point in daily) == 4
+    assert [(point["date"], point["total_cost"], point["job_count"]) for point in weekly] == [("2026-01-05", 7.0, 2)]
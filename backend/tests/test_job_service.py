@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from src.models.database import GenomicsJob
+from src.services.job_service import JobService
+
+def add_job(db_session, job_id: str, **values) -> GenomicsJob:
+    job = GenomicsJob(
+        job_id=job_id,
+        workflow_name="nf-core/sarek",
+        sample_id=f"sample-{job_id}",
+        project_name="cancer-genomics",
+        user_email="demo@genomecost.com",
+        pipeline_type="WGS",
+        azure_resource_group="rg-genomics",
+        **values
+    )
+    db_session.add(job)
+    return job
+
+def collect_pages(service: JobService, limit: int, max_pages: int = 20):
+    pages, cursor = [], None
+    for _ in range(max_pages):
+        jobs, cursor = service.list_jobs(cursor=cursor, limit=limit)
+        pages.append([job.job_id for job in jobs])
+        if cursor is None:
+            return pages
+    raise AssertionError(f"Pagination did not finish: {pages}")
+
+def test_pages_advance_with_server_default_started_at(db_session):
+    # started_at comes from func.now(): SQLite stores it without microseconds, all in the same second
+    for i in range(5):
+        add_job(db_session, f"j{i}")
+    db_session.commit()
+    
+    pages = collect_pages(JobService(db_session), limit=2)
+    
+    assert pages == [["j4", "j3"], ["j2", "j1"], ["j0"]]
+
+def test_pages_follow_started_at_then_id(db_session):
+    add_job(db_session, "old", started_at=datetime(2026, 1, 1, 8, 0, 0, 123456))
+    add_job(db_session, "new", started_at=datetime(2026, 1, 2, 8, 0, 0))
+    add_job(db_session, "tie-a", started_at=datetime(2026, 1, 1, 12, 0, 0))
+    add_job(db_session, "tie-b", started_at=datetime(2026, 1, 1, 12, 0, 0))
+    db_session.commit()
+    
+    pages = collect_pages(JobService(db_session), limit=1)
+    
+    assert pages == [["new"], ["tie-b"], ["tie-a"], ["old"]]
+
+def test_cursor_of_deleted_job_still_advances(db_session):
+    for i in range(4):
+        add_job(db_session, f"j{i}", started_at=datetime(2026, 1, 1, i))
+    db_session.commit()
+    service = JobService(db_session)
+    
+    first, cursor = service.list_jobs(limit=2)
+    db_session.delete(first[-1])
+    db_session.commit()
+    second, _ = service.list_jobs(cursor=cursor, limit=2)
+    
+    assert [job.job_id for job in second] == ["j1", "j0"]
@@ -0,0 +1,106 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from azure.core.exceptions import HttpResponseError
+
+from src.services.resource_tagging import RATE_RECOVERY_FRACTION, ResourceTagger, TokenBucket, tag_changes
+
+class ThrottledResponse:
+    status_code = 429
+    reason = "Too Many Requests"
+
+    def __init__(self, retry_after: str):
+        self.headers = {"Retry-After": retry_after}
+
+    def text(self):
+        return ""
+
+class FakeTagsClient:
+    """Answers update_at_scope with 429 for the first throttled_calls calls"""
+
+    def __init__(self, throttled_calls: int = 0):
+        self.throttled_calls = throttled_calls
+        self.calls = []
+
+    def update_at_scope(self, scope, parameters, cls=None):
+        self.calls.append((scope, parameters["properties"]["tags"]))
+        if len(self.calls) <= self.throttled_calls:
+            raise HttpResponseError(message="throttled", response=ThrottledResponse("0.01"))
+        return {"x-ms-ratelimit-remaining-subscription-writes": "1000"}
+
+async def direct_call(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+def resource(resource_id: str, tags=None):
+    return SimpleNamespace(id=resource_id, tags=tags)
+
+def tagger(tags_client: FakeTagsClient, max_retries: int = 3) -> ResourceTagger:
+    return ResourceTagger(tags_client, direct_call, TokenBucket(1000.0, 100), max_retries=max_retries)
+
+@pytest.mark.asyncio
+async def test_bucket_allows_a_burst_then_paces_at_the_rate():
+    bucket = TokenBucket(rate_per_second=50.0, capacity=5)
+    
+    started = time.monotonic()
+    for _ in range(5):
+        await bucket.acquire()
+    burst = time.monotonic() - started
+    for _ in range(5):
+        await bucket.acquire()
+    paced = time.monotonic() - started
+    
+    assert burst < 0.05
+    assert paced >= 0.09
+
+def test_throttling_halves_the_rate_and_writes_win_it_back():
+    bucket = TokenBucket(rate_per_second=10.0, capacity=20)
+    
+    bucket.pause(0.0)
+    halved = bucket.rate_per_second
+    bucket.observe({})
+    
+    assert halved == 5.0
+    assert bucket.rate_per_second == 5.0 + 10.0 * RATE_RECOVERY_FRACTION
+
+def test_remaining_writes_header_caps_the_tokens():
+    bucket = TokenBucket(rate_per_second=10.0, capacity=20)
+    
+    bucket.observe({"x-ms-ratelimit-remaining-subscription-writes": "3"})
+    
+    assert bucket._tokens == 3.0
+
+def test_tag_changes_keeps_only_differing_tags():
+    existing = {"project": "cancer-genomics", "sample_id": "old"}
+    desired = {"project": "cancer-genomics", "sample_id": "sample-1", "user": "demo@genomecost.com"}
+    
+    assert tag_changes(existing, desired) == {"sample_id": "sample-1", "user": "demo@genomecost.com"}
+
+@pytest.mark.asyncio
+async def test_resources_already_tagged_are_not_written():
+    tags_client = FakeTagsClient()
+    desired = {"project": "cancer-genomics"}
+    
+    results = await tagger(tags_client).tag_resources(
+        [resource("vm-1", {"project": "cancer-genomics"}), resource("vm-2", {"project": "other"})], desired
+    )
+    
+    assert [(result.resource_id, result.status) for result in results] == [("vm-1", "unchanged"), ("vm-2", "updated")]
+    assert tags_client.calls == [("vm-2", desired)]
+
+@pytest.mark.asyncio
+async def test_throttled_write_is_retried_after_the_pause():
+    tags_client = FakeTagsClient(throttled_calls=2)
+    
+    results = await tagger(tags_client).tag_resources([resource("vm-1")], {"project": "cancer-genomics"})
+    
+    assert (results[0].status, results[0].attempts) == ("updated", 3)
+
+@pytest.mark.asyncio
+async def test_write_fails_once_retries_run_out():
+    tags_client = FakeTagsClient(throttled_calls=10)
+    
+    results = await tagger(tags_client, max_retries=1).tag_resources([resource("vm-1")], {"project": "cancer-genomics"})
+    
+    assert (results[0].status, results[0].attempts) == ("failed", 2)
+    assert len(tags_client.calls) == 2
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+from src.models.database import SchedulerLease
+from src.services.reconciliation_scheduler import acquire_lease, release_lease
+
+LEASE = "cost_reconciliation"
+
+def lease_row(db_session) -> SchedulerLease:
+    db_session.expire_all()
+    return db_session.query(SchedulerLease).filter(SchedulerLease.name == LEASE).one()
+
+def test_first_worker_takes_the_free_lease(db_session):
+    assert acquire_lease(db_session, LEASE, "worker-a", lease_seconds=60)
+    assert not acquire_lease(db_session, LEASE, "worker-b", lease_seconds=60)
+    assert lease_row(db_session).holder == "worker-a"
+
+def test_holder_renews_without_losing_its_acquired_at(db_session):
+    acquire_lease(db_session, LEASE, "worker-a", lease_seconds=60)
+    first = lease_row(db_session)
+    acquired_at, expires_at = first.acquired_at, first.expires_at
+    
+    assert acquire_lease(db_session, LEASE, "worker-a", lease_seconds=120)
+    
+    renewed = lease_row(db_session)
+    assert renewed.acquired_at == acquired_at
+    assert renewed.expires_at > expires_at
+
+def test_expired_lease_passes_to_another_worker(db_session):
+    acquire_lease(db_session, LEASE, "worker-a", lease_seconds=60)
+    lease_row(db_session).expires_at = datetime.utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    
+    assert acquire_lease(db_session, LEASE, "worker-b", lease_seconds=60)
+    assert not acquire_lease(db_session, LEASE, "worker-a", lease_seconds=60)
+    assert lease_row(db_session).holder == "worker-b"
+
+def test_released_lease_is_free_at_once(db_session):
+    acquire_lease(db_session, LEASE, "worker-a", lease_seconds=60)
+    
+    # Only the holder can give it up
+    release_lease(db_session, LEASE, "worker-b")
+    assert not acquire_lease(db_session, LEASE, "worker-b", lease_seconds=60)
+    
+    release_lease(db_session, LEASE, "worker-a")
+    assert acquire_lease(db_session, LEASE, "worker-b", lease_seconds=60)
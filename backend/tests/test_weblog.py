@@ -0,0 +1,127 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from src.api import weblog
+from src.api.weblog import WeblogReceiver
+from src.models.database import GenomicsJob, ProcessTrace
+from src.services.weblog_writer import apply_weblog_events
+
+class RecordingBroadcaster:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, message, topics=None, coalesce_key=None):
+        self.messages.append(message)
+
+class RecordingCostUpdates:
+    def __init__(self):
+        self.changes = 0
+
+    def notify_changed(self):
+        self.changes += 1
+
+def started_event(run_name: str = "run-1") -> dict:
+    return {
+        "runName": run_name,
+        "event": "started",
+        "utcTime": "2026-01-05T10:00:00Z",
+        "metadata": {"parameters": {"sample_id": "sample-1", "project_name": "cancer-genomics"}}
+    }
+
+def task_event(task_id: int, event: str = "process_completed", status: str = "COMPLETED", run_name: str = "run-1") -> dict:
+    trace = {"task_id": task_id, "process": "ALIGN", "status": status, "cpus": 2}
+    if event == "process_completed":
+        trace.update({"realtime": 3600000, "complete": 1767610800000})
+    return {"runName": run_name, "event": event, "trace": trace}
+
+def job_counters(db_session, run_name: str = "run-1"):
+    db_session.expire_all()
+    job = db_session.query(GenomicsJob).filter(GenomicsJob.job_id == run_name).one()
+    return job.tasks_submitted, job.tasks_completed, job.tasks_failed, job.running_cost
+
+@pytest.fixture
+def receiver(db_session, monkeypatch):
+    monkeypatch.setattr(weblog, "SessionLocal", sessionmaker(bind=db_session.get_bind()))
+    return WeblogReceiver(
+        RecordingBroadcaster(),
+        RecordingCostUpdates(),
+        flush_interval_seconds=60,
+        batch_size=100,
+        max_pending=1000,
+        unknown_run_retries=3
+    )
+
+def test_replayed_events_do_not_move_task_counters_twice(db_session):
+    events = [
+        started_event(),
+        task_event(1, "process_submitted", "SUBMITTED"),
+        task_event(2, "process_submitted", "SUBMITTED"),
+        task_event(1),
+        task_event(2, status="FAILED")
+    ]
+    
+    apply_weblog_events(db_session, events)
+    counters = job_counters(db_session)
+    apply_weblog_events(db_session, events)
+    apply_weblog_events(db_session, events[3:])
+    
+    assert counters[:3] == (2, 1, 1)
+    assert counters[3] > 0
+    assert job_counters(db_session) == counters
+    assert db_session.query(ProcessTrace).count() == 2
+
+def test_completion_without_a_submitted_event_counts_the_task_once(db_session):
+    apply_weblog_events(db_session, [started_event(), task_event(7)])
+    
+    assert job_counters(db_session)[:3] == (1, 1, 0)
+
+@pytest.mark.asyncio
+async def test_failing_event_is_dead_lettered_and_the_rest_written(db_session, receiver, monkeypatch):
+    def apply_rejecting_poison(session, events):
+        if any(event.get("poison") for event in events):
+            raise ValueError("rejected by a constraint")
+        return apply_weblog_events(session, events)
+    
+    monkeypatch.setattr(weblog, "apply_weblog_events", apply_rejecting_poison)
+    receiver.receive(started_event())
+    for task_id in range(6):
+        receiver.receive(task_event(task_id))
+    receiver.receive({**task_event(99), "poison": True})
+    
+    written = await receiver.flush()
+    
+    assert written == 7
+    assert receiver.dead_lettered == 1
+    assert [event["trace"]["task_id"] for event in receiver.dead_letters] == [99]
+    assert receiver._pending == []
+    assert job_counters(db_session)[:2] == (6, 6)
+
+@pytest.mark.asyncio
+async def test_database_outage_keeps_the_batch_for_the_next_flush(db_session, receiver, monkeypatch):
+    def apply_while_down(session, events):
+        raise OperationalError("UPDATE genomics_jobs", {}, Exception("connection refused"))
+    
+    monkeypatch.setattr(weblog, "apply_weblog_events", apply_while_down)
+    receiver.receive(started_event())
+    receiver.receive(task_event(1))
+    with pytest.raises(OperationalError):
+        await receiver.flush()
+    
+    monkeypatch.setattr(weblog, "apply_weblog_events", apply_weblog_events)
+    written = await receiver.flush()
+    
+    assert written == 2
+    assert receiver.dead_lettered == 0
+    assert job_counters(db_session)[:2] == (1, 1)
+
+@pytest.mark.asyncio
+async def test_stop_writes_what_was_accepted(db_session, receiver):
+    receiver.start()
+    receiver.receive(started_event())
+    receiver.receive(task_event(1))
+    
+    await receiver.stop()
+    
+    assert receiver._pending == []
+    assert job_counters(db_session)[:2] == (1, 1)
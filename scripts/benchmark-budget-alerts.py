@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+GenomeCostTracker Budget Alert Benchmark
+Streams synthetic cost rows through the budget alert evaluator and compares
+the scope index with checking every active alert against every row. The
+full scan is timed on a sample of rows and extrapolated. A second part times
+the per-batch refresh done by reconciliation against an in-memory SQLite
+database: reloading every alert and the month's rollups on each batch versus
+seeding once and syncing only changed alerts.
+
+    python scripts/benchmark-budget-alerts.py --alerts 10000 --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from src.models.database import Base, BudgetAlert, DailyCostRollup
+from src.services.budget_alerts import BudgetAlertEvaluator, alert_scope
+
+TIME_PERIODS = ["daily", "weekly", "monthly"]
+
+def build_alerts(count: int, projects: int, users: int, rng: random.Random):
+    alerts = []
+    for alert_id in range(1, count + 1):
+        alert_type = rng.choices(["project", "user", "total"], weights=[70, 29, 1])[0]
+        alerts.append(BudgetAlert(
+            id=alert_id,
+            name=f"alert-{alert_id}",
+            alert_type=alert_type,
+            threshold_amount=rng.uniform(1_000, 1_000_000),
+            threshold_percentage=rng.choice([None, 80.0, 90.0]),
+            time_period=rng.choice(TIME_PERIODS),
+            project_name=f"project-{rng.randrange(projects)}" if alert_type == "project" else None,
+            user_email=f"user{rng.randrange(users)}@lab.com" if alert_type == "user" else None,
+            is_active=True
+        ))
+    return alerts
+
+def build_rows(count: int, projects: int, users: int, rng: random.Random):
+    today = datetime.utcnow().date()
+    return [
+        (today, f"project-{rng.randrange(projects)}", f"user{rng.randrange(users)}@lab.com", rng.uniform(0.01, 5.0))
+        for _ in range(count)
+    ]
+
+def seed_database(alerts, projects: int, users: int, rollup_rows: int, rng: random.Random):
+    """In-memory database holding the alerts and a month of daily rollups"""
+    
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    
+    # Saved a day ago, as most alerts are by the time costs land
+    saved_at = datetime.utcnow() - timedelta(days=1)
+    db.execute(insert(BudgetAlert), [
+        {"updated_at": saved_at, **{column: getattr(alert, column) for column in (
+            "id", "name", "alert_type", "threshold_amount", "threshold_percentage", "time_period",
+            "project_name", "user_email", "is_active"
+        )}}
+        for alert in alerts
+    ])
+    
+    today = datetime.utcnow().date()
+    month_start = today.replace(day=1)
+    grains = {}
+    while len(grains) < rollup_rows:
+        usage_date = month_start + timedelta(days=rng.randrange((today - month_start).days + 1))
+        grains[(usage_date, f"project-{rng.randrange(projects)}", f"user{rng.randrange(users)}@lab.com")] = None
+    db.execute(insert(DailyCostRollup), [
+        {"usage_date": usage_date, "project_name": project_name, "user_email": user_email,
+         "pipeline_type": "WGS", "resource_type": "Batch", "cost_amount": rng.uniform(1.0, 500.0), "record_count": 1}
+        for usage_date, project_name, user_email in grains
+    ])
+    db.commit()
+    return db
+
+def time_refresh(db, rows, batches: int, batch_size: int, reload_each_batch: bool) -> float:
+    """Seconds for reconciliation's per-batch alert refresh plus evaluation"""
+    
+    evaluator = BudgetAlertEvaluator()
+    started = time.perf_counter()
+    for index in range(batches):
+        if reload_each_batch:
+            evaluator.load(db)
+        else:
+            evaluator.refresh(db)
+        evaluator.apply(rows[index * batch_size:(index + 1) * batch_size])
+    return time.perf_counter() - started
+
+def full_scan(alerts, rows):
+    """Baseline: every row is matched against every active alert"""
+    
+    scopes = [(alert_scope(a.alert_type, a.project_name, a.user_email), a.time_period) for a in alerts]
+    totals = {}
+    for _, project_name, user_email, delta in rows:
+        for alert_id, (scope, period) in enumerate(scopes):
+            if scope[0] == "total" or scope == ("project", project_name) or scope == ("user", user_email):
+                totals[alert_id] = totals.get(alert_id, 0.0) + delta
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=10_000)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=5_000, help="Cost rows per ingested batch")
+    parser.add_argument("--projects", type=int, default=2_000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--scan-sample", type=int, default=200, help="Rows timed for the full-scan baseline")
+    parser.add_argument("--rollup-rows", type=int, default=50_000, help="Month-to-date rollup rows in the database")
+    parser.add_argument("--refresh-batches", type=int, default=20, help="Reconciliation batches timed with refresh")
+    args = parser.parse_args()
+    
+    rng = random.Random(7)
+    alerts = build_alerts(args.alerts, args.projects, args.users, rng)
+    rows = build_rows(args.rows, args.projects, args.users, rng)
+    
+    evaluator = BudgetAlertEvaluator()
+    started = time.perf_counter()
+    for alert in alerts:
+        evaluator.add_rule(alert)
+    index_ms = (time.perf_counter() - started) * 1000
+    
+    print(f"{args.alerts:,} alerts, {args.rows:,} cost rows in batches of {args.batch_size:,}")
+    print("=" * 50)
+    print(f"Index build:        {index_ms:>10.1f} ms")
+    
+    triggered = 0
+    started = time.perf_counter()
+    for offset in range(0, len(rows), args.batch_size):
+        triggered += len(evaluator.apply(rows[offset:offset + args.batch_size]))
+    indexed_seconds = time.perf_counter() - started
+    print(f"Indexed evaluation: {indexed_seconds * 1000:>10.1f} ms   "
+          f"{args.rows / indexed_seconds:,.0f} rows/s, {triggered:,} alerts fired")
+    
+    sample = rows[:args.scan_sample]
+    started = time.perf_counter()
+    full_scan(alerts, sample)
+    scan_seconds = (time.perf_counter() - started) * args.rows / len(sample)
+    print(f"Full scan (est.):   {scan_seconds * 1000:>10.1f} ms   "
+          f"{args.rows / scan_seconds:,.0f} rows/s")
+    print(f"Speedup: {scan_seconds / indexed_seconds:,.0f}x")
+    
+    db = seed_database(alerts, args.projects, args.users, args.rollup_rows, rng)
+    batches = min(args.refresh_batches, len(rows) // args.batch_size)
+    print()
+    print(f"Per-batch refresh: {batches} batches, {args.rollup_rows:,} rollup rows this month")
+    print("=" * 50)
+    reload_seconds = time_refresh(db, rows, batches, args.batch_size, reload_each_batch=True)
+    print(f"Reload every batch: {reload_seconds * 1000 / batches:>10.1f} ms per batch")
+    refresh_seconds = time_refresh(db, rows, batches, args.batch_size, reload_each_batch=False)
+    print(f"Seed once + sync:   {refresh_seconds * 1000 / batches:>10.1f} ms per batch (seed included)")
+    print(f"Speedup: {reload_seconds / refresh_seconds:,.1f}x")
+    db.close()
+
+if __name__ == "__main__":
+    main()
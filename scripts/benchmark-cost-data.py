@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+GenomeCostTracker cost_data Query Benchmark
+Loads synthetic cost rows into PostgreSQL and times the dashboard and
+reconciliation access patterns. Run it against a scratch database before and
+after `alembic upgrade head` to compare plain, indexed and partitioned layouts.
+
+    DATABASE_URL=postgresql://... python scripts/benchmark-cost-data.py --rows 10000000
+"""
+
+import argparse
+import os
+import statistics
+import time
+from sqlalchemy import create_engine, text
+
+QUERIES = {
+    "project month total": (
+        "SELECT sum(cost_amount) FROM cost_data "
+        "WHERE project_name = 'project-17' AND usage_date >= '2024-06-01' AND usage_date < '2024-07-01'"
+    ),
+    "job cost": (
+        "SELECT sum(cost_amount) FROM cost_data WHERE genomics_job_id = 4242"
+    ),
+    "job daily costs": (
+        "SELECT billing_period, sum(cost_amount) FROM cost_data "
+        "WHERE genomics_job_id = 4242 AND usage_date >= '2024-03-01' AND usage_date < '2024-04-01' "
+        "GROUP BY billing_period"
+    ),
+    "sample history": (
+        "SELECT usage_date, cost_amount FROM cost_data WHERE sample_id = 'SAMPLE_31337' ORDER BY usage_date"
+    ),
+    "rollup refresh day": (
+        "SELECT billing_period, project_name, user_email, resource_type, sum(cost_amount), count(id) "
+        "FROM cost_data WHERE usage_date >= '2024-09-15' AND usage_date < '2024-09-16' "
+        "GROUP BY billing_period, project_name, user_email, resource_type"
+    ),
+}
+
+def load_rows(conn, rows: int, jobs: int):
+    """Insert synthetic jobs and cost rows spread over two years"""
+    
+    print(f"Loading {jobs:,} jobs and {rows:,} cost rows...")
+    conn.execute(text("""
+        INSERT INTO genomics_jobs (id, job_id, workflow_name, sample_id, project_name, user_email,
+                                   pipeline_type, status, azure_resource_group)
+        SELECT g, 'bench-' || g, 'nf-core/sarek', 'SAMPLE_' || g, 'project-' || (g % 200),
+               'user' || (g % 50) || '@lab.com', 'WGS', 'completed', 'genomics-rg'
+        FROM generate_series(1, :jobs) g
+        ON CONFLICT DO NOTHING
+    """), {"jobs": jobs})
+    conn.execute(text("""
+        INSERT INTO cost_data (genomics_job_id, resource_id, resource_type, service_name, cost_amount,
+                               currency, billing_period, usage_date, sample_id, project_name, user_email)
+        SELECT j, '/subscriptions/bench/resourceGroups/genomics-rg/providers/Microsoft.Batch/batchAccounts/b' || g,
+               (ARRAY['Batch', 'Storage', 'Network', 'Compute'])[1 + g % 4], 'Azure Batch',
+               (g % 1000) / 100.0, 'USD', to_char(d, 'YYYY-MM-DD'), d,
+               'SAMPLE_' || (g % 100000), 'project-' || (j % 200), 'user' || (j % 50) || '@lab.com'
+        FROM (
+            SELECT g, 1 + g % :jobs AS j, date '2023-10-01' + (g % 730) AS d
+            FROM generate_series(1, :rows) g
+        ) s
+    """), {"rows": rows, "jobs": jobs})
+    conn.execute(text("ANALYZE cost_data"))
+
+def time_query(conn, sql: str, repeat: int) -> float:
+    """Median wall-clock milliseconds over repeated runs"""
+    
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(text(sql)).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-load", action="store_true", help="Reuse rows from a previous run")
+    args = parser.parse_args()
+    
+    if not args.database_url or not args.database_url.startswith("postgresql"):
+        parser.error("a PostgreSQL --database-url (or DATABASE_URL) is required")
+    
+    engine = create_engine(args.database_url)
+    with engine.begin() as conn:
+        if not args.skip_load:
+            load_rows(conn, args.rows, args.jobs)
+        
+        partitioned = conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'cost_data')"
+        )).scalar()
+        total_rows = conn.execute(text("SELECT count(*) FROM cost_data")).scalar()
+        
+        print(f"\ncost_data: {total_rows:,} rows, {'partitioned' if partitioned else 'not partitioned'}")
+        print("=" * 50)
+        for name, sql in QUERIES.items():
+            print(f"{name:<25} {time_query(conn, sql, args.repeat):>10.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+GenomeCostTracker Cost Estimator Benchmark
+Compares estimating a cohort one job at a time with estimate_job_cost against
+a single estimate_job_costs call, and times cached Batch pool lookups. Runs
+offline: the Batch pool listing is replaced by a fixed set of pools behind a
+simulated round-trip latency.
+
+    python scripts/benchmark-cost-estimator.py --jobs 2000 --pool-latency-ms 150
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from src.models.database import AzureConnection, GenomicsJob
+from src.services.azure_cost_service import AzureCostService
+
+PIPELINE_TYPES = ["WGS", "RNA-seq", "ChIP-seq", "ATAC-seq", "WES"]
+POOLS = [
+    SimpleNamespace(id="genomics-d4", vm_size="Standard_D4s_v3", target_dedicated_nodes=10, target_low_priority_nodes=0),
+    SimpleNamespace(id="genomics-f8", vm_size="Standard_F8s_v2", target_dedicated_nodes=10, target_low_priority_nodes=0),
+    SimpleNamespace(id="genomics-lowpri", vm_size="Standard_D16s_v3", target_dedicated_nodes=0, target_low_priority_nodes=5),
+]
+
+class OfflineCostService(AzureCostService):
+    """Cost service whose pool listing costs one simulated Azure round trip"""
+
+    def __init__(self, connection: AzureConnection, pool_latency: float):
+        super().__init__(connection)
+        self.pool_latency = pool_latency
+        self.pool_lookups = 0
+
+    async def _list_batch_pools(self):
+        self.pool_lookups += 1
+        await asyncio.sleep(self.pool_latency)
+        return POOLS
+
+def build_cohort(size: int):
+    rng = random.Random(42)
+    pool_ids = [pool.id for pool in POOLS] + [None]
+    return [
+        GenomicsJob(
+            job_id=f"bench-{index}",
+            sample_id=f"SAMPLE_{index}",
+            pipeline_type=rng.choice(PIPELINE_TYPES),
+            azure_batch_pool_id=rng.choice(pool_ids),
+            estimated_runtime_hours=rng.uniform(0.5, 48.0)
+        )
+        for index in range(size)
+    ]
+
+async def run(args):
+    connection = AzureConnection(
+        id=0, tenant_id="bench", client_id="bench", client_secret="bench", subscription_id="bench"
+    )
+    jobs = build_cohort(args.jobs)
+    
+    print(f"Estimating a cohort of {args.jobs:,} jobs ({args.repeat} runs, "
+          f"{args.pool_latency_ms:g} ms per pool lookup)")
+    print("=" * 50)
+    
+    scalar_timings, vector_timings = [], []
+    for _ in range(args.repeat):
+        # Each path starts from a new service with an empty pool cache and pays for one listing
+        service = OfflineCostService(connection, args.pool_latency_ms / 1000)
+        started = time.perf_counter()
+        scalar_total = sum([await service.estimate_job_cost(job) for job in jobs])
+        scalar_timings.append(time.perf_counter() - started)
+        scalar_lookups = service.pool_lookups
+        service.close()
+        
+        service = OfflineCostService(connection, args.pool_latency_ms / 1000)
+        started = time.perf_counter()
+        cohort = await service.estimate_job_costs(jobs)
+        vector_timings.append(time.perf_counter() - started)
+        vector_lookups = service.pool_lookups
+        service.close()
+    
+    scalar_ms = min(scalar_timings) * 1000
+    vector_ms = min(vector_timings) * 1000
+    print(f"estimate_job_cost x{args.jobs:<8,} {scalar_ms:>10.2f} ms   "
+          f"{scalar_lookups:>5} lookups   total ${scalar_total:,.2f}")
+    print(f"estimate_job_costs          {vector_ms:>10.2f} ms   "
+          f"{vector_lookups:>5} lookups   total ${cohort['totals']['total_cost']:,.2f}")
+    print(f"Speedup: {scalar_ms / vector_ms:.1f}x")
+    
+    service = OfflineCostService(connection, args.pool_latency_ms / 1000)
+    await service.pool_cache.get_all()
+    lookups = 100_000
+    started = time.perf_counter()
+    for index in range(lookups):
+        await service.pool_cache.get(POOLS[index % len(POOLS)].id)
+    print(f"Cached pool lookup: {(time.perf_counter() - started) / lookups * 1e6:.2f} us")
+    
+    service.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pool-latency-ms", type=float, default=0.0,
+                        help="Simulated Azure round trip for each Batch pool listing")
+    args = parser.parse_args()
+    
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+GenomeCostTracker Resource Tagging Benchmark
+Tags a simulated resource group through the tagging engine, with ARM write
+latency and 429 throttling, and compares it with the previous one-at-a-time
+update_by_id loop. A share of resources already carry the job's tags.
+
+    python scripts/benchmark-resource-tagging.py --resources 500 --already-tagged 0.6
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from azure.core.exceptions import HttpResponseError
+
+from src.services.azure_executor import AzureCallExecutor
+from src.services.resource_tagging import ResourceTagger, TokenBucket
+
+JOB_TAGS = {"sample_id": "SAMPLE_1", "project": "cohort-a", "workflow_type": "WGS",
+            "user": "user@lab.com", "job_id": "happy_darwin", "created_by": "GenomeCostTracker"}
+
+class Resource:
+    def __init__(self, resource_id: str, tags: dict):
+        self.id = resource_id
+        self.tags = tags
+
+class ThrottledResponse:
+    status_code = 429
+    reason = "Too Many Requests"
+    headers = {"Retry-After": "1"}
+
+    def text(self):
+        return ""
+
+class SimulatedTagsClient:
+    """Blocking tag PATCHes with fixed latency behind a server-side token bucket, like ARM's write limit"""
+
+    def __init__(self, latency: float, writes_per_second: float, burst: int):
+        self.latency = latency
+        self.writes_per_second = writes_per_second
+        self.burst = burst
+        self.writes = 0
+        self.throttled = 0
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def update_at_scope(self, scope, parameters, cls=None):
+        time.sleep(self.latency)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.writes_per_second)
+            self._updated = now
+            if self._tokens < 1:
+                self.throttled += 1
+                raise HttpResponseError(message="Too many requests", response=ThrottledResponse())
+            self._tokens -= 1
+            self.writes += 1
+            return {"x-ms-ratelimit-remaining-subscription-writes": str(int(self._tokens))}
+
+def build_resources(count: int, already_tagged: float, rng: random.Random):
+    return [
+        Resource(f"/subscriptions/bench/resourceGroups/genomics-rg/providers/Microsoft.Compute/disks/d{i}",
+                 dict(JOB_TAGS) if rng.random() < already_tagged else {"owner": "lab"})
+        for i in range(count)
+    ]
+
+def sequential(client: SimulatedTagsClient, resources) -> float:
+    """The previous loop: one blocking update per resource, tagged or not"""
+    
+    started = time.perf_counter()
+    for resource in resources:
+        time.sleep(client.latency)
+    return time.perf_counter() - started
+
+async def engine(client: SimulatedTagsClient, resources, rate: float, concurrency: int):
+    executor = AzureCallExecutor(max_workers=concurrency, per_connection_limit=concurrency)
+    tagger = ResourceTagger(
+        client,
+        lambda func, *args, **kwargs: executor.run("bench", func, *args, **kwargs),
+        TokenBucket(rate, capacity=int(rate * 2)),
+        max_retries=5
+    )
+    started = time.perf_counter()
+    results = await tagger.tag_resources(resources, JOB_TAGS)
+    elapsed = time.perf_counter() - started
+    executor.shutdown()
+    return elapsed, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resources", type=int, default=500)
+    parser.add_argument("--already-tagged", type=float, default=0.6, help="Share of resources already tagged")
+    parser.add_argument("--latency-ms", type=float, default=150, help="Simulated ARM write latency")
+    parser.add_argument("--rate", type=float, default=10.0, help="Tag writes per second (TAGGING_WRITES_PER_SECOND)")
+    parser.add_argument("--concurrency", type=int, default=4, help="AZURE_SDK_MAX_CONCURRENCY_PER_CONNECTION")
+    args = parser.parse_args()
+    
+    resources = build_resources(args.resources, args.already_tagged, random.Random(7))
+    # Azure's budget is shared with other writers in the subscription; leave the engine half of it
+    client = SimulatedTagsClient(args.latency_ms / 1000, writes_per_second=args.rate * 2, burst=int(args.rate * 4))
+    
+    print(f"{args.resources:,} resources, {args.already_tagged:.0%} already tagged, "
+          f"{args.latency_ms:.0f} ms per write, {args.rate:g} writes/s")
+    print("=" * 50)
+    
+    before = sequential(client, resources)
+    print(f"Sequential update_by_id: {before:>8.1f} s   {len(resources):,} writes")
+    
+    after, results = asyncio.run(engine(client, resources, args.rate, args.concurrency))
+    counts = {status: sum(1 for result in results if result.status == status) for status in ("updated", "unchanged", "failed")}
+    print(f"Tagging engine:          {after:>8.1f} s   {client.writes:,} writes, {client.throttled} throttled")
+    print(f"  {counts['updated']} updated, {counts['unchanged']} unchanged, {counts['failed']} failed")
+    print(f"Speedup: {before / after:.1f}x")
+
+if __name__ == "__main__":
+    main()
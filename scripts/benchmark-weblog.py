@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+GenomeCostTracker Weblog Ingestion Benchmark
+Replays Nextflow -with-weblog task events from many concurrent pipelines
+through the batched writer and reports sustained events per second. Point
+DATABASE_URL at a scratch database; SQLite in a temp file is used otherwise.
+
+    DATABASE_URL=postgresql://... python scripts/benchmark-weblog.py --pipelines 50 --tasks 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'weblog-bench.db')}"
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from src.models.database import SessionLocal, create_tables
+from src.services.weblog_writer import apply_weblog_events
+
+PROCESSES = ["FASTQC", "BWA_MEM", "MARKDUPLICATES", "BASERECALIBRATOR", "HAPLOTYPECALLER"]
+
+def run_started(run_name: str) -> dict:
+    return {
+        "runName": run_name,
+        "event": "started",
+        "utcTime": "2024-01-15T10:00:00Z",
+        "metadata": {
+            "parameters": {"project_name": f"project-{hash(run_name) % 20}", "sample_id": run_name,
+                           "user_email": "bench@lab.com", "pipeline_type": "WGS"},
+            "workflow": {"manifest": {"name": "nf-core/sarek"}}
+        }
+    }
+
+def task_event(run_name: str, task_id: int, kind: str, rng: random.Random) -> dict:
+    trace = {"task_id": task_id, "process": rng.choice(PROCESSES), "name": f"task {task_id}",
+             "cpus": rng.choice([1, 2, 4, 8]), "memory": 8 * 1024 ** 3, "submit": 1705312800000}
+    if kind == "process_submitted":
+        trace["status"] = "SUBMITTED"
+    else:
+        trace.update({"status": "COMPLETED", "exit": 0, "realtime": rng.randint(60_000, 7_200_000),
+                      "%cpu": rng.uniform(50, 400), "peak_rss": rng.randint(1, 16) * 1024 ** 3,
+                      "complete": 1705320000000})
+    return {"runName": run_name, "event": kind, "utcTime": "2024-01-15T10:00:00Z", "trace": trace}
+
+def build_events(pipelines: int, tasks: int, rng: random.Random):
+    """Interleaved submitted/completed events, as concurrent runs would post them"""
+    
+    events = [run_started(f"bench-run-{run}") for run in range(pipelines)]
+    streams = []
+    for run in range(pipelines):
+        run_name = f"bench-run-{run}"
+        streams.append([task_event(run_name, task, "process_submitted", rng) for task in range(1, tasks + 1)]
+                       + [task_event(run_name, task, "process_completed", rng) for task in range(1, tasks + 1)])
+    
+    positions = [0] * pipelines
+    remaining = pipelines * tasks * 2
+    while remaining:
+        run = rng.randrange(pipelines)
+        if positions[run] < len(streams[run]):
+            events.append(streams[run][positions[run]])
+            positions[run] += 1
+            remaining -= 1
+    return events
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pipelines", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=1000, help="Tasks per pipeline")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Events per flush (WEBLOG_BATCH_SIZE)")
+    args = parser.parse_args()
+    
+    create_tables()
+    events = build_events(args.pipelines, args.tasks, random.Random(7))
+    print(f"{len(events):,} events from {args.pipelines} pipelines, flushed in batches of {args.batch_size:,}")
+    print("=" * 50)
+    
+    db = SessionLocal()
+    latencies = []
+    started = time.perf_counter()
+    try:
+        for offset in range(0, len(events), args.batch_size):
+            batch_started = time.perf_counter()
+            apply_weblog_events(db, events[offset:offset + args.batch_size])
+            latencies.append(time.perf_counter() - batch_started)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    print(f"Total:        {elapsed:>8.2f} s   {len(events) / elapsed:,.0f} events/s")
+    print(f"Flush p50:    {latencies[len(latencies) // 2] * 1000:>8.1f} ms")
+    print(f"Flush max:    {latencies[-1] * 1000:>8.1f} ms")
+
+if __name__ == "__main__":
+    main()
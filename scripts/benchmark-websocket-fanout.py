@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+GenomeCostTracker WebSocket Fan-out Benchmark
+Spreads simulated WebSocket clients over several in-process "workers", each
+with its own Broadcaster, and publishes job events from one of them. Reports
+end-to-end delivery latency and deliveries per second through the message bus.
+
+    python scripts/benchmark-websocket-fanout.py --connections 10000 --workers 4
+    python scripts/benchmark-websocket-fanout.py --bus redis --redis-url redis://localhost:6379
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from src.api.broadcaster import Broadcaster
+from src.api.message_bus import InProcessMessageBus, RedisMessageBus
+
+class BenchmarkSocket:
+    """Minimal WebSocket double that records when each message arrives"""
+
+    def __init__(self, results: list):
+        self.results = results
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.results.append(time.perf_counter() - json.loads(message)["sent_at"])
+
+def build_bus(args, hub: list):
+    if args.bus == "redis":
+        return RedisMessageBus(args.redis_url, "genomecost:ws:benchmark")
+    return InProcessMessageBus(hub)
+
+async def run(args):
+    hub = []
+    workers = [Broadcaster(queue_size=100, send_timeout=5.0, bus=build_bus(args, hub)) for _ in range(args.workers)]
+    for worker in workers:
+        await worker.start()
+    
+    latencies = []
+    for index in range(args.connections):
+        worker = workers[index % args.workers]
+        await worker.connect(BenchmarkSocket(latencies), [f"project:project-{index % args.projects}"])
+    
+    print(f"{args.connections:,} connections over {args.workers} workers, "
+          f"{args.projects} projects, {args.bus} bus")
+    print("=" * 50)
+    
+    # Each event reaches every client subscribed to its project, on any worker
+    expected = sum(
+        len(worker._subscribers.get(f"project:project-{event % args.projects}", ()))
+        for event in range(args.events) for worker in workers
+    )
+    
+    started = time.perf_counter()
+    for event in range(args.events):
+        workers[0].publish(
+            json.dumps({"type": "job_created", "job_id": f"bench-{event}", "sent_at": time.perf_counter()}),
+            topics=[f"project:project-{event % args.projects}"]
+        )
+        await asyncio.sleep(0)
+    
+    while len(latencies) < expected and time.perf_counter() - started < args.timeout:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    
+    for worker in workers:
+        for client in list(worker.clients):
+            await worker.disconnect(client)
+        await worker.stop()
+    
+    if not latencies:
+        print("No messages delivered")
+        return
+    
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    print(f"Delivered:    {len(latencies):,} / {expected:,}")
+    print(f"Throughput:   {len(latencies) / elapsed:,.0f} deliveries/s")
+    print(f"Latency p50:  {percentile(0.50):.2f} ms")
+    print(f"Latency p95:  {percentile(0.95):.2f} ms")
+    print(f"Latency p99:  {percentile(0.99):.2f} ms")
+    print(f"Latency mean: {statistics.mean(latencies) * 1000:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--events", type=int, default=1_000)
+    parser.add_argument("--bus", choices=["memory", "redis"], default="memory")
+    parser.add_argument("--redis-url", default=os.environ.get("REDIS_URL", "redis://localhost:6379"))
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+    
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
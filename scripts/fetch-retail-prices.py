@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+GenomeCostTracker Price Catalog Snapshot
+Downloads Linux VM prices from the public Azure Retail Prices API into a new
+versioned snapshot directory that the backend's price catalog can load.
+
+    python scripts/fetch-retail-prices.py --region eastus --region westeurope
+"""
+
+import argparse
+import json
+import os
+from datetime import date
+
+import requests
+
+RETAIL_PRICES_URL = "https://prices.azure.com/api/retail/prices"
+
+def fetch_region(region: str, output_dir: str) -> int:
+    """Write each API page for one region to its own JSON file; returns the item count"""
+    
+    url = RETAIL_PRICES_URL
+    params = {"$filter": f"serviceName eq 'Virtual Machines' and armRegionName eq '{region}' and priceType eq 'Consumption'"}
+    page = 0
+    items = 0
+    
+    while url:
+        response = requests.get(url, params=params, timeout=60)
+        response.raise_for_status()
+        payload = response.json()
+        
+        with open(os.path.join(output_dir, f"{region}-{page:04d}.json"), "w") as export:
+            json.dump({"Items": payload.get("Items", [])}, export)
+        
+        items += len(payload.get("Items", []))
+        url = payload.get("NextPageLink")
+        params = None  # NextPageLink already carries the filter
+        page += 1
+    
+    return items
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--region", action="append", required=True, help="ARM region name, e.g. eastus")
+    parser.add_argument("--catalog-dir", default=os.environ.get("PRICE_CATALOG_DIR", "backend/data/price_catalog"))
+    parser.add_argument("--version", default=date.today().isoformat(), help="Snapshot name (sorts chronologically)")
+    args = parser.parse_args()
+    
+    output_dir = os.path.join(args.catalog_dir, args.version)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    for region in args.region:
+        print(f"{region}: {fetch_region(region, output_dir):,} prices")
+    print(f"Snapshot written to {output_dir}")
+
+if __name__ == "__main__":
+    main()
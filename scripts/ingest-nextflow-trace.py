@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+GenomeCostTracker Nextflow Trace Ingestion
+Streams a Nextflow trace.txt to the API, which stores per-task resource usage
+and attributes compute cost to each process of the job. The file is read and
+sent in chunks, so traces of any size are uploaded without loading them.
+
+    python scripts/ingest-nextflow-trace.py RUN_NAME results/trace.txt --token $GENOMECOST_API_TOKEN
+    python scripts/ingest-nextflow-trace.py RUN_NAME results/trace.txt --direct
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+CHUNK_BYTES = 1024 * 1024
+
+def read_chunks(path: str, progress: bool):
+    """Yield the file in fixed-size chunks, reporting throughput every ~256 MB"""
+    
+    total = os.path.getsize(path)
+    sent = 0
+    started = time.perf_counter()
+    with open(path, "rb") as trace:
+        while True:
+            chunk = trace.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+            
+            sent += len(chunk)
+            if progress and sent % (256 * CHUNK_BYTES) < CHUNK_BYTES:
+                rate = sent / max(time.perf_counter() - started, 1e-9) / 1024 ** 2
+                print(f"  {sent / 1024 ** 2:,.0f} / {total / 1024 ** 2:,.0f} MB ({rate:,.1f} MB/s)")
+
+def upload(args) -> dict:
+    params = {"low_priority": str(args.low_priority).lower()}
+    if args.vm_size:
+        params["vm_size"] = args.vm_size
+    if args.region:
+        params["region"] = args.region
+    
+    # A generator body is sent with chunked transfer encoding
+    response = requests.post(
+        f"{args.api_url.rstrip('/')}/jobs/{args.job_id}/trace",
+        params=params,
+        data=read_chunks(args.trace, args.progress),
+        headers={"Authorization": f"Bearer {args.token}", "Content-Type": "text/tab-separated-values"},
+        timeout=args.timeout
+    )
+    if response.status_code >= 400:
+        sys.exit(f"Upload failed ({response.status_code}): {response.text}")
+    return response.json()
+
+def ingest_direct(args) -> dict:
+    """Parse the trace in this process and write it straight to DATABASE_URL"""
+    
+    from src.models.database import SessionLocal, GenomicsJob
+    from src.services.trace_ingestion import TraceIngestor
+    
+    db = SessionLocal()
+    try:
+        job = db.query(GenomicsJob).filter(GenomicsJob.job_id == args.job_id).first()
+        if job is None:
+            sys.exit(f"Job {args.job_id} not found")
+        
+        ingestor = TraceIngestor(db, job, vm_size=args.vm_size, low_priority=args.low_priority, region=args.region)
+        for chunk in read_chunks(args.trace, args.progress):
+            ingestor.feed(chunk)
+        return ingestor.finish()
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("job_id", help="Nextflow run name the job was registered with")
+    parser.add_argument("trace", help="Path to trace.txt")
+    parser.add_argument("--api-url", default=os.environ.get("GENOMECOST_API_URL", "http://localhost:8000/api/v1"))
+    parser.add_argument("--token", default=os.environ.get("GENOMECOST_API_TOKEN", ""))
+    parser.add_argument("--vm-size", help="VM size the tasks ran on; defaults to the job's Nextflow config")
+    parser.add_argument("--low-priority", action="store_true", help="Price tasks at low-priority rates")
+    parser.add_argument("--region", help="ARM region for pricing; defaults to AZURE_DEFAULT_REGION")
+    parser.add_argument("--direct", action="store_true", help="Write to the database instead of the API")
+    parser.add_argument("--timeout", type=float, default=3600)
+    parser.add_argument("--progress", action="store_true")
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    result = ingest_direct(args) if args.direct else upload(args)
+    elapsed = time.perf_counter() - started
+    
+    print(f"Ingested {result['tasks']:,} tasks for {result['job_id']} in {elapsed:.1f}s "
+          f"({result['skipped_lines']:,} unparseable lines skipped)")
+    print(f"Priced on {result['vm_size'] or 'default VM'} at ${result['node_cost_per_hour']:.4f}/h: "
+          f"${result['total_cost']:,.2f} compute")
+
+if __name__ == "__main__":
+    main()
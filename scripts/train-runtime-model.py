@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+GenomeCostTracker Runtime Model Training
+Fits the runtime predictor from every completed job in the database and
+writes it to RUNTIME_MODEL_PATH, replacing the incrementally updated model.
+The API loads the file at startup.
+
+    DATABASE_URL=postgresql://... python scripts/train-runtime-model.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from src.config.settings import settings
+from src.models.database import SessionLocal, GenomicsJob
+from src.services.runtime_predictor import RuntimePredictor, job_runtime_features, job_runtime_hours
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=settings.RUNTIME_MODEL_PATH)
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Jobs loaded per query")
+    args = parser.parse_args()
+    
+    model = RuntimePredictor()
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        query = db.query(GenomicsJob).filter(
+            GenomicsJob.status == "completed",
+            GenomicsJob.completed_at.isnot(None)
+        ).order_by(GenomicsJob.id)
+        
+        last_id = 0
+        while True:
+            jobs = query.filter(GenomicsJob.id > last_id).limit(args.batch_size).all()
+            if not jobs:
+                break
+            model.update((job_runtime_features(job), job_runtime_hours(job)) for job in jobs)
+            last_id = jobs[-1].id
+            db.expunge_all()
+    finally:
+        db.close()
+    
+    print(f"Trained on {model.sample_count:,} runs in {time.perf_counter() - started:.1f}s "
+          f"({len(model.vocabulary)} categories, log-sigma {model.log_sigma:.3f})")
+    if model.weights is None:
+        print(f"Fewer than {settings.RUNTIME_MODEL_MIN_SAMPLES} runs; the model will not predict yet")
+    
+    model.save(args.output)
+    print(f"Model written to {args.output}")
+
+if __name__ == "__main__":
+    main()